@@ -9,8 +9,9 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
-from .const import DOMAIN
-from .coordinator import HovalDataUpdateCoordinator
+from .catalog import async_get_catalog
+from .const import CONF_UNIT_ID, DEFAULT_UNIT_ID, DOMAIN
+from .coordinator import HovalDataUpdateCoordinator, entry_option, parse_ignore_keywords
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,8 +22,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Hoval Gateway from a config entry."""
     _LOGGER.info('Setting up Hoval Gateway integration')
 
+    # Shared datapoint catalog, parsed once in the executor
+    catalog = await async_get_catalog(
+        hass, entry_option(entry, CONF_UNIT_ID, DEFAULT_UNIT_ID), parse_ignore_keywords(entry)
+    )
+
     # Create coordinator
-    coordinator = HovalDataUpdateCoordinator(hass, entry)
+    coordinator = HovalDataUpdateCoordinator(hass, entry, catalog)
 
     # Initialize connection
     try:
@@ -37,9 +43,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Options changes swap the catalog in place instead of reloading the entry
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Handle options update."""
+    coordinator: HovalDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_reload_catalog()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.info('Unloading Hoval Gateway integration')
@@ -0,0 +1,108 @@
+"""Datapoint catalog for Hoval Gateway.
+
+The catalog is parsed from the bundled CSV in the executor and shared
+read-only between all config entries with the same unit ID and ignore
+keywords.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import logging
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_CATALOGS
+from .validation import DatapointRules, compile_rules
+
+_LOGGER = logging.getLogger(__name__)
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), 'hoval_datapoints.csv')
+
+Catalog = Mapping[int, 'Datapoint']
+
+
+@dataclass(frozen=True)
+class Datapoint:
+    """A single datapoint of the catalog."""
+
+    name: str
+    type: str
+    decimal: int
+    unit: str
+    rules: DatapointRules
+
+
+def load_catalog(csv_path: str, unit_id: int, ignore_keywords: tuple[str, ...]) -> Catalog:
+    """Load datapoints from the CSV file (blocking)."""
+    datapoints: dict[int, Datapoint] = {}
+
+    if not os.path.exists(csv_path):
+        _LOGGER.warning('CSV file not found: %s', csv_path)
+        return MappingProxyType(datapoints)
+
+    try:
+        with open(csv_path, encoding='utf-8', errors='replace') as f:
+            line = f.readline()
+            delimiter = ';' if ';' in line else ','
+            f.seek(0)
+
+            reader = csv.DictReader(f, delimiter=delimiter)
+            for row in reader:
+                if row.get('UnitName') != 'HV':
+                    continue
+
+                # Filter by unit ID
+                try:
+                    row_unit_id = int(row.get('UnitId', 0))
+                    if unit_id and row_unit_id != unit_id:
+                        continue
+                except:
+                    pass
+
+                # Blacklist check
+                name = row['DatapointName']
+                if any(kw in name for kw in ignore_keywords):
+                    continue
+
+                try:
+                    dp_id = int(row['DatapointId'])
+                    decimal = int(row.get('Decimal', 0))
+                    unit = row.get('unit', '')
+                    datapoints[dp_id] = Datapoint(
+                        name=name,
+                        type=row['TypeName'],
+                        decimal=decimal,
+                        unit=unit,
+                        rules=compile_rules(name, unit),
+                    )
+                except (KeyError, ValueError):
+                    continue
+
+        _LOGGER.info('Loaded %d datapoints (Unit %d)', len(datapoints), unit_id)
+    except Exception as err:
+        _LOGGER.error('Failed to load CSV: %s', err)
+
+    return MappingProxyType(datapoints)
+
+
+async def async_get_catalog(hass: HomeAssistant, unit_id: int, ignore_keywords: tuple[str, ...]) -> Catalog:
+    """Return the shared catalog for unit ID and ignore keywords, parsing the CSV once in the executor."""
+    catalogs: dict[tuple[int, tuple[str, ...]], asyncio.Future[Catalog]] = hass.data.setdefault(DATA_CATALOGS, {})
+    key = (unit_id, ignore_keywords)
+
+    # Cache the pending load so concurrent setups wait for the same parse
+    future = catalogs.get(key)
+    if future is None:
+        future = catalogs[key] = hass.async_add_executor_job(load_catalog, CSV_PATH, unit_id, ignore_keywords)
+
+    catalog = await asyncio.shield(future)
+    if not catalog:
+        # Do not keep a failed load around, the next setup retries
+        catalogs.pop(key, None)
+    return catalog
@@ -11,7 +11,7 @@ import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PORT
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 
 from .const import (
@@ -53,6 +53,12 @@ class HovalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> HovalOptionsFlow:
+        """Get the options flow for this handler."""
+        return HovalOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Handle the initial step."""
         errors: dict[str, str] = {}
@@ -80,3 +86,28 @@ class HovalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(step_id='user', data_schema=data_schema, errors=errors)
+
+
+class HovalOptionsFlow(config_entries.OptionsFlow):
+    """Change unit ID and ignore keywords without reconnecting to the device."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title='', data=user_input)
+
+        current = {**self._entry.data, **self._entry.options}
+        data_schema = vol.Schema(
+            {
+                vol.Optional(CONF_UNIT_ID, default=current.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)): cv.positive_int,
+                vol.Optional(
+                    CONF_IGNORE_KEYWORDS, default=current.get(CONF_IGNORE_KEYWORDS, DEFAULT_IGNORE_KEYWORDS)
+                ): str,
+            }
+        )
+
+        return self.async_show_form(step_id='init', data_schema=data_schema)
@@ -2,6 +2,9 @@
 
 DOMAIN = 'hoval_gateway'
 
+# hass.data key for the shared datapoint catalogs (see catalog.py)
+DATA_CATALOGS = f'{DOMAIN}_catalogs'
+
 # Configuration keys
 CONF_HOST = 'host'
 CONF_PORT = 'port'
@@ -16,3 +19,22 @@ DEFAULT_SCAN_INTERVAL = 5  # seconds
 
 # Update coordinator
 UPDATE_INTERVAL = 5  # seconds
+
+# Diagnostics: number of recent raw frames kept for download
+DIAGNOSTICS_FRAMES = 50
+
+# Reconnect backoff (first retry is immediate)
+RECONNECT_BACKOFF_INITIAL = 1.0  # seconds
+RECONNECT_BACKOFF_MAX = 30.0  # seconds
+
+# TCP keepalive: detect dead peers after idle + interval * count seconds
+KEEPALIVE_IDLE = 5  # seconds
+KEEPALIVE_INTERVAL = 2  # seconds
+KEEPALIVE_COUNT = 3
+TCP_USER_TIMEOUT_MS = 15000
+
+# Plausibility rules (see validation.py)
+TEMP_RANGE = (-40.0, 70.0)
+TEMP_SENTINELS = frozenset({25.5, -25.5})
+TEMP_SENTINEL_TOLERANCE = 0.1
+OUTDOOR_SENTINELS = frozenset({0.0})  # only while the datapoint has no value
@@ -3,52 +3,141 @@
 from __future__ import annotations
 
 import asyncio
-import csv
 import logging
-import os
+import random
+import socket
 import struct
+import time
+from collections import Counter, deque
+from collections.abc import Callable
 from datetime import timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PORT
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .catalog import Catalog, Datapoint, async_get_catalog
 from .const import (
     CONF_IGNORE_KEYWORDS,
     CONF_UNIT_ID,
     DEFAULT_IGNORE_KEYWORDS,
     DEFAULT_UNIT_ID,
+    DIAGNOSTICS_FRAMES,
     DOMAIN,
+    KEEPALIVE_COUNT,
+    KEEPALIVE_IDLE,
+    KEEPALIVE_INTERVAL,
+    RECONNECT_BACKOFF_INITIAL,
+    RECONNECT_BACKOFF_MAX,
+    TCP_USER_TIMEOUT_MS,
     UPDATE_INTERVAL,
 )
+from .validation import Validator, make_validator
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def reconnect_delay(attempt: int) -> float:
+    """Return the delay before connection attempt number attempt (0 = immediately)."""
+    if attempt <= 0:
+        return 0.0
+    delay = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_INITIAL * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def configure_keepalive(sock: socket.socket | None) -> None:
+    """Enable TCP keepalive so half-open connections are detected within seconds."""
+    if sock is None:
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ('TCP_KEEPIDLE', KEEPALIVE_IDLE),
+        ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+        ('TCP_KEEPCNT', KEEPALIVE_COUNT),
+        ('TCP_USER_TIMEOUT', TCP_USER_TIMEOUT_MS),
+    ):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+def entry_option(entry: ConfigEntry, key: str, default: Any) -> Any:
+    """Return a setting of a config entry, options (set via the options flow) take precedence."""
+    return entry.options.get(key, entry.data.get(key, default))
+
+
+def parse_ignore_keywords(entry: ConfigEntry) -> tuple[str, ...]:
+    """Return the ignore keywords of a config entry."""
+    ignore_str = entry_option(entry, CONF_IGNORE_KEYWORDS, DEFAULT_IGNORE_KEYWORDS)
+    return tuple(kw.strip() for kw in ignore_str.split(',') if kw.strip())
+
+
+def normalize_name(name: str) -> str:
+    """Return the key of a datapoint in last_sent."""
+    return (
+        name.replace(' ', '_')
+        .replace('ä', 'ae')
+        .replace('ö', 'oe')
+        .replace('ü', 'ue')
+        .replace('ß', 'ss')
+        .replace('.', '')
+        .replace('/', '_')
+        .replace('(', '')
+        .replace(')', '')
+        .replace('[', '')
+        .replace(']', '')
+        .replace('{', '')
+        .replace('}', '')
+        .replace("'", '')
+        .replace('"', '')
+        .replace('!', '')
+        .replace('?', '')
+        .replace('#', '')
+        .replace('+', '')
+        .lower()
+    )
+
+
 class HovalDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Hoval data."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        """Initialize."""
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, catalog: Catalog) -> None:
+        """Initialize with the shared datapoint catalog (see catalog.async_get_catalog)."""
         self.hass = hass
         self.entry = entry
         self.host = entry.data[CONF_HOST]
         self.port = entry.data[CONF_PORT]
-        self.unit_id = entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
-
-        ignore_str = entry.data.get(CONF_IGNORE_KEYWORDS, DEFAULT_IGNORE_KEYWORDS)
-        self.ignore_keywords = [kw.strip() for kw in ignore_str.split(',') if kw.strip()]
-
-        self.datapoint_map = {}
+        self.unit_id = entry_option(entry, CONF_UNIT_ID, DEFAULT_UNIT_ID)
+        self.ignore_keywords = parse_ignore_keywords(entry)
+
+        self.datapoint_map: Catalog = {}
+        self._validators: dict[int, Validator] = {}
+        self._catalog_listeners: list[Callable[[], None]] = []
+        # Datapoints without an enabled entity: their bytes are skipped without decoding
+        self.skip_ids: frozenset[int] = frozenset()
+        self.set_catalog(catalog)
         self.last_sent = {}
         self._socket = None
         self._reader_task = None
         self._running = False
-
-        # Load CSV datapoints
-        self._load_csv()
+        # Time from connection loss to first data after reconnect (seconds)
+        self.reconnect_stats = {'count': 0, 'last': 0.0, 'max': 0.0}
+
+        # Diagnostics (see diagnostics.py): recent raw frames with parse duration, counters
+        self.recent_frames: deque[tuple[float, bytes, float]] = deque(maxlen=DIAGNOSTICS_FRAMES)
+        self.parse_stats = {'frames': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        self.decoded: Counter[int] = Counter()  # datapoint ID -> values accepted
+        self.rejected: Counter[int] = Counter()  # datapoint ID -> values dropped by the validator
+        self.undecodable: Counter[int] = Counter()  # datapoint ID -> error codes / truncated values
+        self.connection_stats: dict[str, Any] = {
+            'connects': 0,
+            'disconnects': 0,
+            'errors': 0,
+            'last_error': None,
+            'connected_since': None,
+            'bytes_received': 0,
+        }
 
         super().__init__(
             hass,
@@ -57,54 +146,49 @@ class HovalDataUpdateCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(seconds=UPDATE_INTERVAL),
         )
 
-    def _load_csv(self) -> None:
-        """Load datapoints from CSV file."""
-        csv_path = os.path.join(os.path.dirname(__file__), 'hoval_datapoints.csv')
-
-        if not os.path.exists(csv_path):
-            _LOGGER.warning('CSV file not found: %s', csv_path)
+    @callback
+    def set_catalog(self, catalog: Catalog) -> None:
+        """Swap in a new datapoint catalog, keeping the connection, stream buffer and last values."""
+        # Validators are per entry (the outdoor startup filter reads last_sent), the catalog is shared.
+        # Both are replaced without awaiting in between, so no frame sees a mix of old and new.
+        self._validators = {dp_id: self._make_validator(dp) for dp_id, dp in catalog.items()}
+        self.datapoint_map = catalog
+        for listener in list(self._catalog_listeners):
+            listener()
+
+    def _make_validator(self, dp: Datapoint) -> Validator:
+        """Create the validator of a datapoint, its startup rule ends once the datapoint has a value."""
+        key = normalize_name(dp.name)
+        return make_validator(dp.rules, lambda: key in self.last_sent)
+
+    @callback
+    def async_add_catalog_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call listener after each catalog swap, returns a function to remove it."""
+        self._catalog_listeners.append(listener)
+        return lambda: self._catalog_listeners.remove(listener)
+
+    @callback
+    def set_interest(self, skip_ids: frozenset[int]) -> None:
+        """Set the datapoints to skip (entity disabled), takes effect with the next frame."""
+        if skip_ids != self.skip_ids:
+            _LOGGER.debug('Skipping %d of %d datapoints', len(skip_ids), len(self.datapoint_map))
+            self.skip_ids = skip_ids
+
+    async def async_reload_catalog(self) -> None:
+        """Apply changed unit ID / ignore keywords from the options flow without reconnecting."""
+        unit_id = entry_option(self.entry, CONF_UNIT_ID, DEFAULT_UNIT_ID)
+        ignore_keywords = parse_ignore_keywords(self.entry)
+        if (unit_id, ignore_keywords) == (self.unit_id, self.ignore_keywords):
             return
 
-        count = 0
-        try:
-            with open(csv_path, encoding='utf-8', errors='replace') as f:
-                line = f.readline()
-                delimiter = ';' if ';' in line else ','
-                f.seek(0)
-
-                reader = csv.DictReader(f, delimiter=delimiter)
-                for row in reader:
-                    if row.get('UnitName') != 'HV':
-                        continue
-
-                    # Filter by unit ID
-                    try:
-                        unit_id = int(row.get('UnitId', 0))
-                        if self.unit_id and unit_id != self.unit_id:
-                            continue
-                    except:
-                        pass
-
-                    # Blacklist check
-                    name = row['DatapointName']
-                    if any(kw in name for kw in self.ignore_keywords):
-                        continue
-
-                    try:
-                        dp_id = int(row['DatapointId'])
-                        self.datapoint_map[dp_id] = {
-                            'name': name,
-                            'type': row['TypeName'],
-                            'decimal': int(row.get('Decimal', 0)),
-                            'unit': row.get('unit', ''),
-                        }
-                        count += 1
-                    except (KeyError, ValueError):
-                        continue
+        catalog = await async_get_catalog(self.hass, unit_id, ignore_keywords)
+        if not catalog:
+            _LOGGER.error('Empty datapoint catalog for unit %d, keeping the current one', unit_id)
+            return
 
-            _LOGGER.info('Loaded %d datapoints (Unit %d)', count, self.unit_id)
-        except Exception as err:
-            _LOGGER.error('Failed to load CSV: %s', err)
+        self.unit_id, self.ignore_keywords = unit_id, ignore_keywords
+        self.set_catalog(catalog)
+        _LOGGER.info('Datapoint catalog reloaded: %d datapoints (unit %d)', len(catalog), unit_id)
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch data from Hoval device."""
@@ -124,16 +208,29 @@ class HovalDataUpdateCoordinator(DataUpdateCoordinator):
 
     async def _read_stream(self) -> None:
         """Read data stream from Hoval device."""
-        buffer = b''
+        attempt = 0  # connection attempts since data was last received
+        lost_at: float | None = None  # monotonic time the connection was lost
 
         while self._running:
+            # First retry immediately, then exponential backoff with jitter
+            delay = reconnect_delay(attempt)
+            if delay:
+                _LOGGER.info('Reconnecting in %.1f seconds (attempt %d)...', delay, attempt + 1)
+                await asyncio.sleep(delay)
+            attempt += 1
+
+            writer = None
+            buffer = b''
             try:
                 # Connect to device
                 _LOGGER.info('Connecting to %s:%d', self.host, self.port)
 
                 reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout=15)
+                configure_keepalive(writer.get_extra_info('socket'))
 
                 _LOGGER.info('Connected to Hoval device')
+                self.connection_stats['connects'] += 1
+                self.connection_stats['connected_since'] = time.time()
 
                 # Read data
                 while self._running:
@@ -142,21 +239,42 @@ class HovalDataUpdateCoordinator(DataUpdateCoordinator):
                         if not data:
                             break
 
+                        if lost_at is not None:
+                            self._record_recovery(lost_at, attempt)
+                            lost_at = None
+                        attempt = 0
+
+                        self.connection_stats['bytes_received'] += len(data)
                         buffer += data
                         buffer = self._process_stream(buffer)
 
                     except TimeoutError:
                         continue
 
-                writer.close()
-                await writer.wait_closed()
-
             except Exception as err:
                 _LOGGER.error('Connection error: %s', err)
+                self.connection_stats['errors'] += 1
+                self.connection_stats['last_error'] = f'{type(err).__name__}: {err}'
+            finally:
+                if self.connection_stats['connected_since'] is not None:
+                    self.connection_stats['disconnects'] += 1
+                    self.connection_stats['connected_since'] = None
+                if writer is not None:
+                    writer.close()
+                    try:
+                        await writer.wait_closed()
+                    except Exception:
+                        pass
+                if lost_at is None:
+                    lost_at = time.monotonic()
 
-            if self._running:
-                _LOGGER.info('Reconnecting in 10 seconds...')
-                await asyncio.sleep(10)
+    def _record_recovery(self, lost_at: float, attempts: int) -> None:
+        """Record the time from connection loss to the first data after reconnecting."""
+        duration = time.monotonic() - lost_at
+        self.reconnect_stats['count'] += 1
+        self.reconnect_stats['last'] = duration
+        self.reconnect_stats['max'] = max(self.reconnect_stats['max'], duration)
+        _LOGGER.info('Data flowing again after %.1f seconds (%d attempt(s))', duration, attempts)
 
     def _process_stream(self, data: bytes) -> bytes:
         """Process binary stream data."""
@@ -173,7 +291,14 @@ class HovalDataUpdateCoordinator(DataUpdateCoordinator):
             data = data[next_idx:]
 
             # Parse frame
+            start = time.perf_counter()
             self._parse_frame(frame)
+            duration = (time.perf_counter() - start) * 1000
+
+            self.recent_frames.append((time.time(), frame, duration))
+            self.parse_stats['frames'] += 1
+            self.parse_stats['total_ms'] += duration
+            self.parse_stats['max_ms'] = max(self.parse_stats['max_ms'], duration)
 
         return data
 
@@ -189,23 +314,33 @@ class HovalDataUpdateCoordinator(DataUpdateCoordinator):
 
                 if dp_id in self.datapoint_map:
                     dp_info = self.datapoint_map[dp_id]
+                    type_sizes = {'U8': 1, 'S16': 2, 'U16': 2, 'S32': 4, 'U32': 4}
+                    if dp_id in self.skip_ids:
+                        # Nobody consumes this datapoint: skip its bytes only
+                        i += type_sizes.get(dp_info.type, 1)
+                        continue
+
                     value = self._decode_value(frame, i, dp_info)
 
-                    if value is not None:
-                        self._update_sensor(dp_info['name'], value, dp_info['unit'])
+                    if value is None:
+                        self.undecodable[dp_id] += 1
+                    elif (value := self._validators[dp_id](value)) is None:
+                        self.rejected[dp_id] += 1
+                    else:
+                        self.decoded[dp_id] += 1
+                        self._update_sensor(dp_info.name, value, dp_info.unit)
 
                     # Advance based on type
-                    type_sizes = {'U8': 1, 'S16': 2, 'U16': 2, 'S32': 4, 'U32': 4}
-                    i += type_sizes.get(dp_info['type'], 1)
+                    i += type_sizes.get(dp_info.type, 1)
                 else:
                     i += 1
             else:
                 i += 1
 
-    def _decode_value(self, data: bytes, offset: int, dp_info: dict) -> float | None:
+    def _decode_value(self, data: bytes, offset: int, dp_info: Datapoint) -> float | None:
         """Decode value based on type."""
-        type_name = dp_info['type']
-        decimal = dp_info['decimal']
+        type_name = dp_info.type
+        decimal = dp_info.decimal
 
         try:
             if type_name == 'U8':
@@ -263,45 +398,13 @@ class HovalDataUpdateCoordinator(DataUpdateCoordinator):
             return None
 
     def _update_sensor(self, name: str, value: float, unit: str) -> None:
-        """Update sensor value."""
-        # Normalize name
-        clean_name = (
-            name.replace(' ', '_')
-            .replace('ä', 'ae')
-            .replace('ö', 'oe')
-            .replace('ü', 'ue')
-            .replace('ß', 'ss')
-            .replace('.', '')
-            .replace('/', '_')
-            .replace('(', '')
-            .replace(')', '')
-            .replace('[', '')
-            .replace(']', '')
-            .replace('{', '')
-            .replace('}', '')
-            .replace("'", '')
-            .replace('"', '')
-            .replace('!', '')
-            .replace('?', '')
-            .replace('#', '')
-            .replace('+', '')
-            .lower()
-        )
+        """Update sensor value (already validated by the datapoint's rules)."""
+        clean_name = normalize_name(name)
 
         # Check for change
         if clean_name in self.last_sent and self.last_sent[clean_name] == value:
             return
 
-        # Anomaly filtering
-        if unit == '°C':
-            if abs(value - 25.5) < 0.1 or abs(value + 25.5) < 0.1:
-                return
-            if value < -40 or value > 70:
-                return
-            if value == 0.0 and 'aussen' in name.lower():
-                if clean_name not in self.last_sent:
-                    return
-
         # Update value
         self.last_sent[clean_name] = value
 
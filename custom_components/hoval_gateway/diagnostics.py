@@ -0,0 +1,67 @@
+"""Diagnostics support for Hoval Gateway."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import HovalDataUpdateCoordinator
+
+TO_REDACT = {CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    The raw frames are included as hex so a problem can be replayed through
+    _process_stream without enabling debug logging.
+    """
+    coordinator: HovalDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    parse_stats = coordinator.parse_stats
+    frames = parse_stats['frames']
+
+    connection = dict(coordinator.connection_stats)
+    if connection['connected_since'] is not None:
+        connection['connected_for'] = round(time.time() - connection['connected_since'], 1)
+
+    datapoints = {}
+    for dp_id in sorted(coordinator.decoded.keys() | coordinator.rejected.keys() | coordinator.undecodable.keys()):
+        dp_info = coordinator.datapoint_map.get(dp_id)
+        datapoints[dp_id] = {
+            'name': dp_info.name if dp_info else None,
+            'decoded': coordinator.decoded[dp_id],
+            'rejected': coordinator.rejected[dp_id],
+            'undecodable': coordinator.undecodable[dp_id],
+        }
+
+    return {
+        'entry': {
+            'data': async_redact_data(entry.data, TO_REDACT),
+            'options': dict(entry.options),
+        },
+        'catalog': {
+            'unit_id': coordinator.unit_id,
+            'ignore_keywords': list(coordinator.ignore_keywords),
+            'datapoints': len(coordinator.datapoint_map),
+            'skipped': sorted(coordinator.skip_ids),
+        },
+        'connection': connection,
+        'reconnect': coordinator.reconnect_stats,
+        'parser': {
+            'frames': frames,
+            'mean_ms': round(parse_stats['total_ms'] / frames, 4) if frames else None,
+            'max_ms': round(parse_stats['max_ms'], 4),
+        },
+        'datapoints': datapoints,
+        'last_values': dict(coordinator.last_sent),
+        'recent_frames': [
+            {'time': timestamp, 'parse_ms': round(duration, 4), 'hex': frame.hex()}
+            for timestamp, frame, duration in coordinator.recent_frames
+        ],
+    }
@@ -12,9 +12,11 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
+    Platform,
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -33,19 +35,56 @@ async def async_setup_entry(
     """Set up Hoval Gateway sensors."""
     coordinator: HovalDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    # Create sensors for all known datapoints
-    entities = []
-    for dp_info in coordinator.datapoint_map.values():
-        entities.append(
-            HovalSensor(
+    known: dict[str, HovalSensor] = {}
+
+    @callback
+    def _update_interest() -> None:
+        """Let the coordinator skip datapoints whose entity is disabled in the entity registry."""
+        registry = er.async_get(hass)
+        skip_ids = set()
+        for dp_id, dp_info in coordinator.datapoint_map.items():
+            sensor = known.get(dp_info.name)
+            if sensor is None:
+                continue
+            entity_id = registry.async_get_entity_id(Platform.SENSOR, DOMAIN, sensor.unique_id)
+            registry_entry = registry.async_get(entity_id) if entity_id else None
+            if registry_entry is not None and registry_entry.disabled:
+                skip_ids.add(dp_id)
+        coordinator.set_interest(frozenset(skip_ids))
+
+    @callback
+    def _add_new_sensors() -> None:
+        """Create sensors for all datapoints of the catalog that have none yet."""
+        entities = []
+        for dp_info in coordinator.datapoint_map.values():
+            if dp_info.name in known:
+                continue
+            sensor = HovalSensor(
                 coordinator,
                 entry,
-                dp_info['name'],
-                dp_info['unit'],
+                dp_info.name,
+                dp_info.unit,
             )
-        )
-
-    async_add_entities(entities)
+            known[dp_info.name] = sensor
+            entities.append(sensor)
+        if entities:
+            async_add_entities(entities)
+        _update_interest()
+
+    @callback
+    def _registry_updated(event: Event) -> None:
+        """Entities of this entry enabled or disabled by the user change the interest set immediately."""
+        if event.data['action'] != 'update' or 'disabled_by' not in event.data.get('changes', {}):
+            return
+        registry_entry = er.async_get(hass).async_get(event.data['entity_id'])
+        if registry_entry is None or registry_entry.config_entry_id != entry.entry_id:
+            return
+        _update_interest()
+
+    # Create sensors for all known datapoints, and for new ones after a catalog reload
+    _add_new_sensors()
+    entry.async_on_unload(coordinator.async_add_catalog_listener(_add_new_sensors))
+    entry.async_on_unload(hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _registry_updated))
 
 
 class HovalSensor(CoordinatorEntity, SensorEntity):
@@ -0,0 +1,86 @@
+"""Plausibility rules for Hoval datapoints.
+
+All value filtering is compiled once per datapoint when the CSV is loaded,
+so decoding only has to make a single call per value.
+
+The integration applies only the temperature subset of the bridge's
+default rules (hoval.py): datapoints with unit °C must lie within
+TEMP_RANGE, are not within TEMP_SENTINEL_TOLERANCE of a TEMP_SENTINELS
+error code, and an outdoor temperature of 0.0 is dropped until the
+datapoint has a value. The bridge's 112.0 code, the no-prefix jump rule,
+CSV limits and custom [rules] are not applied here.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from .const import OUTDOOR_SENTINELS, TEMP_RANGE, TEMP_SENTINEL_TOLERANCE, TEMP_SENTINELS
+
+Validator = Callable[[float], float | None]
+
+
+@dataclass(frozen=True)
+class DatapointRules:
+    """Compiled plausibility rules of a single datapoint."""
+
+    low: float = float('-inf')
+    high: float = float('inf')
+    # Error codes, matched within tolerance (values are rounded to two decimals)
+    sentinels: frozenset[float] = frozenset()
+    tolerance: float = 0.0
+    # Rejected only while the datapoint has no value (e.g. 0.0 outdoor before the sensor reported)
+    startup_sentinels: frozenset[float] = frozenset()
+
+
+def is_temperature(unit: str) -> bool:
+    """Return True if the datapoint is a temperature."""
+    return unit == '°C'
+
+
+def is_outdoor_temp(name: str, unit: str) -> bool:
+    """Return True if the datapoint is the outdoor temperature."""
+    return is_temperature(unit) and 'aussen' in name.lower()
+
+
+def compile_rules(name: str, unit: str) -> DatapointRules:
+    """Compile the rules of a datapoint from its name and unit."""
+    if not is_temperature(unit):
+        return DatapointRules()
+    return DatapointRules(
+        low=TEMP_RANGE[0],
+        high=TEMP_RANGE[1],
+        sentinels=TEMP_SENTINELS,
+        tolerance=TEMP_SENTINEL_TOLERANCE,
+        startup_sentinels=OUTDOOR_SENTINELS if is_outdoor_temp(name, unit) else frozenset(),
+    )
+
+
+def make_validator(rules: DatapointRules, has_value: Callable[[], bool]) -> Validator:
+    """Create the validator of a datapoint: returns the value or None if implausible.
+
+    has_value reports whether the datapoint already has a published value,
+    which ends the startup sentinels.
+    """
+    low, high = rules.low, rules.high
+    sentinels, tolerance = rules.sentinels, rules.tolerance
+    startup_sentinels = rules.startup_sentinels
+
+    def check(value: float) -> bool:
+        if any(abs(value - sentinel) < tolerance for sentinel in sentinels):
+            return False
+        return low <= value <= high
+
+    def validate(value: float) -> float | None:
+        return value if check(value) else None
+
+    if not startup_sentinels:
+        return validate
+
+    def validate_startup(value: float) -> float | None:
+        if not check(value) or (value in startup_sentinels and not has_value()):
+            return None
+        return value
+
+    return validate_startup
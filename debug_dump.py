@@ -3,9 +3,11 @@
 
 import socket
 import struct
+import sys
 
-HOVAL_IP = '10.0.0.95'
-HOVAL_PORT = 3113
+# Optional: python debug_dump.py [IP] [PORT] - z.B. den Fan-out-Proxy des Bridges (Port 3114)
+HOVAL_IP = sys.argv[1] if len(sys.argv) > 1 else '10.0.0.95'
+HOVAL_PORT = int(sys.argv[2]) if len(sys.argv) > 2 else 3113
 
 # Zieltemperatur (aktuell ca. +2.x°C)
 TARGET_TEMP_MIN = 2.0
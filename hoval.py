@@ -2,80 +2,270 @@ import configparser
 import csv
 import json
 import os
+import random
+import re
+import selectors
 import signal
 import socket
 import struct
 import sys
+import tempfile
 import threading
 import time
-
-import paho.mqtt.client as mqtt
-
-# Unbuffered output für systemd logging
-sys.stdout.reconfigure(line_buffering=True)
-sys.stderr.reconfigure(line_buffering=True)
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from operator import itemgetter
 
 
 # --- KONFIGURATION LADEN ---
-def load_config():
-    """Lädt Konfiguration aus config.ini"""
-    config = configparser.ConfigParser()
-
-    # Suche config.ini im gleichen Verzeichnis wie das Skript
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(script_dir, 'config.ini')
+def load_config(config_path=None):
+    """
+    Lädt die Konfiguration (Standard: config.ini im gleichen Verzeichnis wie das Skript).
+    Wirft FileNotFoundError, wenn die Datei fehlt.
+    """
+    if config_path is None:
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
 
     if not os.path.exists(config_path):
-        print(f'FEHLER: {config_path} nicht gefunden!')
-        print('Bitte config.ini erstellen (siehe config.ini.example)')
-        sys.exit(1)
+        raise FileNotFoundError(config_path)
 
+    config = configparser.ConfigParser()
     config.read(config_path, encoding='utf-8')
     return config
 
 
-# Konfiguration laden
-_config = load_config()
-
-# Hoval-Gerät
-HOVAL_IP = _config.get('hoval', 'ip', fallback='10.0.0.95')
-HOVAL_PORT = _config.getint('hoval', 'port', fallback=3113)
-CSV_FILE = _config.get('hoval', 'csv_file', fallback='hoval_datapoints.csv')
-
-# Filter
-UNIT_ID_FILTER = _config.getint('filter', 'unit_id', fallback=513)
-_ignore_str = _config.get('filter', 'ignore_keywords', fallback='VOC, voc, Luftqualität')
-IGNORE_KEYWORDS = [kw.strip() for kw in _ignore_str.split(',') if kw.strip()]
-
-# Logging
-DEBUG_CONSOLE = _config.getboolean('logging', 'debug_console', fallback=True)
-DEBUG_RAW = _config.getboolean('logging', 'debug_raw', fallback=False)
-
-# MQTT
-MQTT_ENABLED = _config.getboolean('mqtt', 'enabled', fallback=True)
-MQTT_IP = _config.get('mqtt', 'ip', fallback='127.0.0.1')
-MQTT_PORT = _config.getint('mqtt', 'port', fallback=1883)
-MQTT_USERNAME = _config.get('mqtt', 'username', fallback='')
-MQTT_PASSWORD = _config.get('mqtt', 'password', fallback='')
-TOPIC_BASE = _config.get('mqtt', 'topic_base', fallback='hoval/homevent')
-
-# Home Assistant
-MQTT_HOMEASSISTANT_DISCOVERY = _config.getboolean('homeassistant', 'discovery', fallback=True)
-HOMEASSISTANT_PREFIX = _config.get('homeassistant', 'prefix', fallback='homeassistant')
+def apply_config(config):
+    """
+    Übernimmt die Einstellungen aus einem ConfigParser in die Modul-Konstanten.
 
-# Watchdog
-WATCHDOG_TIMEOUT = _config.getint('watchdog', 'timeout', fallback=60)
-WATCHDOG_ENABLED = _config.getboolean('watchdog', 'enabled', fallback=True)
+    Beim Import gelten die Standardwerte (ohne Dateizugriff), main() lädt config.ini.
+    So lässt sich der Decoder aus Tools und Benchmarks importieren und mit eigener
+    Konfiguration betreiben, ohne dass config.ini vorhanden sein muss.
+    """
+    global active_config
+    active_config = config
+
+    # Hoval-Gerät
+    global HOVAL_IP, HOVAL_PORT, CSV_FILE
+    HOVAL_IP = config.get('hoval', 'ip', fallback='10.0.0.95')
+    HOVAL_PORT = config.getint('hoval', 'port', fallback=3113)
+    CSV_FILE = config.get('hoval', 'csv_file', fallback='hoval_datapoints.csv')
+
+    # Filter
+    global UNIT_ID_FILTER, IGNORE_KEYWORDS, ONLY_DATAPOINTS
+    UNIT_ID_FILTER = config.getint('filter', 'unit_id', fallback=513)
+    ignore_str = config.get('filter', 'ignore_keywords', fallback='VOC, voc, Luftqualität')
+    IGNORE_KEYWORDS = [kw.strip() for kw in ignore_str.split(',') if kw.strip()]
+    # Interessante Datenpunkte (IDs oder Namen), leer = alle; die übrigen werden nur übersprungen
+    only_str = config.get('filter', 'only', fallback='')
+    ONLY_DATAPOINTS = {item.strip() for item in only_str.split(',') if item.strip()}
+
+    # Logging
+    global DEBUG_CONSOLE, DEBUG_RAW
+    DEBUG_CONSOLE = config.getboolean('logging', 'debug_console', fallback=True)
+    DEBUG_RAW = config.getboolean('logging', 'debug_raw', fallback=False)
+
+    # MQTT
+    global MQTT_ENABLED, MQTT_IP, MQTT_PORT, MQTT_USERNAME, MQTT_PASSWORD, TOPIC_BASE, MQTT_PROTOCOL, MQTT_V5
+    global MQTT_MESSAGE_EXPIRY, MQTT_QOS
+    MQTT_ENABLED = config.getboolean('mqtt', 'enabled', fallback=True)
+    MQTT_IP = config.get('mqtt', 'ip', fallback='127.0.0.1')
+    MQTT_PORT = config.getint('mqtt', 'port', fallback=1883)
+    MQTT_USERNAME = config.get('mqtt', 'username', fallback='')
+    MQTT_PASSWORD = config.get('mqtt', 'password', fallback='')
+    TOPIC_BASE = config.get('mqtt', 'topic_base', fallback='hoval/homevent')
+    MQTT_PROTOCOL = config.get('mqtt', 'protocol', fallback='3.1.1').strip()
+    MQTT_V5 = MQTT_PROTOCOL == '5'
+    MQTT_MESSAGE_EXPIRY = config.getint('mqtt', 'message_expiry', fallback=0)  # Nur MQTT v5, 0 = kein Ablauf
+    MQTT_QOS = config.getint('mqtt', 'qos', fallback=0)
+
+    # Home Assistant
+    global MQTT_HOMEASSISTANT_DISCOVERY, HOMEASSISTANT_PREFIX
+    MQTT_HOMEASSISTANT_DISCOVERY = config.getboolean('homeassistant', 'discovery', fallback=True)
+    HOMEASSISTANT_PREFIX = config.get('homeassistant', 'prefix', fallback='homeassistant')
+
+    # Watchdog
+    global WATCHDOG_TIMEOUT, WATCHDOG_ENABLED, WATCHDOG_ADAPTIVE, WATCHDOG_SIGMA, WATCHDOG_MIN_TIMEOUT, WATCHDOG_LEARN
+    global WATCHDOG_GAP_FACTOR
+    WATCHDOG_TIMEOUT = config.getint('watchdog', 'timeout', fallback=60)
+    WATCHDOG_ENABLED = config.getboolean('watchdog', 'enabled', fallback=True)
+    # Adaptiv: Timeout aus dem gelernten Datentakt (Mittel + sigma * Streuung), begrenzt auf min_timeout..timeout
+    WATCHDOG_ADAPTIVE = config.getboolean('watchdog', 'adaptive', fallback=True)
+    WATCHDOG_SIGMA = config.getfloat('watchdog', 'sigma', fallback=8.0)
+    WATCHDOG_MIN_TIMEOUT = config.getfloat('watchdog', 'min_timeout', fallback=5.0)
+    WATCHDOG_LEARN = config.getint('watchdog', 'learn', fallback=100)
+    # Nie unter gap_factor * größter Abstand der letzten learn..2*learn Abstände (Pausen zwischen Bursts)
+    WATCHDOG_GAP_FACTOR = config.getfloat('watchdog', 'gap_factor', fallback=3.0)
+
+    # Plausibilitätsprüfung (Regeln pro Datenpunkt, siehe compile_rules)
+    global VALIDATION_CSV_LIMITS, VALIDATION_TEMP_RANGE, VALIDATION_TEMP_SENTINELS, VALIDATION_DECIMAL_SENTINELS
+    global VALIDATION_OUTDOOR_SENTINELS, VALIDATION_OUTDOOR_SCAN_RANGE, VALIDATION_NOPREFIX_RATE
+    global VALIDATION_NOPREFIX_FIRST_SENTINELS, VALIDATION_RULES
+    VALIDATION_CSV_LIMITS = config.getboolean('validation', 'csv_limits', fallback=False)
+    VALIDATION_TEMP_RANGE = config.get('validation', 'temp_range', fallback='-40..70')
+    VALIDATION_TEMP_SENTINELS = config.get('validation', 'temp_sentinels', fallback='25.5, -25.5')
+    VALIDATION_DECIMAL_SENTINELS = config.get('validation', 'decimal_sentinels', fallback='112.0')
+    VALIDATION_OUTDOOR_SENTINELS = config.get('validation', 'outdoor_sentinels', fallback='0.0')
+    VALIDATION_OUTDOOR_SCAN_RANGE = config.get('validation', 'outdoor_scan_range', fallback='-40..50')
+    VALIDATION_NOPREFIX_RATE = config.getfloat('validation', 'noprefix_rate', fallback=20)
+    VALIDATION_NOPREFIX_FIRST_SENTINELS = config.get('validation', 'noprefix_first_sentinels', fallback='0.0')
+    VALIDATION_RULES = dict(config.items('rules')) if config.has_section('rules') else {}
+
+    # Verbindung: Reconnect-Strategie und TCP-Keepalive
+    global BACKOFF_INITIAL, BACKOFF_MAX, KEEPALIVE_IDLE, KEEPALIVE_INTERVAL, KEEPALIVE_COUNT, USER_TIMEOUT
+    BACKOFF_INITIAL = config.getfloat('connection', 'backoff_initial', fallback=1)
+    BACKOFF_MAX = config.getfloat('connection', 'backoff_max', fallback=30)
+    KEEPALIVE_IDLE = config.getint('connection', 'keepalive_idle', fallback=5)
+    KEEPALIVE_INTERVAL = config.getint('connection', 'keepalive_interval', fallback=2)
+    KEEPALIVE_COUNT = config.getint('connection', 'keepalive_count', fallback=3)
+    USER_TIMEOUT = config.getint('connection', 'user_timeout', fallback=15)
+
+    # Fan-out Proxy (Rohdaten-Stream an lokale Clients weiterreichen)
+    global FANOUT_ENABLED, FANOUT_LISTEN, FANOUT_PORT, FANOUT_BUFFER, FANOUT_MAX_CLIENTS
+    FANOUT_ENABLED = config.getboolean('fanout', 'enabled', fallback=False)
+    FANOUT_LISTEN = config.get('fanout', 'listen', fallback='127.0.0.1')
+    FANOUT_PORT = config.getint('fanout', 'port', fallback=3114)
+    FANOUT_BUFFER = config.getint('fanout', 'buffer', fallback=65536)
+    FANOUT_MAX_CLIENTS = config.getint('fanout', 'max_clients', fallback=8)
+
+    # Push-API: Server-Sent Events mit Live-Werten für lokale Dashboards
+    global PUSH_ENABLED, PUSH_LISTEN, PUSH_PORT, PUSH_QUEUE, PUSH_MAX_CLIENTS
+    PUSH_ENABLED = config.getboolean('push', 'enabled', fallback=False)
+    PUSH_LISTEN = config.get('push', 'listen', fallback='127.0.0.1')
+    PUSH_PORT = config.getint('push', 'port', fallback=3115)
+    PUSH_QUEUE = config.getint('push', 'queue', fallback=256)
+    PUSH_MAX_CLIENTS = config.getint('push', 'max_clients', fallback=16)
+
+    # Profiling im laufenden Betrieb (SIGUSR1 = CPU-Profil, SIGUSR2 = Speicher-Snapshot)
+    global PROFILE_DIR, PROFILE_WINDOW, PROFILE_TOP
+    PROFILE_DIR = config.get('profiling', 'dir', fallback='/var/log/hoval-gateway')
+    PROFILE_WINDOW = config.getint('profiling', 'window', fallback=60)
+    PROFILE_TOP = config.getint('profiling', 'top', fallback=25)
+
+    # Frame-Cache (identische Frames überspringen)
+    global FRAME_CACHE_ENABLED, FRAME_CACHE_SIZE, FRAME_CACHE_STATS_INTERVAL, FRAME_DIFF_ENABLED
+    FRAME_CACHE_ENABLED = config.getboolean('cache', 'enabled', fallback=True)
+    FRAME_CACHE_SIZE = config.getint('cache', 'size', fallback=8)
+    FRAME_CACHE_STATS_INTERVAL = config.getint('cache', 'stats_interval', fallback=300)
+    FRAME_DIFF_ENABLED = config.getboolean('cache', 'differential', fallback=True)
+
+    # Strukturprüfung: abgeschnittene/fremde Frames vor dem Scan verwerfen
+    global FRAME_CHECK_ENABLED, FRAME_CHECK_LEARN_FRAMES, FRAME_CHECK_LEARN_MIN, FRAME_CHECK_STATS_INTERVAL
+    FRAME_CHECK_ENABLED = config.getboolean('framecheck', 'enabled', fallback=True)
+    FRAME_CHECK_LEARN_FRAMES = config.getint('framecheck', 'learn_frames', fallback=200)
+    FRAME_CHECK_LEARN_MIN = config.getint('framecheck', 'learn_min', fallback=3)
+    FRAME_CHECK_STATS_INTERVAL = config.getint('framecheck', 'stats_interval', fallback=300)
+
+    # Zählung aller beobachteten Datenpunkt-IDs (auch unbekannte/gefilterte)
+    global CENSUS_ENABLED, CENSUS_INTERVAL, CENSUS_TOP, CENSUS_FILE
+    CENSUS_ENABLED = config.getboolean('census', 'enabled', fallback=False)
+    CENSUS_INTERVAL = config.getint('census', 'interval', fallback=3600)
+    CENSUS_TOP = config.getint('census', 'top', fallback=20)
+    CENSUS_FILE = config.get('census', 'file', fallback='')
+
+    # Latenzmessung Empfang -> Dekodierung -> publish() -> Broker-Bestätigung
+    global TRACE_ENABLED, TRACE_INTERVAL
+    TRACE_ENABLED = config.getboolean('tracing', 'enabled', fallback=False)
+    TRACE_INTERVAL = config.getint('tracing', 'interval', fallback=300)
+
+    # Pipeline: Lesen, Dekodieren und Publizieren in eigenen Threads
+    global PIPELINE_ENABLED, PIPELINE_FRAME_QUEUE, PIPELINE_VALUE_QUEUE, PIPELINE_STATS_INTERVAL
+    PIPELINE_ENABLED = config.getboolean('pipeline', 'enabled', fallback=True)
+    PIPELINE_FRAME_QUEUE = config.getint('pipeline', 'frame_queue', fallback=256)
+    PIPELINE_VALUE_QUEUE = config.getint('pipeline', 'value_queue', fallback=512)
+    PIPELINE_STATS_INTERVAL = config.getint('pipeline', 'stats_interval', fallback=300)
+
+
+active_config = None  # Zuletzt mit apply_config() übernommene Konfiguration (Basis für SIGHUP)
+
+# Standardwerte, bis main() bzw. der Aufrufer apply_config() mit einer Konfiguration aufruft
+apply_config(configparser.ConfigParser())
+
+RATE_RESET_AFTER = 3  # Nach so vielen verworfenen Sprüngen in Folge wird der neue Wert übernommen
+RELOAD_SECTIONS = ('filter', 'validation', 'rules', 'watchdog')  # Abschnitte, die SIGHUP neu lädt
+RELOAD_OPTIONS = (('hoval', 'csv_file'),)  # Einzelne Einstellungen, die SIGHUP neu lädt
+FRAME_SIGNATURE_LEN = 3  # Header-Bytes, die zusammen mit der Länge das Frame-Layout bestimmen
+FRAME_CACHE_MAX_SIGNATURES = 64  # Obergrenze für gemerkte Frame-Signaturen
+FRAME_MAX_PENDING = 8192  # Max. Bytes eines unvollständigen Frames, die bis zum nächsten recv() gehalten werden
+FRAME_PENDING_TIMEOUT = 0.5  # Max. Sekunden, die ein Frame ohne Abschluss auf weitere Bytes wartet
+FRAME_CHECK_MAX_CANDIDATES = 1024  # Obergrenze für noch nicht bestätigte (Header, Länge)-Paare
+SCAN_LOOKAHEAD = 6  # Max. Bytes, die der Scan hinter einer Position liest (0x00 + ID + 4 Byte Wert)
+CENSUS_GAP_BUCKETS = 6  # Abstand zum nächsten Kandidaten: 0, 1, 2, 3, 4, >4 Bytes
+TRACE_BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)  # Obergrenzen
+TRACE_MAX_PENDING = 10000  # Max. unbestätigte Nachrichten, ältere gelten als verloren
+PUSH_KEEPALIVE = 15  # Sekunden ohne Ereignis, nach denen ein SSE-Kommentar die Verbindung prüft
+PUSH_MAX_REQUEST = 8192  # Max. Größe des HTTP-Requests eines Push-Clients
+WATCHDOG_ALPHA = 0.05  # Gewicht eines neuen Abstands im EWMA des Datentakts (~ letzte 20 Abstände)
 
 # Speicher
 datapoint_map = {}
+scan_pattern = None  # Kompilierter Such-Ausdruck für alle IDs aus datapoint_map, siehe compile_scan_pattern
 last_sent = {}
+clean_topics = {}  # Datenpunkt-Name -> Topic-Name, siehe clean_topic
 discovered_topics = set()  # Bereits registrierte Topics für Home Assistant
-last_data_time = time.time()  # Zeitstempel der letzten empfangenen Daten
+last_data_time = time.monotonic()  # time.monotonic() der letzten empfangenen Daten
 watchdog_triggered = threading.Event()  # Signal für Watchdog-Auslösung
+# EWMA von Mittel und Varianz des Abstands zwischen Daten (s), größter Abstand im laufenden/vorigen Fenster
+watchdog_gap = {'mean': 0.0, 'var': 0.0, 'count': 0, 'peak': 0.0, 'prev_peak': 0.0}
+watchdog_stats = {'stalls': 0, 'detect': 0.0, 'last': 0.0, 'max': 0.0}  # Erkennung bzw. Stillstand -> Daten (s)
+watchdog_stalled_since = None  # last_data_time des laufenden Stillstands (bis wieder Daten kommen)
+watchdog_wakeup = threading.Event()  # Weckt den Watchdog-Thread, wenn sich der Timeout geändert hat
 current_socket = None  # Aktueller Socket für Watchdog-Zugriff
 socket_lock = threading.Lock()  # Lock für Thread-sicheren Socket-Zugriff
 shutdown_requested = False  # Flag für sauberes Beenden
+shutdown_event = threading.Event()  # Unterbricht Wartezeiten beim Beenden
+reconnect_stats = {'count': 0, 'last': 0.0, 'max': 0.0}  # Dauer Verbindungsverlust -> erste Daten (s)
+frames_total = 0  # Anzahl verarbeiteter Frames (für systemd STATUS)
+last_value_time = 0.0  # time.monotonic() des letzten gültigen Werts (auch unverändert)
+mqtt_client = None  # MQTT-Client (für Queue-Größen im Speicher-Snapshot)
+mqtt_aliases = {}  # MQTT v5: Topic -> Topic-Alias der aktuellen Broker-Verbindung
+mqtt_alias_max = 0  # MQTT v5: vom Broker erlaubte Anzahl Topic-Aliase (0 = keine / nicht verbunden)
+mqtt_alias_lock = threading.Lock()  # Schützt die Alias-Tabelle zwischen paho-Thread und Publisher
+profiler = None  # Aktiver cProfile-Profiler (SIGUSR1)
+profiler_deadline = 0.0  # Zeitpunkt, zu dem das CPU-Profil automatisch endet
+systemd_ready = False  # READY=1 bereits an systemd gemeldet
+main_loop_time = time.monotonic()  # Letzter Durchlauf der Hauptschleife (für WATCHDOG=1), siehe service_problem
+service_threads = []  # Threads, ohne die der Dienst nicht arbeitet (für WATCHDOG=1)
+memory_snapshot = None  # Letzter tracemalloc-Snapshot (SIGUSR2), für Vergleich
+fanout_clients = {}  # Client-Socket -> ausstehende Bytes (bytearray), siehe fanout_thread
+fanout_lock = threading.Lock()  # Schützt fanout_clients zwischen Reader und Fan-out-Thread
+fanout_wakeup = None  # Socketpair zum Aufwecken des Fan-out-Threads
+push_clients = {}  # Push-API: Client-Socket -> Zustand (Request, ausstehende Werte, Sendepuffer), siehe push_thread
+push_snapshot = {}  # Push-API: Topic -> (name, value, unit) des letzten geänderten Werts
+push_lock = threading.Lock()  # Schützt push_clients/push_snapshot zwischen Decoder und Push-Thread
+push_wakeup = None  # Socketpair zum Aufwecken des Push-Threads
+frame_states = OrderedDict()  # Frame-Signatur -> Zustand (Hash-LRU + letzter Frame), siehe get_frame_state
+frame_cache_stats = {'hits': 0, 'misses': 0, 'diff': 0, 'full': 0, 'rescanned_bytes': 0, 'memo': 0}
+frame_lengths = {}  # Frame-Header -> Menge gelernter gültiger Längen, siehe check_frame
+frame_length_candidates = {}  # (Header, Länge) -> Anzahl, bis FRAME_CHECK_LEARN_MIN erreicht ist
+frame_check_stats = {'truncated': 0, 'length': 0, 'header': 0}  # Verworfene Frames nach Grund
+frame_check_lock = threading.Lock()  # Schützt die drei obigen zwischen Reader (split_frames) und Decoder (check_frame)
+stateful_checks = 0  # Aufrufe zustandsbehafteter Regeln (rate/median aus [rules]), siehe decode_frame
+published_reads = []  # (Topic, Wert) aus last_sent, mit denen die Sprung-Regel im laufenden decode_frame verglich
+config_file = None  # Pfad der von main() geladenen Konfiguration (für SIGHUP)
+pending_datapoint_map = None  # Neu geladene Datenpunkt-Tabelle, wird vom Reader-Thread übernommen
+reload_lock = threading.Lock()  # Verhindert parallele Reloads
+census_counts = None  # array('I', 65536): Vorkommen je Kandidaten-ID, siehe census_frame
+census_gaps = None  # array('I', 65536 * CENSUS_GAP_BUCKETS): Abstand zum nächsten Kandidaten je ID
+census_sizes = None  # bytearray(65536): Wertlänge der aktiven Datenpunkte (0 = unbekannt)
+census_frames = 0  # Anzahl gezählter Frames
+trace_recv_time = 0.0  # time.perf_counter() des letzten recv(), gilt für alle Werte aus diesem Block
+trace_histograms = {}  # Abschnitt -> Histogramm, siehe new_histogram
+trace_pending = OrderedDict()  # MQTT mid -> Zeitpunkt von publish(), bis on_publish kommt
+trace_early_acks = {}  # MQTT mid -> Zeitpunkt von on_publish, falls schneller als die Rückkehr von publish()
+trace_lost = 0  # Nachrichten ohne on_publish (verdrängt oder Verbindungsabbruch)
+trace_lock = threading.Lock()  # Schützt trace_pending/trace_early_acks zwischen Reader- und paho-Thread
+profile_toggle = threading.Event()  # SIGUSR1: CPU-Profil im dekodierenden Thread starten/stoppen
+memory_request = threading.Event()  # SIGUSR2: Speicher-Snapshot im Speicher-Thread anfordern
+frame_queue = deque()  # Pipeline: (recv-Zeitpunkt, Frame) vom Reader zum Decoder, begrenzt
+frame_cond = threading.Condition()  # Schützt frame_queue, weckt den Decoder
+value_queue = OrderedDict()  # Pipeline: Topic -> (name, value, unit, decoded_at) vom Decoder zum Publisher
+value_cond = threading.Condition()  # Schützt value_queue, weckt den Publisher
+value_pipeline_active = False  # Publisher-Thread läuft: handle_output reiht Werte nur noch ein
+pipeline_closing = False  # Decoder beendet: Publisher arbeitet die Queue ab und endet
+pipeline_stats = {'frames_dropped': 0, 'frames_max': 0, 'values_coalesced': 0, 'values_dropped': 0, 'values_max': 0}
 
 
 def signal_handler(signum, frame):
@@ -83,6 +273,7 @@ def signal_handler(signum, frame):
     global shutdown_requested, current_socket
     print(f'[SIGNAL] Empfangen: {signal.Signals(signum).name} - Beende...')
     shutdown_requested = True
+    shutdown_event.set()
     # Socket schließen um blockierenden recv() zu unterbrechen
     with socket_lock:
         if current_socket:
@@ -93,18 +284,192 @@ def signal_handler(signum, frame):
                 pass
 
 
-# Signal-Handler registrieren
-signal.signal(signal.SIGTERM, signal_handler)
-signal.signal(signal.SIGINT, signal_handler)
+# --- PROFILING ---
+def profile_path(suffix):
+    """Dateipfad für Profiling-Ausgaben (PROFILE_DIR, sonst temporäres Verzeichnis)."""
+    directory = PROFILE_DIR if os.path.isdir(PROFILE_DIR) else tempfile.gettempdir()
+    return os.path.join(directory, f'hoval-{time.strftime("%Y%m%d-%H%M%S")}.{suffix}')
+
+
+def start_profiler():
+    """Startet das CPU-Profil für PROFILE_WINDOW Sekunden."""
+    global profiler, profiler_deadline
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler_deadline = time.time() + PROFILE_WINDOW
+    profiler.enable()
+    print(f'[PROFIL] CPU-Profil gestartet ({PROFILE_WINDOW}s, erneut SIGUSR1 zum vorzeitigen Beenden)')
+
+
+def stop_profiler():
+    """Beendet das CPU-Profil und schreibt .prof (für pstats/snakeviz) und eine Textzusammenfassung."""
+    global profiler
+    if profiler is None:
+        return
+    profiler.disable()
+    import pstats
+
+    path = profile_path('prof')
+    try:
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(path)
+        with open(path[: -len('prof')] + 'txt', 'w', encoding='utf-8') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        print(f'[PROFIL] CPU-Profil geschrieben: {path}')
+    except OSError as e:
+        print(f'[PROFIL] FEHLER beim Schreiben: {e}')
+    profiler = None
+
+
+def check_profiler():
+    """
+    Startet/stoppt das CPU-Profil auf Anforderung (SIGUSR1) und beendet es nach Ablauf des
+    Zeitfensters. Wird aus dem dekodierenden Thread aufgerufen (Decoder-Thread bzw. ohne
+    Pipeline der Reader), denn cProfile erfasst nur den Thread, in dem es aktiviert wird.
+    """
+    if profile_toggle.is_set():
+        profile_toggle.clear()
+        if profiler is None:
+            start_profiler()
+        else:
+            stop_profiler()
+    if profiler is not None and time.time() >= profiler_deadline:
+        stop_profiler()
+
+
+def profile_signal_handler(signum, frame):
+    """SIGUSR1: CPU-Profil ein/aus (ausgeführt von check_profiler im dekodierenden Thread)."""
+    profile_toggle.set()
+
+
+def memory_signal_handler(signum, frame):
+    """SIGUSR2: Speicher-Snapshot anfordern (ausgeführt von memory_thread, nicht im Signal-Handler)."""
+    memory_request.set()
+
+
+def memory_thread():
+    """
+    Speicher-Thread: erstellt angeforderte Snapshots (SIGUSR2) außerhalb des Reader-Threads.
+
+    Der Signal-Handler läuft im Haupt-Thread zwischen zwei Bytecodes - Snapshot und Vergleich
+    dort würden recv() für die gesamte Dauer blockieren.
+    """
+    while True:
+        memory_request.wait()
+        memory_request.clear()
+        write_memory_report()
+
+
+def write_memory_report():
+    """
+    Speicher-Snapshot (tracemalloc Top-N) und Größe der internen Puffer.
+
+    Der erste Aufruf startet tracemalloc; jeder weitere zeigt die größten Allokationen
+    und das Wachstum seit dem vorherigen Snapshot.
+    """
+    global memory_snapshot
+    lines = [
+        f'datapoint_map={len(datapoint_map)} last_sent={len(last_sent)} '
+        f'discovered_topics={len(discovered_topics)} frame_states={len(frame_states)} '
+        f'fanout_clients={len(fanout_clients)} push_clients={len(push_clients)}'
+    ]
+    if mqtt_client is not None:
+        # Interne paho-Queues (private Attribute, je nach paho-Version vorhanden)
+        queues = {
+            name: len(getattr(mqtt_client, name))
+            for name in ('_out_messages', '_in_messages', '_out_packet')
+            if hasattr(mqtt_client, name)
+        }
+        lines.append('paho ' + ' '.join(f'{name.strip("_")}={size}' for name, size in queues.items()))
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        lines.append('tracemalloc gestartet - erneut SIGUSR2 für Snapshot')
+    else:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f'tracemalloc: aktuell {current / 1024:.0f} KiB, Spitze {peak / 1024:.0f} KiB')
+        if memory_snapshot is not None:
+            lines.append(f'Top {PROFILE_TOP} Wachstum seit letztem Snapshot:')
+            lines.extend(str(stat) for stat in snapshot.compare_to(memory_snapshot, 'lineno')[:PROFILE_TOP])
+        lines.append(f'Top {PROFILE_TOP} Allokationen:')
+        lines.extend(str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP])
+        memory_snapshot = snapshot
+
+    path = profile_path('mem.txt')
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        print(f'[PROFIL] Speicher-Snapshot geschrieben: {path}')
+    except OSError as e:
+        print(f'[PROFIL] FEHLER beim Schreiben: {e}')
+    print(f'[PROFIL] {lines[0]}')
+
+
+def install_signal_handlers():
+    """Registriert die Signal-Handler (nur in main(), nicht beim Import)."""
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, profile_signal_handler)
+        signal.signal(signal.SIGUSR2, memory_signal_handler)
+        threading.Thread(target=memory_thread, daemon=True).start()
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, reload_signal_handler)
 
 
 # --- CSV LADEN ---
 def load_csv():
+    datapoints = read_datapoints()
+    if datapoints is None:
+        return False
+    set_datapoint_map(datapoints)
+    return True
+
+
+def set_datapoint_map(datapoints):
+    """Aktiviert eine Datenpunkt-Tabelle samt dazu passendem Such-Ausdruck des Scanners."""
+    global datapoint_map, scan_pattern
+    scan_pattern = compile_scan_pattern(datapoints)
+    datapoint_map = datapoints
+
+
+def compile_scan_pattern(datapoints):
+    """
+    Baut aus der Tabelle einen regulären Ausdruck, der alle Positionen findet, an denen
+    scan_datapoints einen Datenpunkt erkennen könnte - beide Varianten beginnen mit 0x00:
+    Variante 1 '00 hi lo' (alle IDs) und Variante 2 '00 lo' ohne Präfix (IDs 0-5).
+
+    Der Lookahead verbraucht nur das 0x00-Byte, damit finditer() auch überlappende
+    Kandidaten liefert (z.B. '00 00 92 e2'). IDs sind nach High-Byte gruppiert, so prüft
+    die re-Engine je Position nur wenige Zeichenklassen statt jede ID einzeln.
+    """
+    groups = {}
+    for id_bytes in datapoints:
+        groups.setdefault(id_bytes[0], set()).add(id_bytes[1])
+    # Variante 2: Das 0x00 ist hier das High-Byte der ID, es folgt direkt das Low-Byte
+    noprefix = {dp['id'] for dp in datapoints.values() if dp['id'] <= 5 and not dp['skip']}
+
+    def byte_class(values):
+        return b'[' + b''.join(re.escape(bytes([v])) for v in sorted(values)) + b']'
+
+    branches = [re.escape(bytes([hi])) + byte_class(lows) for hi, lows in sorted(groups.items())]
+    if noprefix:
+        branches.append(byte_class(noprefix))
+    if not branches:
+        return re.compile(b'(?!)')  # Leere Tabelle: nie ein Treffer
+    return re.compile(b'\\x00(?=' + b'|'.join(branches) + b')')
+
+
+def read_datapoints():
+    """Liest die Datenpunkt-Tabelle aus CSV_FILE (None bei Fehler), ohne die aktive Tabelle anzufassen."""
     if not os.path.exists(CSV_FILE):
         print(f'FEHLER: {CSV_FILE} fehlt!')
-        return False
+        return None
 
     print('Lade CSV...')
+    datapoints = {}
     count = 0
     try:
         with open(CSV_FILE, encoding='utf-8', errors='replace') as f:
@@ -137,21 +502,341 @@ def load_csv():
                     # Speichere die ID selbst (2 Bytes) statt mit 0x00 Prefix
                     id_bytes = struct.pack('>H', dp_id)
 
-                    datapoint_map[id_bytes] = {
+                    dp = {
                         'name': name,
                         'type': row['TypeName'],
                         'decimal': int(row['Decimal']),
                         'unit': row['unit'],
                         'id': dp_id,  # Speichere auch die numerische ID
                     }
+                    # Plausibilitätsregeln einmalig beim Laden zu einem Prädikat kompilieren
+                    dp['size'] = 1 if '8' in dp['type'] else 4 if '32' in dp['type'] else 2
+                    dp['outdoor'] = is_outdoor_temp(dp)
+                    dp['topic'] = clean_topic(name)
+                    paths = compile_rules(dp, row)
+                    for path, rules in paths.items():
+                        key = 'validate' if path == 'prefix' else f'validate_{path}'
+                        dp[key] = make_validator(rules, name, dp['topic']) if rules else None
+                    # Rohbytes-Memo (siehe scan_datapoints): nur ohne zustandsbehaftete Regeln,
+                    # sonst hängt das Ergebnis nicht allein von den Bytes ab
+                    dp['memo'] = paths['prefix']['rate'] is None and not paths['prefix']['median']
+                    dp['last_raw'] = None
+                    dp['last_value'] = None
+                    # Nicht in [filter] only: Bytes überspringen, nicht dekodieren/publizieren
+                    dp['skip'] = bool(ONLY_DATAPOINTS) and not (
+                        str(dp_id) in ONLY_DATAPOINTS or name in ONLY_DATAPOINTS
+                    )
+                    datapoints[id_bytes] = dp
                     count += 1
                 except:
                     continue
         print(f'{count} Datenpunkte geladen (Unit {UNIT_ID_FILTER}, VOC ignoriert).')
-        return True
+        if ONLY_DATAPOINTS:
+            skipped = sum(dp['skip'] for dp in datapoints.values())
+            print(f'{len(datapoints) - skipped} davon werden dekodiert, {skipped} nur übersprungen ([filter] only).')
+        return datapoints
     except Exception as e:
         print(f'CSV Fehler: {e}')
-        return False
+        return None
+
+
+# --- HOT RELOAD (SIGHUP) ---
+def reload_signal_handler(signum, frame):
+    """SIGHUP: Konfiguration und CSV im Hintergrund neu laden, ohne die Gateway-Verbindung zu trennen."""
+    threading.Thread(target=reload_datapoints, daemon=True).start()
+
+
+def config_values(config, section):
+    """Einstellungen eines Abschnitts ohne Interpolation ({} wenn er fehlt)."""
+    return dict(config.items(section, raw=True)) if config.has_section(section) else {}
+
+
+def merge_reload_config(config):
+    """
+    Übernimmt aus config nur RELOAD_SECTIONS und RELOAD_OPTIONS, alles andere bleibt wie in active_config.
+
+    Liefert (neue Konfiguration, Abschnitte mit Änderungen, die erst nach einem Neustart wirken).
+    """
+    merged = configparser.ConfigParser()
+    merged.read_dict({section: config_values(active_config, section) for section in active_config.sections()})
+    for section in RELOAD_SECTIONS:
+        merged.remove_section(section)
+        if config.has_section(section):
+            merged.read_dict({section: config_values(config, section)})
+    for section, option in RELOAD_OPTIONS:
+        if config.has_option(section, option):
+            merged.read_dict({section: {option: config.get(section, option, raw=True)}})
+        elif merged.has_section(section):
+            merged.remove_option(section, option)
+
+    ignored = []
+    for section in sorted(set(config.sections()) | set(active_config.sections())):
+        if section in RELOAD_SECTIONS:
+            continue
+        if config_values(merged, section) != config_values(config, section):
+            ignored.append(f'[{section}]')
+    return merged, ignored
+
+
+def reload_datapoints():
+    """
+    Lädt config.ini und die CSV neu und legt die neue Tabelle für den Reader-Thread bereit.
+
+    Neu gelesen werden nur [filter], [validation], [rules], [watchdog] und csv_file aus [hoval]
+    (RELOAD_SECTIONS/RELOAD_OPTIONS). Alle übrigen Einstellungen (u.a. [hoval] ip/port, [mqtt],
+    [logging], [cache], [pipeline], [fanout], [push], [census], [tracing]) stecken in Threads,
+    Sockets und Puffern, die beim Start angelegt wurden, und behalten ihren Startwert; Änderungen
+    daran meldet das Log als erst nach einem Neustart wirksam.
+
+    Gebaut wird komplett neben der aktiven Tabelle; getauscht wird erst in apply_pending_reload()
+    zwischen zwei Frames. Verbindung, Stream-Puffer und last_sent bleiben erhalten, es wird
+    also nichts doppelt publiziert.
+    """
+    global pending_datapoint_map
+    if not reload_lock.acquire(blocking=False):
+        print('[RELOAD] Läuft bereits')
+        return
+    try:
+        start = time.perf_counter()
+        try:
+            config, ignored = merge_reload_config(load_config(config_file))
+        except FileNotFoundError as e:
+            print(f'[RELOAD] FEHLER: {e} nicht gefunden - behalte aktuelle Konfiguration')
+            return
+        apply_config(config)
+        if ignored:
+            print(f'[RELOAD] Geändert in {", ".join(ignored)} - wirkt erst nach einem Neustart')
+        watchdog_wakeup.set()  # [watchdog] kann sich geändert haben
+        datapoints = read_datapoints()
+        if datapoints is None:
+            print('[RELOAD] FEHLER: CSV nicht lesbar - behalte aktuelle Datenpunkte')
+            return
+        pending_datapoint_map = datapoints
+        print(f'[RELOAD] {len(datapoints)} Datenpunkte bereit ({(time.perf_counter() - start) * 1000:.0f} ms)')
+    finally:
+        reload_lock.release()
+
+
+def apply_pending_reload():
+    """Übernimmt eine neu geladene Tabelle (aus dem Reader-Thread, zwischen zwei Frames)."""
+    global pending_datapoint_map
+    datapoints = pending_datapoint_map
+    if datapoints is None:
+        return
+    pending_datapoint_map = None
+    old_count = len(datapoint_map)
+    set_datapoint_map(datapoints)
+    # Gemerkte Frames verweisen auf die alten Datenpunkte und Prüf-Regeln
+    frame_states.clear()
+    if census_counts is not None:
+        census_update_sizes()
+    print(f'[RELOAD] Datenpunkt-Tabelle getauscht ({old_count} -> {len(datapoints)})')
+
+
+# --- PLAUSIBILITÄTSREGELN ---
+def parse_number_list(text):
+    """Parst eine kommaseparierte Liste von Zahlen ('25.5, -25.5')."""
+    return frozenset(float(x) for x in text.split(',') if x.strip())
+
+
+def parse_rules(spec):
+    """
+    Parst eine Regel-Definition aus config.ini.
+
+    Format: Regeln durch ';' getrennt, z.B. 'range -30..50; sentinel 0.0, 25.5; rate 5; median'
+    - range MIN..MAX   Werte außerhalb verwerfen
+    - sentinel W, ...  Diese Werte sind Fehlercodes
+    - rate MAX         Maximale Änderung gegenüber dem letzten akzeptierten Wert
+    - median           Median der letzten 3 Werte ausgeben
+    """
+    rules = {}
+    for part in spec.split(';'):
+        kind, _, arg = part.strip().partition(' ')
+        arg = arg.strip()
+        if not kind:
+            continue
+        if kind == 'range':
+            low, high = arg.split('..')
+            rules['range'] = (float(low), float(high))
+        elif kind == 'sentinel':
+            rules['sentinels'] = parse_number_list(arg)
+        elif kind == 'rate':
+            rules['rate'] = float(arg)
+        elif kind == 'median':
+            rules['median'] = True
+        else:
+            raise ValueError(f'Unbekannte Regel: {kind}')
+    return rules
+
+
+def is_outdoor_temp(dp):
+    """Außentemperatur-Datenpunkt? ('Aussen' im Namen, wie bisher nur für RAW-Debug-Ausgaben)"""
+    return 'Aussen' in dp['name']
+
+
+def is_temperature(dp):
+    """Temperatur-Datenpunkt im Sinne der Bereichsprüfung ('Temp' oder 'Aussen' im Namen)"""
+    return 'Temp' in dp['name'] or 'Aussen' in dp['name']
+
+
+def csv_limit(text, decimal):
+    """Wandelt einen CSV-Grenzwert (Rohwert) in einen skalierten Wert um (None wenn ungültig)."""
+    try:
+        return float(text) / (10**decimal)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_rules(dp, row):
+    """
+    Stellt die Plausibilitätsregeln eines Datenpunkts je Erkennungsweg zusammen.
+
+    Liefert {'prefix': Regeln, 'noprefix': Regeln oder None, 'outdoor': Regeln oder None}.
+    Die Standardregeln entsprechen den früher fest kodierten Filtern des jeweiligen Wegs:
+    - alle Wege: decimal_sentinels (mit Dezimalstellen), temp_sentinels ('Temp' im Namen, mit Dezimalstellen)
+    - prefix (0x00 + ID): temp_range für 'Temp'/'Aussen', outdoor_sentinels für 'Aussen'
+    - noprefix (IDs 0-5 ohne 0x00): temp_range für 'Temp'/'Aussen', max. noprefix_rate Änderung
+      gegenüber dem zuletzt publizierten Wert; ohne publizierten Wert noprefix_first_sentinels für 'Temp'/'Aussen'
+    - outdoor (Außentemperatur-Scan, ID 0): outdoor_scan_range
+    Zusätzlich (opt-in) auf allen Wegen: CSV-Grenzen ([validation] csv_limits) und eigene Regeln aus [rules].
+    """
+    name, decimal = dp['name'], dp['decimal']
+    temperature = is_temperature(dp)
+    temp_range = parse_rules(f'range {VALIDATION_TEMP_RANGE}')['range']
+
+    sentinels = set()
+    if decimal > 0:
+        sentinels |= parse_number_list(VALIDATION_DECIMAL_SENTINELS)
+        if 'Temp' in name:
+            sentinels |= parse_number_list(VALIDATION_TEMP_SENTINELS)
+    base = {
+        'range': (float('-inf'), float('inf')),
+        'sentinels': frozenset(sentinels),
+        'step': None,
+        'scale': 10**decimal,
+        'rate': None,
+        'median': False,
+        'jump': None,
+        'first_sentinels': frozenset(),
+    }
+
+    paths = {'prefix': dict(base), 'noprefix': None, 'outdoor': None}
+    if temperature:
+        paths['prefix']['range'] = temp_range
+    if 'Aussen' in name:
+        paths['prefix']['sentinels'] |= parse_number_list(VALIDATION_OUTDOOR_SENTINELS)
+    if dp['id'] <= 5:
+        # IDs 0-5 werden auch ohne 0x00 Prefix erkannt: Sprünge sind meist False Positives
+        noprefix = paths['noprefix'] = dict(base, jump=VALIDATION_NOPREFIX_RATE)
+        if temperature:
+            noprefix['range'] = temp_range
+            noprefix['first_sentinels'] = parse_number_list(VALIDATION_NOPREFIX_FIRST_SENTINELS)
+    if dp['id'] == 0:
+        paths['outdoor'] = dict(base, range=parse_rules(f'range {VALIDATION_OUTDOOR_SCAN_RANGE}')['range'])
+
+    custom = {}
+    spec = VALIDATION_RULES.get(str(dp['id']))
+    if spec:
+        try:
+            custom = parse_rules(spec)
+        except ValueError as e:
+            print(f'FEHLER: Ungültige Regel für Datenpunkt {dp["id"]}: {spec} ({e})')
+
+    csv_range, step = None, None
+    if VALIDATION_CSV_LIMITS:
+        # Min/Max sind Sollwert-Grenzen und gelten nur für beschreibbare Datenpunkte ('Writable' = Yes);
+        # Messwerte dürfen sie verlassen (z.B. Modulation 0 im Standby bei Min. 15)
+        csv_low = csv_limit(row.get('Min. value'), decimal)
+        csv_high = csv_limit(row.get('Max. value'), decimal)
+        writable = row.get('Writable', '').strip().lower() == 'yes'
+        if writable and csv_low is not None and csv_high is not None and csv_low < csv_high:
+            csv_range = (csv_low, csv_high)
+        try:
+            step = int(row.get('Steps') or 1)
+        except ValueError:
+            step = None
+
+    for rules in paths.values():
+        if rules is None:
+            continue
+        if csv_range:
+            low, high = rules['range']
+            rules['range'] = (max(low, csv_range[0]), min(high, csv_range[1]))
+        if step and step > 1:
+            rules['step'] = step
+        rules['range'] = custom.get('range', rules['range'])
+        rules['sentinels'] = rules['sentinels'] | custom.get('sentinels', frozenset())
+        rules['rate'] = custom.get('rate')
+        rules['median'] = custom.get('median', False)
+    return paths
+
+
+def make_validator(rules, name, topic):
+    """
+    Erzeugt das Prüf-Prädikat eines Datenpunkts für einen Erkennungsweg: validate(value) -> value oder None.
+
+    Ohne zustandsbehaftete Regeln ist das Prädikat ein einzelner Vergleich. 'jump'/'first_sentinels'
+    vergleichen mit dem zuletzt publizierten Wert (last_sent[topic]). 'rate'/'median' aus [rules] merken
+    sich den letzten akzeptierten Wert bzw. die letzten 3 Werte; nach RATE_RESET_AFTER verworfenen
+    Sprüngen in Folge wird der neue Wert übernommen, damit ein falscher Startwert die Regel nicht
+    dauerhaft blockiert. Beides meldet das Prädikat an decode_frame (published_reads bzw.
+    stateful_checks), damit Frame-Cache und differenzielle Dekodierung kein Ergebnis übernehmen,
+    das heute anders ausfiele.
+    """
+    low, high = rules['range']
+    sentinels = rules['sentinels']
+    step = rules['step']
+    scale = rules['scale']
+    rate = rules['rate']
+    median = rules['median']
+    jump = rules['jump']
+    first_sentinels = rules['first_sentinels']
+
+    def check(value):
+        if value in sentinels or not low <= value <= high or (step and round(value * scale) % step):
+            if DEBUG_RAW:
+                print(f' [FILTER] {name}: {value} verworfen')
+            return False
+        if jump is not None:
+            prev = last_sent.get(topic)
+            published_reads.append((topic, prev))
+            if prev is None:
+                return value not in first_sentinels
+            if abs(value - prev) > jump:
+                if DEBUG_RAW:
+                    print(f' [FILTER] {name}: Sprung {prev} -> {value} verworfen')
+                return False
+        return True
+
+    if rate is None and not median:
+
+        def validate(value):
+            return value if check(value) else None
+
+        return validate
+
+    state = {'last': None, 'rejects': 0}
+    window = deque(maxlen=3)
+
+    def validate(value):
+        global stateful_checks
+        stateful_checks += 1
+        if not check(value):
+            return None
+        if rate is not None and state['last'] is not None and abs(value - state['last']) > rate:
+            state['rejects'] += 1
+            if state['rejects'] < RATE_RESET_AFTER:
+                if DEBUG_RAW:
+                    print(f' [FILTER] {name}: Sprung {state["last"]} -> {value} verworfen')
+                return None
+        state['last'] = value
+        state['rejects'] = 0
+        if not median:
+            return value
+        window.append(value)
+        return sorted(window)[len(window) // 2]
+
+    return validate
 
 
 # --- DECODER ---
@@ -176,7 +861,7 @@ def decode_smart(raw_bytes, dp_info):
             # S16 Fehlercodes:
             # - 0xFFFF = -1 (raw) - klassischer Null-Wert
             # - 0xFF00 bis 0xFF01 = -256 bis -255 → -25.6 bis -25.5°C (Fehlercodes)
-            # - 0x00FF = 255 → 25.5°C (bereits im Anomalie-Filter)
+            # - 0x00FF = 255 → 25.5°C (Fehlercode in den Plausibilitätsregeln)
             # Aber NICHT alle 0xFF-High-Bytes filtern, da echte negative Temps
             # z.B. -1.0°C = 0xFFF6, -1.1°C = 0xFFF5, -5.0°C = 0xFFCE, -12.8°C = 0xFF80
             if raw_bytes == b'\xff\xff':
@@ -230,23 +915,19 @@ def decode_smart(raw_bytes, dp_info):
             val = val / (10 ** dp_info['decimal'])
             val = round(val, 2)
 
-            # --- FILTER (REDUZIERT) ---
-            # 25.5°C und -25.5°C sind bekannte Fehlercodes (0x00FF und 0xFF01)
-            if val in [25.5, -25.5] and 'Temp' in dp_info['name']:
-                if DEBUG_CONSOLE:
-                    print(f' [FILTER] {val}°C erkannt bei {dp_info["name"]} - gefiltert')
-                return None
-
-            if val == 112.0:
-                if DEBUG_CONSOLE:
-                    print(f' [FILTER] 112.0 erkannt bei {dp_info["name"]} - gefiltert')
-                return None
-
         return val
     except:
         return None
 
 
+def find_all(data, pattern):
+    """Liefert alle Positionen von pattern in data (Suche auf C-Ebene via bytes.find)."""
+    i = data.find(pattern)
+    while i != -1:
+        yield i
+        i = data.find(pattern, i + 1)
+
+
 def scan_for_outdoor_temp(client, data, dp):
     """
     Scannt den gesamten Frame nach dem Außentemperatur-Pattern.
@@ -262,168 +943,631 @@ def scan_for_outdoor_temp(client, data, dp):
     Negative Temperaturen (S16):
     - -1.0°C = 0xFFF6, -1.1°C = 0xFFF5, -5.0°C = 0xFFCE, etc.
     - Das High-Byte 0xFF ist KEIN Fehlercode, sondern das Vorzeichen!
+
+    Gibt den gefundenen Wert zurück (None wenn kein gültiger Kandidat).
     """
     # Wir brauchen mindestens 8 Bytes
     if len(data) < 8:
-        return False
+        return None
 
     # Finde alle FF 02 Terminatoren und prüfe rückwärts
-    for i in range(len(data) - 1):
-        if data[i : i + 2] == b'\xff\x02':
-            # FF 02 gefunden an Position i
-            # Prüfe ob 6 Bytes davor verfügbar: [4-byte prefix] [2-byte value] [FF 02]
-            if i < 6:
-                continue
+    for i in find_all(data, b'\xff\x02'):
+        # FF 02 gefunden an Position i
+        # Prüfe ob 6 Bytes davor verfügbar: [4-byte prefix] [2-byte value] [FF 02]
+        if i < 6:
+            continue
 
-            raw_bytes = data[i - 2 : i]  # 2 Bytes direkt vor FF 02 = Value
-            prefix = data[i - 6 : i - 2]  # 4 Bytes davor = Prefix
+        raw_bytes = data[i - 2 : i]  # 2 Bytes direkt vor FF 02 = Value
+        prefix = data[i - 6 : i - 2]  # 4 Bytes davor = Prefix
+
+        if DEBUG_RAW:
+            # Zeige mehr Kontext: 10 Bytes vor FF 02
+            context_start = max(0, i - 10)
+            context = data[context_start : i + 2]
+            print(f' [FF02] @ {i}: prefix={prefix.hex()} value={raw_bytes.hex()} context={context.hex()}')
+
+        # Prüfe auf gültiges Prefix-Pattern
+        # Das Prefix muss mindestens 2x 0x00 aufeinanderfolgend haben
+        # Mögliche Patterns:
+        # - 00 00 00 00 (Standard für positive Temps)
+        # - xx 00 00 00 (xx = beliebiges Vorgänger-Byte)
+        # - 00 00 00 xx (möglich bei negativen Temps?)
+        # - xx 00 00 xx (auch möglich?)
+        valid_prefix = False
+        if prefix == b'\x00\x00\x00\x00':
+            valid_prefix = True
+        elif prefix[1:4] == b'\x00\x00\x00':
+            # Auch akzeptieren wenn nur die letzten 3 Bytes 00 sind
+            # (das erste Byte kann vom vorherigen Datenpunkt sein)
+            valid_prefix = True
+        elif prefix[0:3] == b'\x00\x00\x00':
+            # Alternative: Die ersten 3 Bytes sind 00
+            # (das letzte Byte könnte Teil des Temperaturwerts sein bei 4-byte Kodierung?)
+            valid_prefix = True
+        elif prefix[1:3] == b'\x00\x00':
+            # Noch lockerer: Mindestens 2 aufeinanderfolgende Nullen in der Mitte
+            valid_prefix = True
+
+        if not valid_prefix:
+            continue
 
+        # Überspringe echte Fehlercodes (NICHT negative Temperaturen!)
+        # 0xFFFF = -1 (klassischer Null-Wert für S16)
+        # 0xFF02 = Frame-Terminator (KEIN echter Temperaturwert!)
+        # 0x00FF = 255 → 25.5°C (Fehlercode, wird von den Plausibilitätsregeln gefiltert)
+        # 0x0000 = 0 → 0.0°C (oft Fehlercode bei Außentemp)
+        # 0xFF00-0xFF01 = Fehlercodes (-25.6 bis -25.5°C Bereich)
+        # ABER: 0xFFF5 = -11 → -1.1°C ist KEIN Fehlercode!
+        # ABER: 0xFF02 könnte theoretisch -25.4°C sein - praktisch unmöglich
+        if raw_bytes == b'\xff\xff':
             if DEBUG_RAW:
-                # Zeige mehr Kontext: 10 Bytes vor FF 02
-                context_start = max(0, i - 10)
-                context = data[context_start : i + 2]
-                print(f' [FF02] @ {i}: prefix={prefix.hex()} value={raw_bytes.hex()} context={context.hex()}')
-
-            # Prüfe auf gültiges Prefix-Pattern
-            # Das Prefix muss mindestens 2x 0x00 aufeinanderfolgend haben
-            # Mögliche Patterns:
-            # - 00 00 00 00 (Standard für positive Temps)
-            # - xx 00 00 00 (xx = beliebiges Vorgänger-Byte)
-            # - 00 00 00 xx (möglich bei negativen Temps?)
-            # - xx 00 00 xx (auch möglich?)
-            valid_prefix = False
-            if prefix == b'\x00\x00\x00\x00':
-                valid_prefix = True
-            elif prefix[1:4] == b'\x00\x00\x00':
-                # Auch akzeptieren wenn nur die letzten 3 Bytes 00 sind
-                # (das erste Byte kann vom vorherigen Datenpunkt sein)
-                valid_prefix = True
-            elif prefix[0:3] == b'\x00\x00\x00':
-                # Alternative: Die ersten 3 Bytes sind 00
-                # (das letzte Byte könnte Teil des Temperaturwerts sein bei 4-byte Kodierung?)
-                valid_prefix = True
-            elif prefix[1:3] == b'\x00\x00':
-                # Noch lockerer: Mindestens 2 aufeinanderfolgende Nullen in der Mitte
-                valid_prefix = True
-
-            if not valid_prefix:
-                continue
+                print('   -> Fehlercode 0xFFFF übersprungen')
+            continue
+        if raw_bytes == b'\xff\x02':
+            # Das ist der Frame-Terminator, nicht ein Temperaturwert!
+            if DEBUG_RAW:
+                print('   -> Frame-Terminator 0xFF02 übersprungen')
+            continue
+        if raw_bytes == b'\x00\x00':
+            if DEBUG_RAW:
+                print('   -> Fehlercode 0x0000 übersprungen')
+            continue
+        # Nur 0xFF00-0xFF01 sind Fehlercodes (nicht 0xFF02+, das sind echte negative Temps)
+        # 0xFF00 = -25.6°C, 0xFF01 = -25.5°C (bekannter Fehlercode)
+        if raw_bytes[0] == 0xFF and raw_bytes[1] <= 0x01:
+            if DEBUG_RAW:
+                print(f'   -> Fehlercode-Bereich 0xFF00-0xFF01 übersprungen: {raw_bytes.hex()}')
+            continue
 
-            # Überspringe echte Fehlercodes (NICHT negative Temperaturen!)
-            # 0xFFFF = -1 (klassischer Null-Wert für S16)
-            # 0xFF02 = Frame-Terminator (KEIN echter Temperaturwert!)
-            # 0x00FF = 255 → 25.5°C (Fehlercode, wird später als Anomalie gefiltert)
-            # 0x0000 = 0 → 0.0°C (oft Fehlercode bei Außentemp)
-            # 0xFF00-0xFF01 = Fehlercodes (-25.6 bis -25.5°C Bereich)
-            # ABER: 0xFFF5 = -11 → -1.1°C ist KEIN Fehlercode!
-            # ABER: 0xFF02 könnte theoretisch -25.4°C sein - praktisch unmöglich
-            if raw_bytes == b'\xff\xff':
-                if DEBUG_RAW:
-                    print('   -> Fehlercode 0xFFFF übersprungen')
-                continue
-            if raw_bytes == b'\xff\x02':
-                # Das ist der Frame-Terminator, nicht ein Temperaturwert!
-                if DEBUG_RAW:
-                    print('   -> Frame-Terminator 0xFF02 übersprungen')
-                continue
-            if raw_bytes == b'\x00\x00':
-                if DEBUG_RAW:
-                    print('   -> Fehlercode 0x0000 übersprungen')
-                continue
-            # Nur 0xFF00-0xFF01 sind Fehlercodes (nicht 0xFF02+, das sind echte negative Temps)
-            # 0xFF00 = -25.6°C, 0xFF01 = -25.5°C (bekannter Fehlercode)
-            if raw_bytes[0] == 0xFF and raw_bytes[1] <= 0x01:
-                if DEBUG_RAW:
-                    print(f'   -> Fehlercode-Bereich 0xFF00-0xFF01 übersprungen: {raw_bytes.hex()}')
-                continue
+        # DEBUG: Zeige auch gültige Kandidaten die durch decode_smart gehen
+        if DEBUG_RAW:
+            print(f'   -> Gültiger Kandidat mit prefix={prefix.hex()}, versuche decode...')
 
-            # DEBUG: Zeige auch gültige Kandidaten die durch decode_smart gehen
-            if DEBUG_RAW:
-                print(f'   -> Gültiger Kandidat mit prefix={prefix.hex()}, versuche decode...')
+        value = decode_smart(raw_bytes, dp)
+        if value is not None:
+            value = dp['validate_outdoor'](value)
+        if value is not None:
+            print(f' [SCAN] Außentemp: 0x{raw_bytes.hex()} = {value}°C @ pos {i - 2}')
+            handle_output(client, dp['name'], value, dp['unit'])
+            return value
+
+    return None
+
+
+def frame_signature(data):
+    """Signatur eines Frames: Länge + Header-Bytes (gleiches Layout = gleiche Signatur)."""
+    return (len(data), data[:FRAME_SIGNATURE_LEN])
+
+
+def get_frame_state(data):
+    """
+    Liefert den Zustand der Frame-Signatur von data (wird bei Bedarf angelegt).
+
+    Zustand: 'lru' = OrderedDict Content-Hash -> Eintrag, 'last' = zuletzt verarbeiteter Eintrag.
+    Ein Eintrag merkt sich Frame, Treffer, Sprungmaske und Werte (siehe decode_frame).
+    Die Anzahl der Signaturen ist begrenzt, damit Fragmente den Speicher nicht füllen.
+    """
+    sig = frame_signature(data)
+    state = frame_states.get(sig)
+    if state is None:
+        state = frame_states[sig] = {'lru': OrderedDict(), 'last': None}
+        if len(frame_states) > FRAME_CACHE_MAX_SIGNATURES:
+            frame_states.popitem(last=False)
+    else:
+        frame_states.move_to_end(sig)
+    return state
+
+
+def log_frame_cache_stats():
+    """Gibt Trefferquote des Frame-Caches und Umfang der differenziellen Dekodierung aus."""
+    hits = frame_cache_stats['hits']
+    total = hits + frame_cache_stats['misses']
+    ratio = (hits / total * 100) if total else 0.0
+    print(
+        f'[CACHE] {hits}/{total} Frames übersprungen ({ratio:.1f}%), {len(frame_states)} Signaturen, '
+        f'{frame_cache_stats["diff"]} differenziell / {frame_cache_stats["full"]} voll dekodiert, '
+        f'{frame_cache_stats["rescanned_bytes"]} Bytes neu gescannt, '
+        f'{frame_cache_stats["memo"]} Werte mit unveränderten Rohbytes'
+    )
+
+
+# --- STRUKTURPRÜFUNG ---
+def split_frames(buffer, flush=False):
+    """
+    Teilt empfangene Bytes an 0xFF 0x01 in Frames: liefert (Frames, Rest).
+
+    Endet der letzte Frame nicht mit 0xFF 0x02, wurde er vermutlich von der recv()-Grenze
+    abgeschnitten und kommt als Rest (mit Delimiter) zurück - der Aufrufer stellt ihn den
+    nächsten Bytes voran. So erreichen keine Frame-Hälften den Decoder. Sofort geliefert wird
+    der letzte Frame dagegen, wenn seine Länge für seinen Typ gelernt ist (Frame-Typen ohne
+    Abschluss, siehe check_frame), wenn er FRAME_MAX_PENDING überschreitet oder mit flush
+    (keine weiteren Bytes innerhalb von FRAME_PENDING_TIMEOUT).
+    """
+    parts = buffer.split(b'\xff\x01')
+    last = parts[-1]
+    if flush or last.endswith(b'\xff\x02') or len(last) > FRAME_MAX_PENDING:
+        return parts, b''
+    with frame_check_lock:
+        learned = len(last) in frame_lengths.get(last[:FRAME_SIGNATURE_LEN], ())
+    if learned:
+        return parts, b''
+    parts.pop()
+    return parts, b'\xff\x01' + last if parts else last
+
+
+def check_frame(data):
+    """
+    Prüft vor dem Scan, ob ein Frame strukturell vollständig ist (O(1), ohne die Nutzdaten zu lesen).
+
+    Das Protokoll hat weder Längenfeld noch Prüfsumme, und der Abschluss 0xFF 0x02 ist nicht
+    verpflichtend. Gültige Längen werden daher pro Frame-Typ (Header-Bytes) gelernt: Eine Länge
+    gilt, sobald sie FRAME_CHECK_LEARN_MIN-mal gesehen wurde - mit oder ohne Abschluss, ein
+    abgeschnittener Frame hat praktisch nie wiederholt dieselbe Länge. Nach den ersten
+    FRAME_CHECK_LEARN_FRAMES Frames werden verworfen: unbekannte Längen (ohne Abschluss als
+    'truncated' gezählt) und unbekannte Header. Neue Layouts werden nach wenigen Frames übernommen.
+    """
+    header = data[:FRAME_SIGNATURE_LEN]
+    length = len(data)
+    with frame_check_lock:
+        valid = frame_lengths.get(header)
+        if valid is not None and length in valid:
+            return True
+
+        learning = frames_total <= FRAME_CHECK_LEARN_FRAMES
+        key = (header, length)
+        seen = frame_length_candidates.get(key, 0) + 1
+        if seen >= FRAME_CHECK_LEARN_MIN:
+            del frame_length_candidates[key]
+            frame_lengths.setdefault(header, set()).add(length)
+            return True
+        if len(frame_length_candidates) >= FRAME_CHECK_MAX_CANDIDATES:
+            frame_length_candidates.clear()
+        frame_length_candidates[key] = seen
+        if learning:
+            return True
+        if not data.endswith(b'\xff\x02'):
+            frame_check_stats['truncated'] += 1
+        else:
+            frame_check_stats['length' if valid is not None else 'header'] += 1
+        return False
+
+
+def reset_frame_check():
+    """Vergisst die gelernten Frame-Längen (neue Lernphase ab dem nächsten Frame)."""
+    global frames_total
+    frames_total = 0
+    with frame_check_lock:
+        frame_lengths.clear()
+        frame_length_candidates.clear()
+        for reason in frame_check_stats:
+            frame_check_stats[reason] = 0
+
+
+def log_frame_check_stats():
+    """Gibt die Zahl der vor dem Scan verworfenen Frames und die gelernten Frame-Typen aus."""
+    with frame_check_lock:
+        stats = dict(frame_check_stats)
+        types = len(frame_lengths)
+        lengths = sum(len(valid) for valid in frame_lengths.values())
+    rejected = sum(stats.values())
+    ratio = (rejected / frames_total * 100) if frames_total else 0.0
+    print(
+        f'[STRUKTUR] {rejected}/{frames_total} Frames verworfen ({ratio:.1f}%): '
+        f'{stats["truncated"]} ohne Abschluss, {stats["length"]} falsche Länge, '
+        f'{stats["header"]} unbekannter Header; {types} Frame-Typen, {lengths} Längen gelernt'
+    )
+
+
+def inputs_unchanged(entry):
+    """True, wenn last_sent noch die Werte enthält, mit denen die Sprung-Regel beim Dekodieren verglich."""
+    return all(last_sent.get(topic) == value for topic, value in entry['inputs'])
+
+
+def process_stream(client, data, on_value=None):
+    """
+    Verarbeitet einen Frame (ohne 0xFF 0x01): Zählung, Strukturprüfung, Dekodierung und Publizieren.
+
+    on_value(name, value, unit) erhält jeden gültigen Wert des Frames, auch unveränderte aus
+    Frame-Cache, Diff oder Rohbytes-Memo, die nicht erneut publiziert werden (für Tools, siehe
+    hoval_capture.py und hoval_catalog.py).
+    """
+    global frames_total, last_value_time
+    frames_total += 1
+
+    if census_counts is not None:
+        census_frame(data)
+
+    if FRAME_CHECK_ENABLED and not check_frame(data):
+        return
+
+    outputs = decode_cached(client, data)
+    if outputs:
+        # Auch Werte aus Frame-Cache, Diff und Rohbytes-Memo, die handle_output nicht erreichen
+        last_value_time = time.monotonic()
+    if on_value is not None:
+        for name, value, unit in outputs:
+            on_value(name, value, unit)
+
+
+def decode_cached(client, data):
+    """Dekodiert einen Frame über Frame-Cache und differenzielle Dekodierung; liefert seine Werte."""
+    if not (FRAME_CACHE_ENABLED or FRAME_DIFF_ENABLED):
+        return decode_frame(client, data)['outputs']
+
+    state = get_frame_state(data)
+    lru = state['lru']
+    digest = None
+
+    if FRAME_CACHE_ENABLED:
+        digest = hash(data)
+        entry = lru.get(digest)
+        if entry is not None and entry['frame'] == data and inputs_unchanged(entry):
+            frame_cache_stats['hits'] += 1
+            # Identisch zu einem gemerkten Frame: nicht dekodieren, nur gemerkte Werte abgleichen.
+            # last_sent ist global - ein Frame anderer Signatur kann einen geteilten Datenpunkt
+            # inzwischen geändert haben (A: 72, B: 71, A: 72)
+            if entry is not state['last']:
+                lru.move_to_end(digest)
+                state['last'] = entry
+            sync_outputs(client, entry['outputs'])
+            return entry['outputs']
+        frame_cache_stats['misses'] += 1
+
+    prev = state['last'] if FRAME_DIFF_ENABLED else None
+    if prev is not None and prev['inputs']:
+        # Übernommene Treffer der Sprung-Regel hingen vom damals publizierten Wert ab
+        prev = None
+    entry = decode_frame(client, data, prev)
+    if entry['volatile']:
+        # rate/median hängen vom Verlauf ab: jeder Wert muss durch das Prädikat, auch wenn der Frame
+        # sich wiederholt. Solche Frames werden weder gemerkt noch als Diff-Basis verwendet.
+        state['last'] = None
+        return entry['outputs']
+    state['last'] = entry
+
+    if digest is not None:
+        lru[digest] = entry
+        if len(lru) > FRAME_CACHE_SIZE:
+            lru.popitem(last=False)
+    return entry['outputs']
+
+
+# --- ZÄHLUNG DER DATENPUNKT-IDS ---
+def census_start():
+    """Legt die festen Zählertabellen an (einmalig, danach keine Allokationen mehr)."""
+    global census_counts, census_gaps
+    census_counts = array('I', bytes(4 * 65536))
+    census_gaps = array('I', bytes(4 * 65536 * CENSUS_GAP_BUCKETS))
+    census_update_sizes()
+
+
+def census_update_sizes():
+    """Wertlängen der aktiven Datenpunkte, damit 0x00-Bytes in deren Werten nicht als ID zählen."""
+    global census_sizes
+    sizes = bytearray(65536)
+    for dp in datapoint_map.values():
+        sizes[dp['id']] = dp['size']
+    census_sizes = sizes
+
+
+def census_frame(data):
+    """
+    Zählt jede Kandidaten-ID (0x00 + 2 Byte) eines Frames, unabhängig von CSV, Filtern und Cache.
+
+    Die 0x00-Positionen liefert bytes.find (C-Schleife), pro Kandidat bleibt ein Array-Inkrement.
+    Zusätzlich wird der Abstand bis zum nächsten Kandidaten gezählt: Bei echten Datenpunkten
+    häuft er sich bei der Wertlänge (1, 2 oder 4 Bytes). Werte aktiver Datenpunkte werden
+    übersprungen, unbekannte IDs können dagegen auch aus 0x00-Bytes in Werten stammen.
+    """
+    global census_frames
+    census_frames += 1
+    counts = census_counts
+    gaps = census_gaps
+    sizes = census_sizes
+    last = len(data) - 3
+    prev_slot = -1  # Gap-Tabelle der vorherigen ID
+    prev_end = 0
+    i = data.find(0)
+    while 0 <= i <= last:
+        dp_id = (data[i + 1] << 8) | data[i + 2]
+        counts[dp_id] += 1
+        if prev_slot >= 0:
+            gaps[prev_slot + min(i - prev_end, CENSUS_GAP_BUCKETS - 1)] += 1
+        prev_slot = dp_id * CENSUS_GAP_BUCKETS
+        prev_end = i + 3
+        i = data.find(0, prev_end + sizes[dp_id])
+    if prev_slot >= 0:
+        # Letzter Kandidat: Abstand bis zum Frame-Ende (ohne 0xFF 0x02 Abschluss)
+        end = len(data) - 2 if data.endswith(b'\xff\x02') else len(data)
+        gaps[prev_slot + min(max(end - prev_end, 0), CENSUS_GAP_BUCKETS - 1)] += 1
+
+
+def read_catalog_names():
+    """Alle HV-Datenpunkte der CSV (ohne Unit-/Keyword-Filter): ID -> Name."""
+    names = {}
+    try:
+        with open(CSV_FILE, encoding='utf-8', errors='replace') as f:
+            delimiter = ';' if ';' in f.readline() else ','
+            f.seek(0)
+            for row in csv.DictReader(f, delimiter=delimiter):
+                if row.get('UnitName') == 'HV':
+                    try:
+                        names.setdefault(int(row['DatapointId']), row['DatapointName'])
+                    except (KeyError, ValueError):
+                        continue
+    except OSError:
+        pass
+    return names
+
+
+def census_report():
+    """
+    Schreibt die nach Häufigkeit sortierte Zählung als CSV und gibt die Top-Einträge aus.
 
-            value = decode_smart(raw_bytes, dp)
-            if value is not None and -40 <= value <= 50:
-                print(f' [SCAN] Außentemp: 0x{raw_bytes.hex()} = {value}°C @ pos {i - 2}')
-                handle_output(client, dp['name'], value, dp['unit'])
-                return True
-            elif DEBUG_RAW and value is not None:
-                print(f'   -> Wert {value}°C außerhalb Bereich -40..50')
+    Status: aktiv (wird dekodiert), gefiltert (in der CSV, aber durch unit_id/ignore_keywords
+    ausgeschlossen), unbekannt (nicht in der CSV - neue Firmware oder 0x00 innerhalb eines Werts).
+    """
+    if census_counts is None:
+        return
+    counts = census_counts
+    ranked = sorted((dp_id for dp_id in range(65536) if counts[dp_id]), key=counts.__getitem__, reverse=True)
+    total = sum(counts[dp_id] for dp_id in ranked)
+    names = read_catalog_names()
+    active = {dp['id']: dp for dp in datapoint_map.values()}
+
+    rows = []
+    for dp_id in ranked:
+        slot = dp_id * CENSUS_GAP_BUCKETS
+        gaps = census_gaps[slot : slot + CENSUS_GAP_BUCKETS]
+        likely = max(range(CENSUS_GAP_BUCKETS), key=gaps.__getitem__) if any(gaps) else ''
+        if dp_id in active:
+            status = 'übersprungen' if active[dp_id]['skip'] else 'aktiv'
+        else:
+            status = 'gefiltert' if dp_id in names else 'unbekannt'
+        if likely == '':
+            plausible = ''
+        elif dp_id in active:
+            # Passt der häufigste Abstand nicht zur Wertlänge aus der CSV, lohnt ein Blick
+            plausible = 'ja' if likely == active[dp_id]['size'] else 'nein'
+        else:
+            plausible = 'ja' if likely in (1, 2, 4) else 'nein'
+        rows.append(
+            [
+                dp_id,
+                f'0x{dp_id:04x}',
+                counts[dp_id],
+                f'{counts[dp_id] / census_frames:.3f}',
+                status,
+                names.get(dp_id, ''),
+                likely,
+                plausible,
+                *gaps,
+            ]
+        )
+
+    path = CENSUS_FILE or os.path.join(
+        PROFILE_DIR if os.path.isdir(PROFILE_DIR) else tempfile.gettempdir(), 'hoval-census.csv'
+    )
+    try:
+        with open(path + '.tmp', 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(
+                ['DatapointId', 'Hex', 'Anzahl', 'ProFrame', 'Status', 'Name', 'Wertlaenge', 'Plausibel']
+                + [f'Abstand{n}' for n in range(CENSUS_GAP_BUCKETS - 1)]
+                + [f'Abstand>{CENSUS_GAP_BUCKETS - 2}']
+            )
+            writer.writerows(rows)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        print(f'[CENSUS] FEHLER: {path} ({e})')
+        return
+
+    print(f'[CENSUS] {len(ranked)} IDs, {total} Kandidaten in {census_frames} Frames -> {path}')
+    for row in rows[:CENSUS_TOP]:
+        print(f'[CENSUS] {row[1]} {row[2]:>8} {row[4]:9} Länge {row[6]!s:2} {row[5][:40]}')
+
+
+def changed_spans(old, new):
+    """
+    Liefert die geänderten Byte-Bereiche zweier gleich langer Frames als [(start, ende), ...].
+
+    XOR über beide Frames als Integer; die Schleife läuft nur über die geänderten Bytes,
+    nicht über die Frame-Länge. ende ist inklusiv.
+    """
+    x = int.from_bytes(old, 'big') ^ int.from_bytes(new, 'big')
+    last = len(new) - 1
+    consumed = 0  # Bereits abgearbeitete Bytes vom Frame-Ende her
+    spans = []
+    while x:
+        low = ((x & -x).bit_length() - 1) >> 3  # Niedrigstes geändertes Byte (vom Ende gezählt)
+        pos = last - consumed - low
+        if spans and spans[-1][0] == pos + 1:
+            spans[-1][0] = pos
+        else:
+            spans.append([pos, pos])
+        x >>= (low + 1) * 8
+        consumed += low + 1
+    spans.reverse()
+    return spans
+
+
+def rescan_changed(client, data, prev):
+    """
+    Differenzielle Dekodierung gegenüber dem vorherigen Frame gleicher Signatur.
+
+    Der Scanner ist ein Links-nach-rechts-Scan, dessen einziger Zustand die Position ist.
+    Für jeden geänderten Bereich wird daher ab der letzten Position, die der alte Scan
+    besucht hat und deren Lesefenster (max. SCAN_LOOKAHEAD Bytes) vor der Änderung endet,
+    neu gescannt - bis der neue Scan hinter der Änderung wieder auf eine Position des
+    alten Scans trifft. Ab dort sind beide Scans identisch; alle übrigen Treffer werden
+    unverändert übernommen.
+    """
+    hits = list(prev['hits'])
+    skip = bytearray(prev['skip'])
+    n = len(data)
+    pos = 0  # Bis hier ist der neue Scan mit dem alten synchron
+
+    for start, end in changed_spans(prev['frame'], data):
+        if end < pos:
+            continue
 
-    return False
+        s = max(start - SCAN_LOOKAHEAD, pos)
+        while s > pos and skip[s]:
+            s -= 1
 
+        i, new_hits = scan_datapoints(client, data, s, end, skip)
 
-def process_stream(client, data):
-    # Scan durch Frame (bereits durch 0xFF 0x01 getrennt in main())
-    # Jetzt flexibel: Akzeptiere IDs mit ODER ohne 0x00 Prefix
+        lo = bisect_left(hits, s, key=itemgetter(0))
+        hi = bisect_left(hits, i, key=itemgetter(0))
+        hits[lo:hi] = new_hits
 
+        stop = n if i >= n - 2 else i  # Scan bis zum Ende: auch Reste alter Treffer löschen
+        skip[s:stop] = bytes(stop - s)
+        for hit_start, hit_end, _ in new_hits:
+            skip[hit_start + 1 : hit_end] = b'\x01' * (hit_end - hit_start - 1)
+
+        frame_cache_stats['rescanned_bytes'] += stop - s
+        pos = i
+
+    return hits, skip
+
+
+def decode_frame(client, data, prev=None):
+    """
+    Dekodiert einen Frame (bereits durch 0xFF 0x01 getrennt in main()).
+
+    Mit prev (Eintrag des vorherigen Frames gleicher Signatur) werden nur die geänderten
+    Byte-Bereiche neu dekodiert, unveränderte Datenpunkte werden übernommen.
+    Liefert den Eintrag für den Frame-Zustand: Frame, Treffer (start, ende, wert),
+    Sprungmaske des Scans, alle Werte des Frames, ob eine zustandsbehaftete Regel lief
+    (volatile) und welche publizierten Werte die Sprung-Regel gelesen hat (inputs),
+    siehe process_stream.
+    """
+    checks = stateful_checks
+    del published_reads[:]
     # Spezialfall: DatapointId=0 (Außentemperatur) - scanne gesamten Frame
+    outputs = []
     dp_outdoor = datapoint_map.get(b'\x00\x00')  # ID=0
-    if dp_outdoor:
-        scan_for_outdoor_temp(client, data, dp_outdoor)
+    if dp_outdoor and not dp_outdoor['skip']:
+        value = scan_for_outdoor_temp(client, data, dp_outdoor)
+        if value is not None:
+            outputs.append((dp_outdoor['name'], value, dp_outdoor['unit']))
+
+    if prev is not None:
+        hits, skip = rescan_changed(client, data, prev)
+        frame_cache_stats['diff'] += 1
+    else:
+        _, hits = scan_datapoints(client, data)
+        skip = bytearray(len(data))
+        for hit_start, hit_end, _ in hits:
+            skip[hit_start + 1 : hit_end] = b'\x01' * (hit_end - hit_start - 1)
+        frame_cache_stats['full'] += 1
+
+    outputs.extend(hit[2] for hit in hits if hit[2] is not None)
+    if prev is not None:
+        # Übernommene Treffer liefen nicht durch handle_output; ein Frame anderer Signatur
+        # kann ihren Datenpunkt inzwischen geändert haben (neue Treffer stehen bereits in last_sent)
+        sync_outputs(client, outputs)
+    return {
+        'frame': data,
+        'hits': hits,
+        'skip': skip,
+        'outputs': tuple(outputs),
+        'volatile': stateful_checks != checks,
+        'inputs': tuple(published_reads),
+    }
+
+
+def scan_datapoints(client, data, i=0, stop_after=None, old_skip=None):
+    """
+    Scannt den Frame ab Position i nach Datenpunkt-IDs.
+    Flexibel: Akzeptiert IDs mit ODER ohne 0x00 Prefix.
+
+    Kandidaten-Positionen liefert scan_pattern in einem Durchlauf auf C-Ebene; Positionen
+    dazwischen können keinen Datenpunkt enthalten und werden übersprungen.
+    Mit stop_after/old_skip endet der Scan an der ersten Position hinter stop_after,
+    die auch der vorherige Scan besucht hat (old_skip[pos] == 0).
+    Liefert (endposition, treffer) - treffer als Liste (start, ende, (name, value, unit));
+    übersprungene Datenpunkte ([filter] only) sind Treffer mit None statt Wert.
+    """
+    hits = []
+    n = len(data)
+    end = n - 2
+    for match in scan_pattern.finditer(data, i):
+        pos = match.start()
+        if pos < i:
+            continue  # Liegt in den Bytes eines bereits dekodierten Datenpunkts
+        if pos >= end:
+            break
+        if stop_after is not None:
+            # Synchron mit dem alten Scan auf einer der übersprungenen Positionen bis einschließlich pos?
+            sync = old_skip.find(0, max(i, stop_after + 1), pos + 1)
+            if sync != -1:
+                return sync, hits
+        i = pos
 
-    i = 0
-    while i < len(data) - 2:
         # Variante 1: 3-Byte ID mit 0x00 Prefix (klassisch)
-        if i < len(data) - 3:
-            key_3byte = data[i : i + 3]
-            if key_3byte[0] == 0x00:  # Hat 0x00 Prefix?
-                key_2byte = key_3byte[1:3]  # Extrahiere die echte 2-Byte ID
-
-                if key_2byte in datapoint_map:
-                    dp = datapoint_map[key_2byte]
-                    byte_len = 1 if '8' in dp['type'] else 2
-                    if '32' in dp['type']:
-                        byte_len = 4
-
-                    # ID=0 wird bereits oben per scan_for_outdoor_temp behandelt
-                    if dp['id'] == 0:
-                        i += 1
-                        continue
+        if i < n - 3:
+            dp = datapoint_map.get(data[i + 1 : i + 3])  # Die echte 2-Byte ID nach dem 0x00
 
-                    # Normaler Fall für alle anderen IDs
-                    offset = 3
-                    if i + offset + byte_len <= len(data):
-                        raw_bytes = data[i + offset : i + offset + byte_len]
+            if dp is not None:
+                byte_len = dp['size']
 
-                        if DEBUG_RAW and 'Aussen' in dp['name']:
+                # ID=0 wird bereits oben per scan_for_outdoor_temp behandelt
+                if dp['id'] == 0:
+                    i += 1
+                    continue
+
+                # Normaler Fall für alle anderen IDs
+                offset = 3
+                if dp['skip'] and i + offset + byte_len <= n:
+                    # Uninteressant: nur die Wert-Bytes überspringen (Treffer ohne Wert)
+                    hits.append((i, i + offset + byte_len, None))
+                    i += offset + byte_len
+                    continue
+
+                if i + offset + byte_len <= n:
+                    raw_bytes = data[i + offset : i + offset + byte_len]
+
+                    if raw_bytes == dp['last_raw'] and not DEBUG_RAW:
+                        # Gleiche Rohbytes wie beim letzten Mal: Ergebnis von Dekodierung und Regeln übernehmen,
+                        # publiziert wird nur, falls der Wert seither nicht mehr in last_sent steht
+                        value = dp['last_value']
+                        if value is not None:
+                            frame_cache_stats['memo'] += 1
+                            if last_sent.get(dp['topic']) != value:
+                                handle_output(client, dp['name'], value, dp['unit'])
+                            hits.append((i, i + offset + byte_len, (dp['name'], value, dp['unit'])))
+                            i += offset + byte_len
+                            continue
+                    else:
+                        if DEBUG_RAW and dp['outdoor']:
                             hex_str = raw_bytes.hex()
                             print(f' [RAW] {dp["name"]} @ pos {i} (offset {offset}): 0x{hex_str}')
 
                         value = decode_smart(raw_bytes, dp)
-
                         if value is not None:
-                            if 'Temp' in dp['name'] or 'Aussen' in dp['name']:
-                                # Range Check
-                                if not (-40 <= value <= 70):
-                                    if DEBUG_RAW:
-                                        print(f' [RANGE] {dp["name"]}: {value}°C @ pos {i}')
-                                    i += 1
-                                    continue
-
-                                # Filter 0.0°C für Außentemperatur (häufiger Fehlercode)
-                                if value == 0.0 and 'Aussen' in dp['name']:
-                                    if DEBUG_CONSOLE:
-                                        print(f' [FILTER] 0.0°C bei {dp["name"]} gefiltert (Fehlercode)')
-                                    i += 1
-                                    continue
+                            # Plausibilitätsregeln (Bereich, Fehlercodes, ...) - siehe compile_rules
+                            value = dp['validate'](value)
+                        if dp['memo']:
+                            dp['last_raw'] = raw_bytes
+                            dp['last_value'] = value
 
+                        if value is not None:
                             handle_output(client, dp['name'], value, dp['unit'])
+                            hits.append((i, i + offset + byte_len, (dp['name'], value, dp['unit'])))
                             i += offset + byte_len  # Überspringe verarbeitete Bytes
                             continue
 
         # Variante 2: Direkte 2-Byte ID (neu, für Temperaturen ohne Prefix)
         # NUR für sehr niedrige IDs (0-5) und NUR wenn Position > 0
-        key_2byte = data[i : i + 2]
-        if key_2byte in datapoint_map:
-            dp = datapoint_map[key_2byte]
-
+        dp = datapoint_map.get(data[i : i + 2])
+        if dp is not None:
             # WICHTIG: Nur für IDs 0-5 und NICHT am Frame-Anfang (pos 0)
-            if dp['id'] <= 5 and i > 0:
-                byte_len = 1 if '8' in dp['type'] else 2
-                if '32' in dp['type']:
-                    byte_len = 4
+            if dp['id'] <= 5 and i > 0 and not dp['skip']:
+                byte_len = dp['size']
 
-                if i + 2 + byte_len <= len(data):
+                if i + 2 + byte_len <= n:
                     raw_bytes = data[i + 2 : i + 2 + byte_len]
 
                     # Extra-Check für NOPREFIX: 0x0000 ist auch ein Fehlercode
@@ -432,35 +1576,28 @@ def process_stream(client, data):
                         continue
 
                     value = decode_smart(raw_bytes, dp)
-
                     if value is not None:
-                        # Strengere Prüfung für niedrige IDs ohne Prefix
-                        if 'Temp' in dp['name'] or 'Aussen' in dp['name']:
-                            if not (-40 <= value <= 70):
-                                i += 1
-                                continue
-
-                        # Extra-Validierung: Wert sollte stabil sein
+                        # Für IDs 0-5 enthalten die Regeln zusätzlich die Sprung-Prüfung
                         # (verhindert wilde Sprünge durch False Positives)
-                        prev_val = last_sent.get(dp['name'].replace(' ', '_').lower())
-                        if prev_val is not None:
-                            # Wenn Änderung > 20 Grad, wahrscheinlich False Positive
-                            if abs(value - prev_val) > 20:
-                                i += 1
-                                continue
-                        else:
-                            # Beim ersten Wert: 0.0°C ist sehr verdächtig (oft Fehlercode)
-                            # Nur akzeptieren wenn es der einzige Wert in diesem Frame ist
-                            if value == 0.0 and ('Temp' in dp['name'] or 'Aussen' in dp['name']):
-                                i += 1
-                                continue
+                        value = dp['validate_noprefix'](value)
 
+                    if value is not None:
                         handle_output(client, dp['name'], value, dp['unit'])
+                        hits.append((i, i + 2 + byte_len, (dp['name'], value, dp['unit'])))
                         i += 2 + byte_len
                         continue
 
         i += 1
 
+    # Keine Kandidaten mehr: der Scan läuft bis zum Frame-Ende durch
+    if i < end:
+        if stop_after is not None:
+            sync = old_skip.find(0, max(i, stop_after + 1), end)
+            if sync != -1:
+                return sync, hits
+        i = end
+    return i, hits
+
 
 def publish_homeassistant_discovery(client, clean_name, name, unit):
     """
@@ -527,8 +1664,19 @@ def publish_homeassistant_discovery(client, clean_name, name, unit):
             print(f' [DISCOVERY ERROR] {e}')
 
 
-def handle_output(client, name, value, unit):
-    clean_name = (
+def sync_outputs(client, outputs):
+    """Gibt gemerkte Werte (name, value, unit) aus, die nicht mehr so in last_sent stehen."""
+    for name, value, unit in outputs:
+        if last_sent.get(clean_topic(name)) != value:
+            handle_output(client, name, value, unit)
+
+
+def clean_topic(name):
+    """MQTT-Topic-Name eines Datenpunkts (ohne Leerzeichen, Umlaute und Sonderzeichen), einmal je Name berechnet."""
+    topic = clean_topics.get(name)
+    if topic is not None:
+        return topic
+    topic = clean_topics[name] = (
         name.replace(' ', '_')
         .replace('ä', 'ae')
         .replace('ö', 'oe')
@@ -550,60 +1698,894 @@ def handle_output(client, name, value, unit):
         .replace('+', '')
         .lower()
     )
+    return topic
+
+
+def handle_output(client, name, value, unit):
+    decoded_at = None
+    if trace_histograms:
+        decoded_at = time.perf_counter()
+        histogram_add(trace_histograms['recv_decode'], decoded_at - trace_recv_time)
+
+    clean_name = clean_topic(name)
 
     # Duplikatserkennung: Nur bei Änderung publizieren
     if last_sent.get(clean_name) != value:
         last_sent[clean_name] = value
 
-        if DEBUG_CONSOLE:
-            # Terminal-Ausgabe mit UTF-8
-            try:
-                print(f' [LOG] {name[:30]:30}: {value} {unit}')
-            except UnicodeEncodeError:
-                # Fallback falls Terminal kein UTF-8 unterstützt
-                unit_ascii = unit.encode('ascii', errors='replace').decode('ascii')
-                print(f' [LOG] {name[:30]:30}: {value} {unit_ascii}')
+        if push_wakeup is not None:
+            push_value(clean_name, name, value, unit)
+
+        if value_pipeline_active:
+            enqueue_value(clean_name, name, value, unit, decoded_at)
+        else:
+            publish_output(client, clean_name, name, value, unit, decoded_at)
 
-        if MQTT_ENABLED and client:
-            try:
-                # Home Assistant Auto-Discovery (nur beim ersten Mal)
-                publish_homeassistant_discovery(client, clean_name, name, unit)
 
-                # Publiziere Wert als retained message
-                topic = f'{TOPIC_BASE}/{clean_name}'
+def publish_output(client, clean_name, name, value, unit, decoded_at=None):
+    """Konsolen-Ausgabe, Discovery und MQTT-Publish eines geänderten Werts."""
+    if DEBUG_CONSOLE:
+        # Terminal-Ausgabe mit UTF-8
+        try:
+            print(f' [LOG] {name[:30]:30}: {value} {unit}')
+        except UnicodeEncodeError:
+            # Fallback falls Terminal kein UTF-8 unterstützt
+            unit_ascii = unit.encode('ascii', errors='replace').decode('ascii')
+            print(f' [LOG] {name[:30]:30}: {value} {unit_ascii}')
+
+    if MQTT_ENABLED and client:
+        try:
+            # Home Assistant Auto-Discovery (nur beim ersten Mal)
+            publish_homeassistant_discovery(client, clean_name, name, unit)
+
+            # Publiziere Wert als retained message
+            topic = f'{TOPIC_BASE}/{clean_name}'
+            if MQTT_V5:
+                info = publish_value_v5(client, topic, value, unit)
+            else:
                 payload = json.dumps({'value': value, 'unit': unit})
-                client.publish(topic, payload, retain=True)
-            except:
+                info = client.publish(topic, payload, qos=MQTT_QOS, retain=True)
+            if decoded_at is not None:
+                trace_enqueued(info.mid, decoded_at)
+        except:
+            pass
+
+
+# --- PIPELINE (Reader -> Decoder -> Publisher) ---
+def enqueue_frames(parts, recv_time):
+    """
+    Reader: Frames an den Decoder übergeben, ohne selbst zu dekodieren.
+    Ist die Queue voll, wird der älteste Frame verworfen - aktuelle Werte sind wichtiger
+    als ein vollständiger Rückstand, und recv() wird nie blockiert.
+    """
+    with frame_cond:
+        for part in parts:
+            if len(part) > 4:
+                if len(frame_queue) >= PIPELINE_FRAME_QUEUE:
+                    frame_queue.popleft()
+                    pipeline_stats['frames_dropped'] += 1
+                frame_queue.append((recv_time, part))
+        if len(frame_queue) > pipeline_stats['frames_max']:
+            pipeline_stats['frames_max'] = len(frame_queue)
+        frame_cond.notify()
+
+
+def dispatch_frames(client, parts, recv_time):
+    """Reader: Frames an den Decoder-Thread übergeben bzw. ohne Pipeline direkt dekodieren."""
+    global trace_recv_time
+    if PIPELINE_ENABLED:
+        enqueue_frames(parts, recv_time)
+        return
+    trace_recv_time = recv_time
+    for part in parts:
+        if len(part) > 4:
+            process_stream(client, part)
+
+
+def decoder_thread(client):
+    """Decoder: dekodiert Frames aus frame_queue; geänderte Werte gehen über handle_output an value_queue."""
+    global trace_recv_time
+    while True:
+        check_profiler()
+        apply_pending_reload()
+        with frame_cond:
+            if not frame_queue:
+                if shutdown_requested:
+                    break
+                frame_cond.wait(1)
+                continue
+            batch = list(frame_queue)
+            frame_queue.clear()
+        for recv_time, frame in batch:
+            trace_recv_time = recv_time
+            process_stream(client, frame)
+    stop_profiler()
+
+
+def enqueue_value(clean_name, name, value, unit, decoded_at):
+    """
+    Decoder: geänderten Wert an den Publisher übergeben.
+    Wartet für das Topic noch ein Wert, wird er ersetzt (nur der neueste zählt). Ist die Queue
+    voll, fällt das älteste Topic heraus und wird aus last_sent entfernt. Beim nächsten Frame mit
+    diesem Datenpunkt wird er dadurch erneut ausgegeben, auch wenn sich die Bytes nicht geändert
+    haben: Cache-Treffer und übernommene Treffer gleichen über sync_outputs, das Rohbytes-Memo in
+    scan_datapoints direkt gegen last_sent ab.
+    """
+    with value_cond:
+        if clean_name in value_queue:
+            pipeline_stats['values_coalesced'] += 1
+        elif len(value_queue) >= PIPELINE_VALUE_QUEUE:
+            dropped, _ = value_queue.popitem(last=False)
+            last_sent.pop(dropped, None)
+            pipeline_stats['values_dropped'] += 1
+        value_queue[clean_name] = (name, value, unit, decoded_at)
+        if len(value_queue) > pipeline_stats['values_max']:
+            pipeline_stats['values_max'] = len(value_queue)
+        value_cond.notify()
+
+
+def publisher_thread(client):
+    """Publisher: Konsolen-Ausgabe, Discovery und MQTT-Publish, entkoppelt vom Lesen und Dekodieren."""
+    while True:
+        with value_cond:
+            while not value_queue:
+                if pipeline_closing:
+                    return
+                value_cond.wait(1)
+            clean_name, (name, value, unit, decoded_at) = value_queue.popitem(last=False)
+        publish_output(client, clean_name, name, value, unit, decoded_at)
+
+
+def stop_pipeline(decoder, publisher):
+    """Beim Beenden: Decoder und Publisher ihre Queues abarbeiten lassen."""
+    global pipeline_closing
+    with frame_cond:
+        frame_cond.notify()
+    decoder.join(5)
+    with value_cond:
+        pipeline_closing = True
+        value_cond.notify()
+    publisher.join(5)
+
+
+def log_pipeline_stats():
+    """Gibt Queue-Tiefen und Überlauf-Zähler der Pipeline aus."""
+    print(
+        f'[PIPELINE] Frames: {len(frame_queue)}/{PIPELINE_FRAME_QUEUE} (max {pipeline_stats["frames_max"]}, '
+        f'{pipeline_stats["frames_dropped"]} verworfen), Werte: {len(value_queue)}/{PIPELINE_VALUE_QUEUE} '
+        f'(max {pipeline_stats["values_max"]}, {pipeline_stats["values_coalesced"]} zusammengefasst, '
+        f'{pipeline_stats["values_dropped"]} verworfen)'
+    )
+
+
+# --- LATENZMESSUNG ---
+def new_histogram():
+    """Histogramm mit festen Buckets (TRACE_BUCKETS_MS, letzter Bucket = darüber)."""
+    return {'counts': [0] * (len(TRACE_BUCKETS_MS) + 1), 'count': 0, 'sum': 0.0, 'max': 0.0}
+
+
+def histogram_add(hist, seconds):
+    ms = seconds * 1000
+    hist['counts'][bisect_left(TRACE_BUCKETS_MS, ms)] += 1
+    hist['count'] += 1
+    hist['sum'] += ms
+    if ms > hist['max']:
+        hist['max'] = ms
+
+
+def histogram_percentile(hist, q):
+    """Obergrenze des Buckets, in dem das q-Quantil liegt (ms)."""
+    target = q * hist['count']
+    seen = 0
+    for limit, count in zip(TRACE_BUCKETS_MS, hist['counts']):
+        seen += count
+        if seen >= target:
+            return limit
+    return hist['max']
+
+
+def trace_start():
+    """Aktiviert die Latenzmessung: recv->Dekodierung, Dekodierung->publish(), publish()->on_publish."""
+    for name in ('recv_decode', 'decode_enqueue', 'enqueue_ack'):
+        trace_histograms[name] = new_histogram()
+
+
+def trace_enqueued(mid, decoded_at):
+    """Nach client.publish(): Zeit seit der Dekodierung erfassen und auf on_publish warten."""
+    global trace_lost
+    enqueued_at = time.perf_counter()
+    histogram_add(trace_histograms['decode_enqueue'], enqueued_at - decoded_at)
+    with trace_lock:
+        acked_at = trace_early_acks.pop(mid, None)
+        if acked_at is not None:
+            histogram_add(trace_histograms['enqueue_ack'], max(acked_at - enqueued_at, 0.0))
+            return
+        trace_pending[mid] = enqueued_at
+        if len(trace_pending) > TRACE_MAX_PENDING:
+            trace_pending.popitem(last=False)
+            trace_lost += 1
+
+
+def trace_on_publish(client, userdata, mid, *args):
+    """
+    paho on_publish: bei QoS 0 nach dem Schreiben in den Socket, bei QoS 1 nach PUBACK,
+    bei QoS 2 nach PUBCOMP. Läuft im paho-Thread, evtl. noch bevor publish() zurückkehrt.
+    """
+    acked_at = time.perf_counter()
+    with trace_lock:
+        enqueued_at = trace_pending.pop(mid, None)
+        if enqueued_at is None:
+            trace_early_acks[mid] = acked_at
+            if len(trace_early_acks) > TRACE_MAX_PENDING:
+                trace_early_acks.clear()
+            return
+        histogram_add(trace_histograms['enqueue_ack'], acked_at - enqueued_at)
+
+
+def trace_disconnected():
+    """Offene Nachrichten einer abgebrochenen Broker-Verbindung werden nicht mehr bestätigt."""
+    global trace_lost
+    with trace_lock:
+        trace_lost += len(trace_pending)
+        trace_pending.clear()
+        trace_early_acks.clear()
+
+
+def log_trace_stats():
+    """Gibt die Latenz-Histogramme als Zusammenfassung aus (ms)."""
+    labels = {
+        'recv_decode': 'recv -> Dekodierung',
+        'decode_enqueue': 'Dekodierung -> publish()',
+        'enqueue_ack': 'publish() -> Bestätigung',
+    }
+    for name, hist in trace_histograms.items():
+        count = hist['count']
+        if not count:
+            print(f'[LATENZ] {labels[name]:26}: keine Werte')
+            continue
+        print(
+            f'[LATENZ] {labels[name]:26}: n={count} mittel={hist["sum"] / count:.2f} '
+            f'p50<={histogram_percentile(hist, 0.5)} p95<={histogram_percentile(hist, 0.95)} '
+            f'p99<={histogram_percentile(hist, 0.99)} max={hist["max"]:.2f} ms'
+        )
+    if trace_pending or trace_lost:
+        print(f'[LATENZ] {len(trace_pending)} unbestätigt, {trace_lost} verloren')
+
+
+def reset_topic_aliases(alias_max=0):
+    """
+    MQTT v5: Topic-Aliase gelten nur für eine Broker-Verbindung.
+    Bei jedem (Re-)Connect neu beginnen, beim Verbindungsverlust bis zum CONNACK deaktivieren.
+    """
+    global mqtt_alias_max
+    with mqtt_alias_lock:
+        mqtt_aliases.clear()
+        mqtt_alias_max = alias_max
+
+
+def publish_value_v5(client, topic, value, unit):
+    """
+    Publiziert einen Wert per MQTT v5.
+
+    Das lange Topic wird nur beim ersten Mal übertragen und dabei einem Topic-Alias zugeordnet,
+    danach genügt der Alias (2 Byte). Die Einheit steht als User-Property statt im JSON,
+    und der Wert läuft nach MQTT_MESSAGE_EXPIRY Sekunden ab (auch als retained message).
+    """
+    from paho.mqtt.packettypes import PacketTypes
+    from paho.mqtt.properties import Properties
+
+    properties = Properties(PacketTypes.PUBLISH)
+    if MQTT_MESSAGE_EXPIRY > 0:
+        properties.MessageExpiryInterval = MQTT_MESSAGE_EXPIRY
+    if unit:
+        properties.UserProperty = ('unit', unit)
+
+    with mqtt_alias_lock:
+        alias = mqtt_aliases.get(topic)
+        if alias is not None:
+            # Topic ist dem Broker bereits bekannt
+            properties.TopicAlias = alias
+            topic = ''
+        elif len(mqtt_aliases) < mqtt_alias_max:
+            # Neuen Alias vergeben, Topic wird dieses eine Mal mitgeschickt
+            alias = mqtt_aliases[topic] = len(mqtt_aliases) + 1
+            properties.TopicAlias = alias
+        return client.publish(topic, json.dumps({'value': value}), qos=MQTT_QOS, retain=True, properties=properties)
+
+
+def reconnect_delay(attempt):
+    """
+    Wartezeit vor Verbindungsversuch Nr. attempt (0 = sofort).
+
+    Danach exponentielles Backoff ab BACKOFF_INITIAL bis BACKOFF_MAX, mit Jitter (50-100%),
+    damit nach einem Gateway-Neustart nicht alle Clients gleichzeitig anklopfen.
+    """
+    if attempt <= 0:
+        return 0.0
+    delay = min(BACKOFF_MAX, BACKOFF_INITIAL * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def configure_keepalive(sock):
+    """
+    Aktiviert TCP-Keepalive, damit halboffene Verbindungen (z.B. Gateway-Neustart)
+    nach wenigen Sekunden erkannt werden statt erst durch den Watchdog.
+    Die TCP_*-Optionen gibt es nur unter Linux; andernorts bleibt es bei SO_KEEPALIVE.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ('TCP_KEEPIDLE', KEEPALIVE_IDLE),
+        ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+        ('TCP_KEEPCNT', KEEPALIVE_COUNT),
+        ('TCP_USER_TIMEOUT', USER_TIMEOUT * 1000),
+    ):
+        if hasattr(socket, option) and value > 0:
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+def record_recovery(lost_at, attempts):
+    """Erfasst die Zeit vom Verbindungsverlust bis zu den ersten Daten nach dem Reconnect."""
+    duration = time.monotonic() - lost_at
+    reconnect_stats['count'] += 1
+    reconnect_stats['last'] = duration
+    reconnect_stats['max'] = max(reconnect_stats['max'], duration)
+    print(
+        f'[RECONNECT] Daten wieder da nach {duration:.1f}s ({attempts} Versuch(e), max. bisher {reconnect_stats["max"]:.1f}s)'
+    )
+
+
+def fanout_broadcast(data):
+    """
+    Reicht empfangene Rohdaten an alle Fan-out-Clients weiter.
+
+    Hängt die Daten nur an die Puffer an (kein Socket-I/O im Reader); das Senden
+    übernimmt fanout_thread. Ein Client, dessen Puffer FANOUT_BUFFER überschreiten
+    würde, wird als zu langsam markiert und vom Fan-out-Thread getrennt.
+    """
+    if not fanout_clients:
+        return
+    with fanout_lock:
+        for conn, buffer in fanout_clients.items():
+            if buffer is None:
+                continue
+            if len(buffer) + len(data) > FANOUT_BUFFER:
+                fanout_clients[conn] = None
+            else:
+                buffer += data
+    try:
+        fanout_wakeup[1].send(b'\x00')
+    except OSError:
+        pass
+
+
+def fanout_drop(sel, conn, reason):
+    """Trennt einen Fan-out-Client."""
+    with fanout_lock:
+        fanout_clients.pop(conn, None)
+        remaining = len(fanout_clients)
+    try:
+        sel.unregister(conn)
+    except (KeyError, ValueError):
+        pass
+    try:
+        peer = conn.getpeername()
+    except OSError:
+        peer = '?'
+    conn.close()
+    print(f'[FANOUT] Client {peer} getrennt ({reason}), {remaining} aktiv')
+
+
+def fanout_thread():
+    """
+    Fan-out-Thread: Lokaler TCP-Server, der den Rohdaten-Stream des Gateways an
+    beliebig viele Clients (HA-Integration, debug_dump.py, ...) weiterreicht.
+
+    Die einzige Verbindung zum Gateway bleibt die des Bridges; Clients verbinden sich
+    mit FANOUT_LISTEN:FANOUT_PORT und erhalten exakt die Bytes von Port 3113.
+    Alle Client-Sockets sind non-blocking und werden über einen Selector bedient.
+    """
+    global fanout_wakeup
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        server.bind((FANOUT_LISTEN, FANOUT_PORT))
+    except OSError as e:
+        print(f'[FANOUT] FEHLER: Port {FANOUT_PORT} nicht verfügbar ({e})')
+        server.close()
+        return
+    server.listen()
+    server.setblocking(False)
+
+    fanout_wakeup = socket.socketpair()
+    for sock in fanout_wakeup:
+        sock.setblocking(False)
+
+    sel = selectors.DefaultSelector()
+    sel.register(server, selectors.EVENT_READ)
+    sel.register(fanout_wakeup[0], selectors.EVENT_READ)
+    print(f'[FANOUT] Lausche auf {FANOUT_LISTEN}:{FANOUT_PORT}')
+
+    while not shutdown_requested:
+        for key, events in sel.select(timeout=1):
+            sock = key.fileobj
+            if sock is server:
+                try:
+                    conn, addr = server.accept()
+                except OSError:
+                    continue
+                if len(fanout_clients) >= FANOUT_MAX_CLIENTS:
+                    print(f'[FANOUT] Client {addr} abgelehnt (max. {FANOUT_MAX_CLIENTS})')
+                    conn.close()
+                    continue
+                conn.setblocking(False)
+                with fanout_lock:
+                    fanout_clients[conn] = bytearray()
+                sel.register(conn, selectors.EVENT_READ)
+                print(f'[FANOUT] Client {addr} verbunden, {len(fanout_clients)} aktiv')
+            elif sock is fanout_wakeup[0]:
+                try:
+                    while sock.recv(4096):
+                        pass
+                except (BlockingIOError, OSError):
+                    pass
+            elif events & selectors.EVENT_READ:
+                # Clients senden nichts - lesbar heißt getrennt (oder Daten werden verworfen)
+                try:
+                    if not sock.recv(4096):
+                        fanout_drop(sel, sock, 'geschlossen')
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except OSError:
+                    fanout_drop(sel, sock, 'Fehler')
+
+        # Ausstehende Daten senden, zu langsame Clients trennen
+        with fanout_lock:
+            pending = list(fanout_clients.items())
+        for conn, buffer in pending:
+            if buffer is None:
+                fanout_drop(sel, conn, f'zu langsam, Puffer > {FANOUT_BUFFER} Bytes')
+                continue
+            if not buffer:
+                if sel.get_key(conn).events & selectors.EVENT_WRITE:
+                    sel.modify(conn, selectors.EVENT_READ)
+                continue
+            try:
+                with fanout_lock:
+                    sent = conn.send(buffer)
+                    del buffer[:sent]
+                    pending_bytes = len(buffer)
+            except (BlockingIOError, InterruptedError):
+                pending_bytes = len(buffer)
+            except OSError:
+                fanout_drop(sel, conn, 'Fehler')
+                continue
+            # Auf Schreibbarkeit warten, solange noch Daten ausstehen
+            sel.modify(conn, selectors.EVENT_READ | selectors.EVENT_WRITE if pending_bytes else selectors.EVENT_READ)
+
+    for conn in list(fanout_clients):
+        conn.close()
+    server.close()
+
+
+# --- PUSH-API (Server-Sent Events) ---
+def push_value(clean_name, name, value, unit):
+    """
+    Decoder: geänderten Wert an alle Push-Clients verteilen (ohne Socket-I/O, das macht push_thread).
+
+    Jeder Client hat eine Queue mit einem Eintrag pro Topic; ein noch nicht gesendeter Wert
+    wird durch den neueren ersetzt. Läuft die Queue eines langsamen Clients dennoch über,
+    wird sie verworfen und der Client erhält beim nächsten Senden einen vollständigen Snapshot.
+    """
+    event = (name, value, unit)
+    with push_lock:
+        push_snapshot[clean_name] = event
+        if not push_clients:
+            return
+        for client in push_clients.values():
+            if not client['stream'] or client['resync']:
+                continue
+            pending = client['pending']
+            if clean_name not in pending and len(pending) >= PUSH_QUEUE:
+                pending.clear()
+                client['resync'] = True
+            else:
+                pending[clean_name] = event
+    try:
+        push_wakeup[1].send(b'\x00')
+    except OSError:
+        pass
+
+
+def push_event(kind, payload):
+    """Ein SSE-Ereignis als Bytes."""
+    return f'event: {kind}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n'.encode()
+
+
+def push_snapshot_payload():
+    """Alle aktuellen Werte als dict Topic -> {name, value, unit} (Aufrufer hält push_lock)."""
+    return {topic: {'name': name, 'value': value, 'unit': unit} for topic, (name, value, unit) in push_snapshot.items()}
+
+
+def push_request(sel, conn, client):
+    """Wertet den HTTP-Request eines Clients aus: /events startet den Stream, /snapshot liefert JSON."""
+    request = bytes(client['request'])
+    if b'\r\n\r\n' not in request:
+        if len(request) > PUSH_MAX_REQUEST:
+            push_drop(sel, conn, 'Request zu groß')
+        return
+    path = request.split(b' ', 2)[1].split(b'?')[0] if request.count(b' ') >= 2 else b''
+    client['request'] = None
+
+    if path == b'/events':
+        with push_lock:
+            client['out'] += (
+                b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n'
+                b'Cache-Control: no-cache\r\nConnection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\n'
+            )
+            client['out'] += push_event('snapshot', push_snapshot_payload())
+            client['stream'] = True
+        return
+
+    if path == b'/snapshot':
+        with push_lock:
+            body = json.dumps(push_snapshot_payload(), ensure_ascii=False).encode('utf-8')
+        status, content_type = b'200 OK', b'application/json; charset=utf-8'
+    else:
+        body = b'Nicht gefunden - /events (SSE) oder /snapshot (JSON)\n'
+        status, content_type = b'404 Not Found', b'text/plain; charset=utf-8'
+    client['out'] += (
+        b'HTTP/1.1 '
+        + status
+        + b'\r\nContent-Type: '
+        + content_type
+        + b'\r\nContent-Length: '
+        + str(len(body)).encode()
+        + b'\r\nConnection: close\r\nAccess-Control-Allow-Origin: *\r\n\r\n'
+        + body
+    )
+    client['close'] = True
+
+
+def push_drop(sel, conn, reason):
+    """Trennt einen Push-Client."""
+    with push_lock:
+        client = push_clients.pop(conn, None)
+        remaining = len(push_clients)
+    try:
+        sel.unregister(conn)
+    except (KeyError, ValueError):
+        pass
+    conn.close()
+    if client and client['stream']:
+        print(f'[PUSH] Client {client["peer"]} getrennt ({reason}), {remaining} aktiv')
+
+
+def push_thread():
+    """
+    Push-Thread: Lokaler HTTP-Server mit Server-Sent Events für Dashboards und Wandpanels.
+
+    GET /events liefert beim Verbinden einen Snapshot aller Werte und danach jeden geänderten
+    Wert direkt aus dem Decoder - ohne Umweg über den MQTT-Broker. GET /snapshot liefert die
+    aktuellen Werte einmalig als JSON. Aufbau wie fanout_thread: non-blocking Sockets, ein
+    Selector, Aufwecken über ein Socketpair. Neue Werte werden erst serialisiert, wenn der
+    Sendepuffer des Clients leer ist; bis dahin werden sie pro Topic zusammengefasst.
+    """
+    global push_wakeup
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        server.bind((PUSH_LISTEN, PUSH_PORT))
+    except OSError as e:
+        print(f'[PUSH] FEHLER: Port {PUSH_PORT} nicht verfügbar ({e})')
+        server.close()
+        return
+    server.listen()
+    server.setblocking(False)
+
+    wakeup = socket.socketpair()
+    for sock in wakeup:
+        sock.setblocking(False)
+
+    sel = selectors.DefaultSelector()
+    sel.register(server, selectors.EVENT_READ)
+    sel.register(wakeup[0], selectors.EVENT_READ)
+    push_wakeup = wakeup
+    print(f'[PUSH] Lausche auf http://{PUSH_LISTEN}:{PUSH_PORT}/events')
+
+    while not shutdown_requested:
+        for key, events in sel.select(timeout=1):
+            sock = key.fileobj
+            if sock is server:
+                try:
+                    conn, addr = server.accept()
+                except OSError:
+                    continue
+                if len(push_clients) >= PUSH_MAX_CLIENTS:
+                    conn.close()
+                    continue
+                conn.setblocking(False)
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                client = {
+                    'peer': addr,  # Bei accept() gemerkt: getpeername() scheitert nach einem Reset
+                    'request': bytearray(),
+                    'stream': False,
+                    'pending': OrderedDict(),
+                    'resync': False,
+                    'out': bytearray(),
+                    'close': False,
+                    'last_send': time.monotonic(),
+                }
+                with push_lock:
+                    push_clients[conn] = client
+                sel.register(conn, selectors.EVENT_READ)
+            elif sock is wakeup[0]:
+                try:
+                    while sock.recv(4096):
+                        pass
+                except (BlockingIOError, OSError):
+                    pass
+            elif events & selectors.EVENT_READ:
+                client = push_clients.get(sock)
+                try:
+                    data = sock.recv(4096)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    push_drop(sel, sock, 'Fehler')
+                    continue
+                if not data:
+                    push_drop(sel, sock, 'geschlossen')
+                elif client is not None and client['request'] is not None:
+                    client['request'] += data
+                    push_request(sel, sock, client)
+                    if client['stream']:
+                        print(f'[PUSH] Client {client["peer"]} verbunden, {len(push_clients)} aktiv')
+
+        # Ausstehende Werte serialisieren und senden
+        now = time.monotonic()
+        with push_lock:
+            clients = list(push_clients.items())
+        for conn, client in clients:
+            out = client['out']
+            if client['stream'] and not out:
+                with push_lock:
+                    if client['resync']:
+                        client['resync'] = False
+                        out += push_event('snapshot', push_snapshot_payload())
+                    pending = client['pending']
+                    while pending:
+                        topic, (name, value, unit) = pending.popitem(last=False)
+                        out += push_event('value', {'topic': topic, 'name': name, 'value': value, 'unit': unit})
+                if not out and now - client['last_send'] >= PUSH_KEEPALIVE:
+                    out += b': keepalive\n\n'
+            if out:
+                try:
+                    sent = conn.send(out)
+                    del out[:sent]
+                    client['last_send'] = now
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except OSError:
+                    push_drop(sel, conn, 'Fehler')
+                    continue
+            if client['close'] and not out:
+                push_drop(sel, conn, 'fertig')
+                continue
+            try:
+                sel.modify(conn, selectors.EVENT_READ | selectors.EVENT_WRITE if out else selectors.EVENT_READ)
+            except (KeyError, ValueError):
                 pass
 
+    push_wakeup = None
+    for conn in list(push_clients):
+        conn.close()
+    server.close()
+
+
+def sd_notify(message):
+    """
+    Sendet eine Statusmeldung an systemd (sd_notify-Protokoll, ohne externe Abhängigkeit).
+    Ohne NOTIFY_SOCKET (z.B. manueller Start) passiert nichts.
+    """
+    address = os.environ.get('NOTIFY_SOCKET')
+    if not address:
+        return False
+    if address[0] == '@':
+        address = '\0' + address[1:]  # Abstract Namespace
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(message.encode('utf-8'))
+        return True
+    except OSError:
+        return False
+
+
+def systemd_status(fps):
+    """STATUS-Text für systemctl status: Frame-Rate, Alter des letzten Werts, Dauer des letzten Reconnects."""
+    now = time.monotonic()
+    if fps:
+        status = f'STATUS={fps:.1f} Frames/s'
+    elif current_socket is None:
+        status = 'STATUS=Keine Daten, nicht verbunden'
+    else:
+        status = f'STATUS=Keine Daten seit {now - last_data_time:.0f}s'
+    if not last_value_time:
+        status += ', noch kein Wert'
+    else:
+        status += f', letzter Wert vor {now - last_value_time:.1f}s'
+    if reconnect_stats['count']:
+        status += f', letzter Reconnect {reconnect_stats["last"]:.1f}s'
+    if watchdog_stats['stalls']:
+        status += f', letzter Stillstand {watchdog_stats["last"]:.1f}s'
+    return status
+
+
+def service_problem(now, limit):
+    """Grund, warum der Dienst hängt (Hauptschleife seit limit Sekunden still, Thread beendet), sonst None."""
+    if now - main_loop_time >= limit:
+        return f'Hauptschleife hängt seit {now - main_loop_time:.0f}s'
+    for thread in service_threads:
+        if not thread.is_alive():
+            return f'Thread {thread.name} beendet'
+    return None
+
+
+def systemd_thread():
+    """
+    systemd-Thread (Type=notify): Meldet STATUS und sendet WATCHDOG=1 Keep-Alives.
+
+    Das Keep-Alive zeigt, dass der Prozess arbeitet: Die Hauptschleife lief innerhalb des
+    systemd-Watchdog-Intervalls (WatchdogSec) und alle service_threads leben. Ob Daten
+    ankommen, spielt dafür keine Rolle - fehlende Daten stehen im STATUS, den Reconnect
+    übernimmt der eigene Watchdog ([watchdog]). Hängt der Prozess, startet systemd ihn neu.
+    """
+    watchdog_usec = int(os.environ.get('WATCHDOG_USEC', '0') or 0)
+    watchdog_sec = watchdog_usec / 1_000_000
+    interval = watchdog_sec / 2 if watchdog_sec else 10
+
+    last_frames = frames_total
+    last_check = time.monotonic()
+    reported = None
+    while not shutdown_requested:
+        time.sleep(interval)
+        now = time.monotonic()
+        frames = frames_total
+        fps = (frames - last_frames) / (now - last_check)
+        last_frames, last_check = frames, now
+
+        message = systemd_status(fps)
+        problem = service_problem(now, watchdog_sec) if watchdog_sec else None
+        if problem:
+            message += f', {problem}'
+            if problem != reported:
+                print(f'[SYSTEMD] {problem} - kein WATCHDOG=1 mehr')
+        elif watchdog_sec and systemd_ready:
+            message = 'WATCHDOG=1\n' + message
+        reported = problem
+        sd_notify(message)
+
+
+def watchdog_learn(gap):
+    """
+    Nimmt den Abstand zwischen zwei recv() mit Daten in den gelernten Datentakt auf.
+
+    Mittel und Varianz als exponentiell gewichtete Mittel (WATCHDOG_ALPHA): konstanter Aufwand
+    pro Abstand, und der Takt folgt langsamen Änderungen (z.B. anderes Gateway-Intervall).
+    Abstände über WATCHDOG_TIMEOUT (Ausreißer, Reconnects) werden begrenzt.
+
+    Sendet das Gateway in Bursts, bestehen fast alle Abstände aus den kurzen recv()-Abständen
+    innerhalb eines Bursts; Mittel und Streuung fallen dann weit unter die Pause zwischen den
+    Bursts. Daher wird zusätzlich der größte Abstand je Fenster von WATCHDOG_LEARN Abständen
+    gemerkt (laufendes und voriges Fenster), siehe watchdog_timeout.
+    """
+    gap = min(gap, WATCHDOG_TIMEOUT)
+    state = watchdog_gap
+    if not state['count']:
+        state['mean'] = gap
+    diff = gap - state['mean']
+    increment = WATCHDOG_ALPHA * diff
+    state['mean'] += increment
+    state['var'] = (1 - WATCHDOG_ALPHA) * (state['var'] + diff * increment)
+    state['count'] += 1
+    state['peak'] = max(state['peak'], gap)
+    if state['count'] % WATCHDOG_LEARN == 0:
+        state['prev_peak'], state['peak'] = state['peak'], 0.0
+    if state['count'] == WATCHDOG_LEARN and WATCHDOG_ADAPTIVE:
+        print(
+            f'[WATCHDOG] Datentakt gelernt: {state["mean"]:.2f}s ± {state["var"] ** 0.5:.2f}s, '
+            f'max. {state["prev_peak"]:.2f}s -> Timeout {watchdog_timeout():.1f}s'
+        )
+        # Der Thread wartet noch auf die Frist mit WATCHDOG_TIMEOUT
+        watchdog_wakeup.set()
+
+
+def watchdog_timeout():
+    """
+    Aktueller Timeout: WATCHDOG_TIMEOUT, oder adaptiv Mittel + WATCHDOG_SIGMA * Streuung des Datentakts,
+    mindestens WATCHDOG_GAP_FACTOR * größter Abstand der letzten Fenster (Pausen zwischen Bursts).
+    """
+    state = watchdog_gap
+    if not WATCHDOG_ADAPTIVE or state['count'] < WATCHDOG_LEARN:
+        return WATCHDOG_TIMEOUT
+    timeout = state['mean'] + WATCHDOG_SIGMA * state['var'] ** 0.5
+    timeout = max(timeout, WATCHDOG_GAP_FACTOR * max(state['peak'], state['prev_peak']), WATCHDOG_MIN_TIMEOUT)
+    return min(timeout, WATCHDOG_TIMEOUT)
+
+
+def record_stall_recovery(now):
+    """Erfasst die Zeit vom Beginn eines Stillstands (letzte Daten) bis zu den ersten Daten danach."""
+    global watchdog_stalled_since
+    duration = now - watchdog_stalled_since
+    watchdog_stalled_since = None
+    watchdog_stats['stalls'] += 1
+    watchdog_stats['last'] = duration
+    watchdog_stats['max'] = max(watchdog_stats['max'], duration)
+    print(
+        f'[WATCHDOG] Stillstand behoben: Daten wieder nach {duration:.1f}s '
+        f'(erkannt nach {watchdog_stats["detect"]:.1f}s, max. bisher {watchdog_stats["max"]:.1f}s)'
+    )
+
 
 def watchdog_thread():
     """
-    Watchdog-Thread: Prüft regelmäßig ob neue Daten empfangen wurden.
-    Triggert einen Reconnect wenn keine Daten innerhalb von WATCHDOG_TIMEOUT Sekunden ankommen.
+    Watchdog-Thread: Triggert einen Reconnect, wenn bis zur Frist keine Daten ankommen.
+
+    Statt in festen Intervallen zu prüfen, schläft der Thread genau bis zur Frist
+    (letzte Daten + watchdog_timeout()). Kamen inzwischen Daten, wird die neue Frist
+    berechnet; ändert sich der Timeout (Takt gelernt, Reload), weckt watchdog_wakeup
+    den Thread vorher. Nach einer Auslösung beginnt die Frist neu, damit während
+    Backoff und Verbindungsaufbau nicht ständig erneut ausgelöst wird.
     """
-    global last_data_time, current_socket
+    global watchdog_stalled_since
+    armed_at = 0.0  # Zeitpunkt der letzten Auslösung
     while not shutdown_requested:
-        time.sleep(10)  # Prüfe alle 10 Sekunden
+        timeout = watchdog_timeout()
+        remaining = max(last_data_time, armed_at) + timeout - time.monotonic()
+        if remaining > 0:
+            watchdog_wakeup.wait(remaining)
+            watchdog_wakeup.clear()
+            continue
+
+        now = time.monotonic()
+        armed_at = now
         if not WATCHDOG_ENABLED:
             continue
+        elapsed = now - last_data_time
+        print(f'[WATCHDOG] Keine Daten seit {elapsed:.1f}s (Timeout {timeout:.1f}s) - erzwinge Reconnect...')
+        if watchdog_stalled_since is None:
+            watchdog_stalled_since = last_data_time
+            watchdog_stats['detect'] = elapsed
+        watchdog_triggered.set()
+        # Socket sofort schließen um blockierenden recv() zu unterbrechen
+        with socket_lock:
+            if current_socket:
+                try:
+                    current_socket.shutdown(socket.SHUT_RDWR)
+                    current_socket.close()
+                except:
+                    pass
 
-        elapsed = time.time() - last_data_time
-        if elapsed > WATCHDOG_TIMEOUT:
-            print(f'[WATCHDOG] Keine Daten seit {int(elapsed)}s - erzwinge Reconnect...')
-            watchdog_triggered.set()
-            # Socket sofort schließen um blockierenden recv() zu unterbrechen
-            with socket_lock:
-                if current_socket:
-                    try:
-                        current_socket.shutdown(socket.SHUT_RDWR)
-                        current_socket.close()
-                    except:
-                        pass
 
+def main(config_path=None):
+    global last_data_time, current_socket, mqtt_client, systemd_ready, config_file
+    global value_pipeline_active, main_loop_time
+
+    # Unbuffered output für systemd logging
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.stderr.reconfigure(line_buffering=True)
+
+    config_file = config_path
+    try:
+        apply_config(load_config(config_path))
+    except FileNotFoundError as e:
+        print(f'FEHLER: {e} nicht gefunden!')
+        print('Bitte config.ini erstellen (siehe config.ini.example)')
+        sys.exit(1)
 
-def main():
-    global last_data_time, current_socket
+    install_signal_handlers()
 
     if not load_csv():
         return
@@ -612,17 +2594,45 @@ def main():
     if WATCHDOG_ENABLED:
         watchdog = threading.Thread(target=watchdog_thread, daemon=True)
         watchdog.start()
-        print(f'Watchdog aktiviert (Timeout: {WATCHDOG_TIMEOUT}s)')
+        service_threads.append(watchdog)
+        mode = f', adaptiv ab {WATCHDOG_MIN_TIMEOUT:g}s' if WATCHDOG_ADAPTIVE else ''
+        print(f'Watchdog aktiviert (Timeout: {WATCHDOG_TIMEOUT}s{mode})')
+
+    # Starte systemd-Statusmeldungen (nur unter systemd mit Type=notify)
+    if os.environ.get('NOTIFY_SOCKET'):
+        threading.Thread(target=systemd_thread, daemon=True).start()
+
+    # Starte Fan-out-Proxy
+    if FANOUT_ENABLED:
+        fanout = threading.Thread(target=fanout_thread, daemon=True)
+        fanout.start()
+        service_threads.append(fanout)
+
+    # Starte Push-API (Server-Sent Events)
+    if PUSH_ENABLED:
+        push = threading.Thread(target=push_thread, daemon=True)
+        push.start()
+        service_threads.append(push)
 
     client = None
     if MQTT_ENABLED:
         try:
-            client = mqtt.Client()
+            # paho erst hier laden, ohne MQTT wird es nicht gebraucht
+            import paho.mqtt.client as mqtt
 
-            # MQTT Callbacks für Fehler-Logging
-            def on_connect(client, userdata, flags, rc):
+            client = mqtt.Client(protocol=mqtt.MQTTv5 if MQTT_V5 else mqtt.MQTTv311)
+
+            # MQTT Callbacks für Fehler-Logging (properties gibt es nur bei MQTT v5)
+            def on_connect(client, userdata, flags, rc, properties=None):
                 if rc == 0:
-                    print(f'MQTT verbunden ({MQTT_IP}).')
+                    if MQTT_V5:
+                        alias_max = getattr(properties, 'TopicAliasMaximum', 0)
+                        reset_topic_aliases(alias_max)
+                        print(f'MQTT v5 verbunden ({MQTT_IP}), Topic-Aliase: {alias_max}.')
+                    else:
+                        print(f'MQTT verbunden ({MQTT_IP}).')
+                elif MQTT_V5:
+                    print(f'MQTT FEHLER: {rc}')
                 else:
                     error_messages = {
                         1: 'Falsche Protokollversion',
@@ -634,12 +2644,18 @@ def main():
                     error_msg = error_messages.get(rc, f'Unbekannter Fehler (Code: {rc})')
                     print(f'MQTT FEHLER: {error_msg}')
 
-            def on_disconnect(client, userdata, rc):
+            def on_disconnect(client, userdata, rc, properties=None):
+                if MQTT_V5:
+                    reset_topic_aliases()
+                if trace_histograms:
+                    trace_disconnected()
                 if rc != 0:
                     print(f'MQTT Verbindung verloren (Code: {rc}). Versuche Reconnect...')
 
             client.on_connect = on_connect
             client.on_disconnect = on_disconnect
+            if TRACE_ENABLED:
+                client.on_publish = trace_on_publish
 
             # Authentifizierung setzen, falls konfiguriert
             if MQTT_USERNAME and MQTT_PASSWORD:
@@ -648,17 +2664,55 @@ def main():
 
             client.connect(MQTT_IP, MQTT_PORT, 60)
             client.loop_start()
+            mqtt_client = client
         except Exception as e:
             print(f'MQTT nicht erreichbar -> Nur Konsolen-Ausgabe. ({e})')
 
+    if TRACE_ENABLED:
+        trace_start()
+        print(f'Latenzmessung aktiviert (Bericht alle {TRACE_INTERVAL}s)')
+
+    if CENSUS_ENABLED:
+        census_start()
+        print(f'ID-Zählung aktiviert (Bericht alle {CENSUS_INTERVAL}s)')
+
+    decoder = publisher = None
+    if PIPELINE_ENABLED:
+        decoder = threading.Thread(target=decoder_thread, args=(client,), daemon=True)
+        publisher = threading.Thread(target=publisher_thread, args=(client,), daemon=True)
+        value_pipeline_active = True
+        decoder.start()
+        publisher.start()
+        service_threads.extend((decoder, publisher))
+        print(f'Pipeline aktiv (Frame-Queue {PIPELINE_FRAME_QUEUE}, Wert-Queue {PIPELINE_VALUE_QUEUE})')
+
+    # systemd: bereit, sobald Konfiguration, MQTT und Threads stehen - nicht erst mit dem ersten
+    # Frame, sonst bricht TimeoutStartSec den Start ab, solange das Gateway nicht erreichbar ist
+    systemd_ready = True
+    sd_notify(f'READY=1\nSTATUS=Gestartet, verbinde mit {HOVAL_IP}')
+
     print('Starte Hoval Universal Listener...')
+    last_stats_time = time.monotonic()
+    last_census_time = last_trace_time = last_pipeline_time = last_check_time = last_stats_time
+    attempt = 0  # Verbindungsversuche seit den letzten empfangenen Daten
+    lost_at = None  # time.monotonic() des letzten Verbindungsverlusts
 
     while not shutdown_requested:
+        # Erster Versuch sofort, danach exponentielles Backoff mit Jitter
+        delay = reconnect_delay(attempt)
+        main_loop_time = time.monotonic() + delay  # Die geplante Wartezeit ist kein Hänger
+        if delay:
+            print(f'Reconnect in {delay:.1f}s (Versuch {attempt + 1})...')
+            if shutdown_event.wait(delay):
+                break
+        attempt += 1
+
         s = None
         watchdog_triggered.clear()  # Reset Watchdog-Signal
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.settimeout(15)
+            configure_keepalive(s)
             s.connect((HOVAL_IP, HOVAL_PORT))
 
             # Socket für Watchdog-Zugriff registrieren
@@ -666,39 +2720,89 @@ def main():
                 current_socket = s
 
             print(f'Verbunden mit {HOVAL_IP}')
-            last_data_time = time.time()  # Reset bei neuer Verbindung
+            pending = b''  # Unvollständiger Frame vom Ende des letzten recv()
+            last_data_time = time.monotonic()  # Reset bei neuer Verbindung
+            learn_gap = False  # Erster Abstand nach dem Verbindungsaufbau zählt nicht zum Datentakt
 
             while not shutdown_requested:
+                main_loop_time = time.monotonic()
+                if not PIPELINE_ENABLED:
+                    check_profiler()
+                    apply_pending_reload()
+
                 # Prüfe ob Watchdog ausgelöst hat
                 if watchdog_triggered.is_set():
                     print('[WATCHDOG] Verbindung wird getrennt...')
                     break
 
+                # Wartet ein Frame ohne Abschluss, nur kurz auf weitere Bytes warten
+                timeout = FRAME_PENDING_TIMEOUT if pending else 15
+                if timeout != s.gettimeout():
+                    s.settimeout(timeout)
                 try:
                     data = s.recv(4096)
-                except (TimeoutError, OSError):
+                    recv_time = time.perf_counter()
+                except (TimeoutError, OSError) as e:
                     # Socket-Timeout, Watchdog oder Shutdown
                     if watchdog_triggered.is_set() or shutdown_requested:
                         break
+                    if pending and isinstance(e, TimeoutError):
+                        # Keine weiteren Bytes: Frame ohne Abschluss nicht länger zurückhalten
+                        parts, pending = split_frames(pending, flush=True)
+                        dispatch_frames(client, parts, time.perf_counter())
                     continue
 
                 if not data:
                     break
 
-                last_data_time = time.time()  # Aktualisiere bei neuen Daten
-
-                parts = data.split(b'\xff\x01')
-                for part in parts:
-                    if len(part) > 4:
-                        process_stream(client, part)
+                now = time.monotonic()
+                if learn_gap:
+                    watchdog_learn(now - last_data_time)
+                learn_gap = WATCHDOG_ENABLED
+                last_data_time = now  # Aktualisiere bei neuen Daten
+                if watchdog_stalled_since is not None:
+                    record_stall_recovery(now)
+                if lost_at is not None:
+                    record_recovery(lost_at, attempt)
+                    lost_at = None
+                attempt = 0
+
+                if FANOUT_ENABLED:
+                    fanout_broadcast(data)
+
+                parts, pending = split_frames(pending + data)
+                dispatch_frames(client, parts, recv_time)
+
+                if (FRAME_CACHE_ENABLED or FRAME_DIFF_ENABLED) and FRAME_CACHE_STATS_INTERVAL > 0:
+                    if last_data_time - last_stats_time >= FRAME_CACHE_STATS_INTERVAL:
+                        log_frame_cache_stats()
+                        last_stats_time = last_data_time
+
+                if FRAME_CHECK_ENABLED and FRAME_CHECK_STATS_INTERVAL > 0:
+                    if last_data_time - last_check_time >= FRAME_CHECK_STATS_INTERVAL:
+                        log_frame_check_stats()
+                        last_check_time = last_data_time
+
+                if census_counts is not None and CENSUS_INTERVAL > 0:
+                    if last_data_time - last_census_time >= CENSUS_INTERVAL:
+                        census_report()
+                        last_census_time = last_data_time
+
+                if trace_histograms and TRACE_INTERVAL > 0:
+                    if last_data_time - last_trace_time >= TRACE_INTERVAL:
+                        log_trace_stats()
+                        last_trace_time = last_data_time
+
+                if PIPELINE_ENABLED and PIPELINE_STATS_INTERVAL > 0:
+                    if last_data_time - last_pipeline_time >= PIPELINE_STATS_INTERVAL:
+                        log_pipeline_stats()
+                        last_pipeline_time = last_data_time
 
         except KeyboardInterrupt:
             break
         except Exception as e:
             if not watchdog_triggered.is_set() and not shutdown_requested:
                 print(f'Reconnect... ({e})')
-            if not shutdown_requested:
-                time.sleep(10)
         finally:
             with socket_lock:
                 current_socket = None
@@ -707,7 +2811,17 @@ def main():
                     s.close()
                 except:
                     pass
-
+            if lost_at is None:
+                lost_at = time.monotonic()
+
+    if decoder is not None:
+        stop_pipeline(decoder, publisher)
+        log_pipeline_stats()
+    stop_profiler()
+    census_report()
+    if trace_histograms:
+        log_trace_stats()
+    sd_notify('STOPPING=1')
     print('Hoval Gateway beendet.')
 
 
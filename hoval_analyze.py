@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Byte-Positionen in Mitschnitten statistisch auswerten, um Datenpunkte im Frame zu finden.
+
+Alle Frames gleicher Signatur (Länge + Header, wie im Frame-Cache des Bridges) werden als
+NumPy-Matrix übereinandergelegt; pro Offset entstehen in einem Durchgang Minimum, Maximum,
+Mittelwert, Streuung und Änderungsrate des 16-Bit-Werts (S16 und U16) sowie optional die
+Korrelation mit einer Referenz-Zeitreihe.
+
+Beispiele:
+    # Wo steht die Außentemperatur? Referenz z.B. aus "hoval_capture.py decode" oder einer Wetterstation
+    python hoval_analyze.py captures/*.hcap --reference wetter.csv --column Aussentemperatur
+
+    # Wie debug_dump.py, aber über alle Frames: Werte zwischen 2.0 und 3.5 (eine Nachkommastelle)
+    python hoval_analyze.py captures/*.hcap --target 2.0 3.5
+
+Referenz-CSV: Spalte "timestamp" (Unix-Zeit) und eine Wertespalte (--column, sonst die zweite).
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import hoval
+from hoval_capture import RECORD_HEADER
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit('hoval_analyze.py benötigt numpy: pip install numpy')
+
+
+# --- LADEN ---
+def load_frames(paths, start=None, end=None):
+    """Liest alle Frames der Mitschnitte, gruppiert nach Signatur: {Signatur: ([Zeitstempel], [Frame])}."""
+    groups = {}
+    for path in paths:
+        pending = b''
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                timestamp, length = RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    pending = b''
+                    continue
+                parts, pending = hoval.split_frames(pending + data)
+                for part in parts:
+                    if len(part) > 4:
+                        timestamps, frames = groups.setdefault(hoval.frame_signature(part), ([], []))
+                        timestamps.append(timestamp)
+                        frames.append(part)
+    return groups
+
+
+def load_reference(path, column=None):
+    """Referenz-Zeitreihe aus CSV: (Zeitstempel, Werte), nach Zeit sortiert, leere Zellen ausgelassen."""
+    times, values = [], []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        delimiter = ';' if ';' in f.readline() else ','
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=delimiter)
+        column = column or reader.fieldnames[1]
+        for row in reader:
+            try:
+                timestamp, value = float(row['timestamp']), float(row[column].replace(',', '.'))
+            except (KeyError, ValueError, AttributeError):
+                continue
+            times.append(timestamp)
+            values.append(value)
+    order = np.argsort(times)
+    return np.asarray(times)[order], np.asarray(values)[order]
+
+
+def load_catalog_names(config_path):
+    """ID -> Name aus der Datenpunkt-CSV (Pfad aus config.ini, relativ wie im Bridge)."""
+    try:
+        hoval.apply_config(hoval.load_config(config_path))
+    except FileNotFoundError:
+        if config_path:
+            raise
+    if not os.path.exists(hoval.CSV_FILE):
+        base = os.path.dirname(os.path.abspath(config_path or hoval.__file__))
+        hoval.CSV_FILE = os.path.join(base, hoval.CSV_FILE)
+    return hoval.read_catalog_names()
+
+
+# --- ANALYSE ---
+def analyze_signature(timestamps, frames, decimal, reference=None, target=None):
+    """
+    Statistik aller 16-Bit-Werte einer Signatur, vektorisiert über Frames und Offsets.
+
+    Liefert ein dict von Arrays der Länge (Framelänge - 1), Index = Offset des Wert-Beginns.
+    'id' ist die Datenpunkt-ID direkt vor dem Offset, sofern sie in allen Frames gleich ist
+    (0x00 + 2 Byte bzw. 2 Byte ohne Präfix für IDs 0-5), sonst -1.
+    """
+    count = len(frames)
+    matrix = np.frombuffer(b''.join(frames), dtype=np.uint8).reshape(count, -1)
+    words = (matrix[:, :-1].astype(np.int32) << 8) | matrix[:, 1:]
+    scale = 10.0**decimal
+    interpretations = {'S16': np.where(words >= 0x8000, words - 0x10000, words) / scale, 'U16': words / scale}
+
+    stats = {
+        'changes': np.count_nonzero(words[1:] != words[:-1], axis=0) / max(count - 1, 1),
+        'id': np.full(words.shape[1], -1),
+        'prefix': np.zeros(words.shape[1], dtype=bool),
+    }
+
+    # Konstante ID direkt davor: words[:, o - 2] ist die ID, matrix[:, o - 3] das 0x00-Präfix
+    constant = (words == words[0]).all(axis=0)
+    ids = np.where(constant, words[0], -1)
+    stats['id'][2:] = ids[:-2]
+    stats['prefix'][3:] = (matrix[:, :-4] == 0).all(axis=0)
+    stats['id'][~stats['prefix'] & (stats['id'] > 5)] = -1
+
+    ref = None
+    if reference is not None:
+        ref_times, ref_values = reference
+        # Referenz auf die Frame-Zeitpunkte interpolieren, nur innerhalb ihres Zeitraums
+        times = np.asarray(timestamps)
+        inside = (times >= ref_times[0]) & (times <= ref_times[-1])
+        if inside.sum() > 2:
+            ref = np.interp(times[inside], ref_times, ref_values)
+            ref = ref - ref.mean()
+
+    for kind, values in interpretations.items():
+        stats[f'{kind}_min'] = values.min(axis=0)
+        stats[f'{kind}_max'] = values.max(axis=0)
+        stats[f'{kind}_mean'] = values.mean(axis=0)
+        stats[f'{kind}_std'] = values.std(axis=0)
+        if target is not None:
+            stats[f'{kind}_hits'] = ((values >= target[0]) & (values <= target[1])).mean(axis=0)
+        if ref is not None:
+            centered = values[inside] - values[inside].mean(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                corr = (centered * ref[:, None]).sum(axis=0) / np.sqrt((centered**2).sum(axis=0) * (ref**2).sum())
+            stats[f'{kind}_corr'] = np.nan_to_num(corr)
+    return stats
+
+
+def candidates(groups, names, decimal, reference=None, target=None, min_frames=20):
+    """
+    Wertet alle Signaturen aus und liefert je Offset die bessere Interpretation (S16/U16) als Zeile.
+    Bewertung: Korrelation mit der Referenz, sonst Anteil im Zielbereich, sonst Änderungsrate.
+    """
+    rows = []
+    for sig, (timestamps, frames) in groups.items():
+        if len(frames) < min_frames:
+            continue
+        stats = analyze_signature(timestamps, frames, decimal, reference, target)
+        for kind in ('S16', 'U16'):
+            if f'{kind}_corr' in stats:
+                stats[f'{kind}_score'] = np.abs(stats[f'{kind}_corr'])
+            elif f'{kind}_hits' in stats:
+                stats[f'{kind}_score'] = stats[f'{kind}_hits'] * (stats[f'{kind}_std'] > 0)
+            else:
+                stats[f'{kind}_score'] = stats['changes']
+        # U16 nur, wenn es klar besser passt (bei Werten < 0x8000 sind beide gleich)
+        use_u16 = stats['U16_score'] > stats['S16_score']
+
+        header = sig[1].hex()
+        for offset in range(len(stats['changes'])):
+            kind = 'U16' if use_u16[offset] else 'S16'
+            dp_id = int(stats['id'][offset])
+            rows.append(
+                {
+                    'length': sig[0],
+                    'header': header,
+                    'frames': len(frames),
+                    'offset': offset,
+                    'type': kind,
+                    'score': float(stats[f'{kind}_score'][offset]),
+                    'corr': float(stats[f'{kind}_corr'][offset]) if f'{kind}_corr' in stats else None,
+                    'hits': float(stats[f'{kind}_hits'][offset]) if f'{kind}_hits' in stats else None,
+                    'min': float(stats[f'{kind}_min'][offset]),
+                    'max': float(stats[f'{kind}_max'][offset]),
+                    'mean': float(stats[f'{kind}_mean'][offset]),
+                    'std': float(stats[f'{kind}_std'][offset]),
+                    'changes': float(stats['changes'][offset]),
+                    'id': dp_id if dp_id >= 0 else None,
+                    'prefix': bool(stats['prefix'][offset]),
+                    'name': names.get(dp_id, '') if dp_id >= 0 else '',
+                }
+            )
+    rows.sort(key=lambda row: row['score'], reverse=True)
+    return rows
+
+
+# --- AUSGABE ---
+def print_candidates(rows, top):
+    print(
+        f'{"Länge":>5} {"Header":8} {"Frames":>6} {"Offset":>6} {"Typ":3} {"Score":>6} '
+        f'{"Min":>8} {"Max":>8} {"Mittel":>8} {"Streuung":>8} {"Änder.":>6}  Datenpunkt'
+    )
+    for row in rows[:top]:
+        if row['id'] is None:
+            label = '-'
+        else:
+            label = f'{row["id"]} {row["name"] or "(unbekannt)"}'
+            if not row['prefix']:
+                label += ' [ohne Präfix]'
+        print(
+            f'{row["length"]:5d} {row["header"]:8} {row["frames"]:6d} {row["offset"]:6d} {row["type"]:3} '
+            f'{row["score"]:6.3f} {row["min"]:8.1f} {row["max"]:8.1f} {row["mean"]:8.2f} {row["std"]:8.2f} '
+            f'{row["changes"]:6.1%}  {label}'
+        )
+
+
+def write_candidates(path, rows):
+    fields = list(rows[0]) if rows else []
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, delimiter=';')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='+', help='.hcap-Dateien (hoval_capture.py record)')
+    parser.add_argument('--reference', help='CSV mit Referenz-Zeitreihe (timestamp + Wert)')
+    parser.add_argument('--column', help='Wertespalte der Referenz-CSV (Standard: zweite Spalte)')
+    parser.add_argument('--target', type=float, nargs=2, metavar=('MIN', 'MAX'), help='Gesuchter Wertebereich')
+    parser.add_argument('--decimal', type=int, default=1, help='Nachkommastellen der Rohwerte (Standard: 1)')
+    parser.add_argument('--min-frames', type=int, default=20, help='Signaturen mit weniger Frames ignorieren')
+    parser.add_argument('--start', type=float, help='Nur Datensätze ab dieser Unix-Zeit')
+    parser.add_argument('--end', type=float, help='Nur Datensätze vor dieser Unix-Zeit')
+    parser.add_argument('--top', type=int, default=20, help='Anzahl ausgegebener Kandidaten')
+    parser.add_argument('-o', '--output', help='Alle Offsets als CSV schreiben')
+    parser.add_argument('--config', help='config.ini für den Pfad der Datenpunkt-CSV')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    groups = load_frames(sorted(args.captures), args.start, args.end)
+    frames = sum(len(group[1]) for group in groups.values())
+    print(f'{frames} Frames, {len(groups)} Signaturen')
+    if not frames:
+        return 1
+
+    reference = load_reference(args.reference, args.column) if args.reference else None
+    rows = candidates(groups, load_catalog_names(args.config), args.decimal, reference, args.target, args.min_frames)
+    print_candidates(rows, args.top)
+    if args.output:
+        write_candidates(args.output, rows)
+        print(f'{len(rows)} Offsets -> {args.output}')
+    print(f'({time.perf_counter() - start_time:.1f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
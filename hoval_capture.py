@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Rohdaten-Mitschnitte des Gateways aufzeichnen und offline parallel dekodieren.
+
+Aufzeichnen (direkt vom Gateway oder über den Fan-out-Proxy des Bridges):
+    python hoval_capture.py record captures/ --host 127.0.0.1 --port 3114
+
+Dekodieren (ein Prozess pro Kern, Ergebnis eine Spalte pro Datenpunkt):
+    python hoval_capture.py decode captures/*.hcap -o werte.csv     (.csv, .npz, .parquet)
+
+Format (.hcap): Folge von Datensätzen, je Header '>dI' (Unix-Zeit, Länge) + die Bytes eines recv().
+Dekodiert wird jeder Datensatz wie im Bridge (split_frames, process_stream je Frame); jeder
+Shard beginnt mit frischem Decoder-Zustand, daher lassen sich die Shards auf Prozesse verteilen.
+Ein Frame gehört zu dem Shard, in dem sein 0xFF 0x01 liegt: Der Shard liest über sein Ende
+hinaus, bis der letzte Frame abgeschlossen ist, und der nächste beginnt beim ersten 0xFF 0x01.
+"""
+
+import argparse
+import contextlib
+import csv
+import math
+import os
+import socket
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import hoval
+
+RECORD_HEADER = struct.Struct('>dI')
+
+
+# --- AUFZEICHNEN ---
+def record(args):
+    """Schreibt den Rohdaten-Stream in stündlich rotierte .hcap-Dateien."""
+    os.makedirs(args.directory, exist_ok=True)
+    current_hour = None
+    out = None
+    while True:
+        try:
+            with socket.create_connection((args.host, args.port), timeout=15) as s:
+                print(f'Verbunden mit {args.host}:{args.port}, schreibe nach {args.directory}')
+                while True:
+                    data = s.recv(65536)
+                    if not data:
+                        break
+                    now = time.time()
+                    hour = time.strftime('%Y%m%d-%H', time.localtime(now))
+                    if hour != current_hour:
+                        if out:
+                            out.close()
+                        out = open(os.path.join(args.directory, f'hoval-{hour}.hcap'), 'ab')
+                        current_hour = hour
+                    out.write(RECORD_HEADER.pack(now, len(data)))
+                    out.write(data)
+        except KeyboardInterrupt:
+            break
+        except OSError as e:
+            print(f'Verbindung verloren ({e}), neuer Versuch in 5s...')
+            time.sleep(5)
+    if out:
+        out.close()
+
+
+# --- SHARDS ---
+def read_headers(path):
+    """Liefert (Offset, Zeitstempel) aller Datensätze, ohne die Nutzdaten zu lesen."""
+    headers = []
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        offset = 0
+        while offset + RECORD_HEADER.size <= size:
+            f.seek(offset)
+            timestamp, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            headers.append((offset, timestamp))
+            offset += RECORD_HEADER.size + length
+    return headers
+
+
+def plan_shards(paths, window, start=None, end=None):
+    """
+    Teilt die Dateien in Zeitfenster von window Sekunden: (Pfad, Start-Offset, End-Offset, Fortsetzung).
+    Optional nur Datensätze zwischen start und end (Unix-Zeit). Fortsetzung: Der Shard schließt direkt
+    an den vorigen an, dessen letzter Frame die Bytes vor dem ersten 0xFF 0x01 bereits dekodiert.
+    """
+    shards = []
+    for path in paths:
+        current = None  # [Pfad, Start-Offset, End-Offset, Fortsetzung, Fenster]
+        for offset, timestamp in read_headers(path):
+            if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                if current:
+                    current[2] = offset
+                    shards.append(tuple(current[:4]))
+                    current = None
+                continue
+            slot = int(timestamp // window)
+            continued = False
+            if current and current[4] != slot:
+                current[2] = offset
+                shards.append(tuple(current[:4]))
+                current = None
+                continued = True
+            if current is None:
+                current = [path, offset, None, continued, slot]
+        if current:
+            current[2] = os.path.getsize(path)
+            shards.append(tuple(current[:4]))
+    return shards
+
+
+# --- DEKODIEREN (Worker) ---
+def init_worker(config_path):
+    """Einmal pro Prozess: Konfiguration laden, Ausgaben abschalten."""
+    try:
+        hoval.apply_config(hoval.load_config(config_path))
+    except FileNotFoundError:
+        if config_path:
+            raise
+    # Relativer CSV-Pfad: wie im Bridge-Verzeichnis, falls nicht im aktuellen Verzeichnis vorhanden
+    if not os.path.exists(hoval.CSV_FILE):
+        base = os.path.dirname(os.path.abspath(config_path or hoval.__file__))
+        hoval.CSV_FILE = os.path.join(base, hoval.CSV_FILE)
+    hoval.DEBUG_CONSOLE = False
+    hoval.DEBUG_RAW = False
+    hoval.MQTT_ENABLED = False
+
+
+def decode_shard(shard):
+    """
+    Dekodiert einen Shard und liefert ihn spaltenweise: (Zeitstempel, {Name: Werte}, verlorene Bytes).
+    Fehlende Werte sind NaN; gleiche Zeitstempel (ein recv()) ergeben eine Zeile. Verloren sind die
+    Bytes vor dem ersten 0xFF 0x01, wenn kein vorheriger Shard sie dekodiert (Dateianfang, --start).
+    """
+    # Der Decoder meldet einzelne Funde per print() - im Batch nur störend
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return _decode_shard(*shard)
+
+
+def _decode_shard(path, start, end, continued):
+    timestamps = []
+    columns = {}
+    row = {}
+    skipped = 0
+
+    # Frischer Decoder-Zustand (Frame-Cache, Sprung-Prüfung) je Shard: Ergebnis unabhängig von der Aufteilung
+    if not hoval.load_csv():
+        raise RuntimeError(f'CSV nicht lesbar: {hoval.CSV_FILE}')
+    hoval.frame_states.clear()
+    hoval.last_sent.clear()
+    hoval.reset_frame_check()
+
+    def collect(name, value, unit):
+        row[name] = value
+
+    def process(parts):
+        for part in parts:
+            if len(part) > 4:
+                hoval.process_stream(None, part, collect)
+
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        tail = b''
+        if continued:
+            # Letztes Byte des vorigen Datensatzes: ein 0xFF 0x01 kann über die recv()-Grenze reichen
+            f.seek(start - 1)
+            tail = f.read(1)
+        f.seek(start)
+        offset = start
+        pending = None  # None: noch nicht auf 0xFF 0x01 synchronisiert
+        while offset < end or (pending and offset < size):
+            timestamp, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            data = f.read(length)
+            offset += RECORD_HEADER.size + length
+
+            row.clear()
+            if pending is None:
+                # Anfang des Shards: der angeschnittene Frame davor gehört zum vorigen Shard
+                data, tail = tail + data, data[-1:]
+                sync = data.find(b'\xff\x01')
+                if not continued:
+                    skipped += length if sync == -1 else sync
+                if sync == -1:
+                    continue
+                data, pending = data[sync:], b''
+            if offset > end:
+                # Hinter dem Shard-Ende: nur den angefangenen Frame abschließen, wie es der Stream täte
+                buffer = pending + data
+                sync = buffer.find(b'\xff\x01', 2)
+                if sync == -1:
+                    parts, pending = hoval.split_frames(buffer)
+                else:
+                    parts, pending = hoval.split_frames(buffer[:sync], flush=True)[0], b''
+                process(parts)
+            else:
+                parts, pending = hoval.split_frames(pending + data)
+                process(parts)
+            if not row:
+                continue
+
+            index = len(timestamps)
+            timestamps.append(timestamp)
+            for name, value in row.items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = [math.nan] * index
+                column.append(value)
+            for column in columns.values():
+                if len(column) == index:
+                    column.append(math.nan)
+    return timestamps, columns, skipped
+
+
+# --- ZUSAMMENFÜHREN / SCHREIBEN ---
+def merge(results):
+    """
+    Hängt die Shards in Reihenfolge aneinander und gleicht die Spalten an.
+
+    Der Datensatz an einer Shard-Grenze kann in beiden Shards eine Zeile ergeben (Ende des letzten
+    Frames im vorigen, die folgenden Frames im nächsten); beide werden zu einer Zeile zusammengefasst.
+    """
+    names = sorted({name for _, columns, _ in results for name in columns})
+    timestamps = []
+    merged = {name: [] for name in names}
+    for shard_timestamps, columns, _ in results:
+        first = 0
+        if timestamps and shard_timestamps and shard_timestamps[0] == timestamps[-1]:
+            first = 1
+            for name, values in columns.items():
+                if not math.isnan(values[0]):
+                    merged[name][-1] = values[0]
+        timestamps.extend(shard_timestamps[first:])
+        for name in names:
+            merged[name].extend(columns.get(name, [math.nan] * len(shard_timestamps))[first:])
+    return timestamps, merged
+
+
+def forward_fill(columns):
+    for values in columns.values():
+        last = math.nan
+        for i, value in enumerate(values):
+            if math.isnan(value):
+                values[i] = last
+            else:
+                last = value
+
+
+def write_output(path, timestamps, columns):
+    if path.endswith('.npz'):
+        import numpy as np
+
+        np.savez_compressed(
+            path, timestamp=np.asarray(timestamps), **{name: np.asarray(v) for name, v in columns.items()}
+        )
+    elif path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({'timestamp': timestamps, **columns})
+        pq.write_table(table, path)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(['timestamp', *columns])
+            for i, timestamp in enumerate(timestamps):
+                writer.writerow([f'{timestamp:.3f}', *('' if math.isnan(v[i]) else v[i] for v in columns.values())])
+
+
+def decode(args):
+    paths = sorted(args.captures)
+    start_time = time.perf_counter()
+    shards = plan_shards(paths, args.window, args.start, args.end)
+    if not shards:
+        print('Keine Datensätze gefunden.')
+        return 1
+    print(f'{len(paths)} Dateien, {len(shards)} Shards, {args.jobs} Prozesse')
+
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(args.config,)) as pool:
+        results = list(pool.map(decode_shard, shards, chunksize=1))
+
+    timestamps, columns = merge(results)
+    skipped = sum(result[2] for result in results)
+    if skipped:
+        print(f'{skipped} Bytes vor dem ersten Frame übersprungen (angeschnittener Frame am Dateianfang)')
+    if args.ffill:
+        forward_fill(columns)
+    write_output(args.output, timestamps, columns)
+    elapsed = time.perf_counter() - start_time
+    print(f'{len(timestamps)} Zeilen, {len(columns)} Datenpunkte -> {args.output} ({elapsed:.1f}s)')
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='Rohdaten-Stream aufzeichnen')
+    rec.add_argument('directory', help='Zielverzeichnis für .hcap-Dateien')
+    rec.add_argument('--host', default='10.0.0.95')
+    rec.add_argument('--port', type=int, default=3113)
+
+    dec = commands.add_parser('decode', help='Mitschnitte parallel dekodieren')
+    dec.add_argument('captures', nargs='+', help='.hcap-Dateien')
+    dec.add_argument('-o', '--output', required=True, help='Zieldatei (.csv, .npz oder .parquet)')
+    dec.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='Anzahl Prozesse')
+    dec.add_argument('--window', type=float, default=3600, help='Shard-Größe in Sekunden (Standard: 3600)')
+    dec.add_argument('--start', type=float, help='Nur Datensätze ab dieser Unix-Zeit')
+    dec.add_argument('--end', type=float, help='Nur Datensätze vor dieser Unix-Zeit')
+    dec.add_argument('--config', help='config.ini für CSV, Filter und Plausibilitätsregeln')
+    dec.add_argument('--ffill', action='store_true', help='Lücken mit dem letzten Wert füllen')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args)
+        return 0
+    return decode(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
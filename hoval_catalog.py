@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Schlanke, anlagenspezifische Datenpunkt-CSV aus beobachtetem Verkehr erzeugen.
+
+Die mitgelieferte hoval_datapoints.csv enthält über tausend Datenpunkte aller Gerätetypen mit
+rund 50 Spalten (Texte, Kommentare, Register). Eine Anlage sendet davon nur einen Bruchteil.
+Dieses Skript dekodiert Mitschnitte (hoval_capture.py record) oder eine Live-Sitzung mit dem
+Decoder des Bridges, zählt je Datenpunkt die plausibel dekodierten Werte und schreibt nur die
+gefundenen Datenpunkte mit den tatsächlich gelesenen Spalten.
+
+Beispiele:
+    # Aus Mitschnitten (mindestens 5 plausible Werte je Datenpunkt)
+    python hoval_catalog.py captures/*.hcap -o hoval_datapoints_slim.csv --min-count 5
+
+    # Live, 30 Minuten direkt vom Gateway bzw. über den Fan-out-Proxy
+    python hoval_catalog.py --live --host 127.0.0.1 --port 3114 --duration 1800 -o hoval_datapoints_slim.csv
+
+Danach csv_file in config.ini auf die neue Datei setzen (bzw. sie für die HA-Integration als
+custom_components/hoval_gateway/hoval_datapoints.csv ablegen). Selten gesendete Datenpunkte
+lassen sich mit --keep erzwingen.
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import socket
+import sys
+import time
+
+import hoval
+from hoval_capture import RECORD_HEADER
+
+# Spalten, die Bridge und HA-Integration aus der CSV lesen (read_datapoints, compile_rules, load_catalog)
+SLIM_COLUMNS = [
+    'UnitName',
+    'UnitId',
+    'DatapointId',
+    'DatapointName',
+    'TypeName',
+    'Decimal',
+    'Steps',
+    'Min. value',
+    'Max. value',
+    'Writable',
+    'unit',
+]
+
+
+# --- QUELLEN ---
+def read_captures(paths):
+    """Liefert die Nutzdaten aller Datensätze der .hcap-Dateien in Reihenfolge."""
+    for path in paths:
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                _, length = RECORD_HEADER.unpack(header)
+                yield f.read(length)
+
+
+def read_live(host, port, duration):
+    """
+    Liefert die Daten jedes recv() vom Gateway, bis duration Sekunden vergangen sind.
+    Strg+C oder ein Verbindungsende beenden die Sitzung vorzeitig, das Gelesene wird ausgewertet.
+    """
+    deadline = time.monotonic() + duration
+    with socket.create_connection((host, port), timeout=15) as s:
+        while time.monotonic() < deadline:
+            s.settimeout(max(deadline - time.monotonic(), 0.1))
+            try:
+                data = s.recv(65536)
+            except (TimeoutError, KeyboardInterrupt):
+                break
+            if not data:
+                break
+            yield data
+
+
+# --- AUSWERTUNG ---
+def observe(chunks):
+    """
+    Dekodiert alle Frames wie der Bridge und zählt je Datenpunkt-Name die plausiblen Werte.
+
+    Gezählt wird jedes Vorkommen (über den on_value-Hook von process_stream), nicht nur Änderungen:
+    Auch konstant gesendete Werte erreichen --min-count. Frame-Cache, differenzielle Dekodierung und
+    Rohbytes-Memo sind aus, damit jeder Wert dekodiert und geprüft wird.
+    Liefert ({Name: [Anzahl, Minimum, Maximum]}, Anzahl Frames).
+    """
+    seen = {}
+
+    def count(name, value, unit):
+        entry = seen.get(name)
+        if entry is None:
+            seen[name] = [1, value, value]
+        else:
+            entry[0] += 1
+            entry[1] = min(entry[1], value)
+            entry[2] = max(entry[2], value)
+
+    hoval.FRAME_CACHE_ENABLED = False
+    hoval.FRAME_DIFF_ENABLED = False
+    for dp in hoval.datapoint_map.values():
+        dp['memo'] = False
+    hoval.reset_frame_check()
+
+    frames = 0
+    pending = b''
+    # Der Decoder meldet einzelne Funde per print() - hier nur störend
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for data in chunks:
+            parts, pending = hoval.split_frames(pending + data)
+            for part in parts:
+                if len(part) > 4:
+                    frames += 1
+                    hoval.process_stream(None, part, count)
+    return seen, frames
+
+
+def parse_keep(values):
+    """--keep: IDs oder Namen, kommagetrennt oder mehrfach angegeben."""
+    keep = set()
+    for value in values or ():
+        keep.update(item.strip() for item in value.split(',') if item.strip())
+    return keep
+
+
+def select_ids(seen, min_count, keep):
+    """IDs der zu behaltenden Datenpunkte: mindestens min_count plausible Werte oder per --keep erzwungen."""
+    selected = set()
+    for dp in hoval.datapoint_map.values():
+        entry = seen.get(dp['name'])
+        if (entry and entry[0] >= min_count) or str(dp['id']) in keep or dp['name'] in keep:
+            selected.add(dp['id'])
+    return selected
+
+
+def write_slim_csv(source, path, ids):
+    """Schreibt die Zeilen der gewählten IDs (UnitName HV, konfigurierte Unit) mit SLIM_COLUMNS."""
+    rows = 0
+    with open(source, encoding='utf-8-sig', errors='replace') as f:
+        delimiter = ';' if ';' in f.readline() else ','
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=delimiter)
+        with open(path + '.tmp', 'w', encoding='utf-8', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=SLIM_COLUMNS, delimiter=';', extrasaction='ignore')
+            writer.writeheader()
+            for row in reader:
+                if row.get('UnitName') != 'HV':
+                    continue
+                try:
+                    dp_id = int(row['DatapointId'])
+                    unit_id = int(row.get('UnitId', 0))
+                except (KeyError, ValueError):
+                    continue
+                if dp_id not in ids or (hoval.UNIT_ID_FILTER and unit_id != hoval.UNIT_ID_FILTER):
+                    continue
+                writer.writerow({column: row.get(column) or '' for column in SLIM_COLUMNS})
+                rows += 1
+    os.replace(path + '.tmp', path)
+    return rows
+
+
+def print_summary(seen, selected, frames, min_count):
+    print(f'{"ID":>6} {"Anzahl":>8} {"Min":>9} {"Max":>9}  Datenpunkt')
+    for dp in sorted(hoval.datapoint_map.values(), key=lambda dp: dp['id']):
+        entry = seen.get(dp['name'])
+        if dp['id'] not in selected and not entry:
+            continue
+        count, low, high = entry or (0, '', '')
+        mark = '' if dp['id'] in selected else f'  (verworfen, < {min_count})'
+        print(f'{dp["id"]:6d} {count:8d} {low!s:>9} {high!s:>9}  {dp["name"]}{mark}')
+    print(f'{frames} Frames, {len(selected)} von {len(hoval.datapoint_map)} Datenpunkten behalten')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='*', help='.hcap-Dateien (hoval_capture.py record)')
+    parser.add_argument('-o', '--output', required=True, help='Ziel-CSV')
+    parser.add_argument('--live', action='store_true', help='Statt Mitschnitten live vom Gateway lesen')
+    parser.add_argument('--host', help='Gateway bzw. Fan-out-Proxy (Standard: aus config.ini)')
+    parser.add_argument('--port', type=int, help='Port (Standard: aus config.ini)')
+    parser.add_argument('--duration', type=float, default=600, help='Dauer der Live-Sitzung in Sekunden')
+    parser.add_argument('--min-count', type=int, default=3, help='Mindestanzahl plausibler Werte (Standard: 3)')
+    parser.add_argument('--keep', action='append', help='Immer behalten: IDs oder Namen, kommagetrennt')
+    parser.add_argument('--config', help='config.ini für CSV, unit_id, ignore_keywords und Plausibilitätsregeln')
+    args = parser.parse_args()
+    if not args.live and not args.captures:
+        parser.error('Mitschnitte angeben oder --live verwenden')
+
+    try:
+        hoval.apply_config(hoval.load_config(args.config))
+    except FileNotFoundError:
+        if args.config:
+            raise
+    # Relativer CSV-Pfad: wie im Bridge-Verzeichnis, falls nicht im aktuellen Verzeichnis vorhanden
+    if not os.path.exists(hoval.CSV_FILE):
+        base = os.path.dirname(os.path.abspath(args.config or hoval.__file__))
+        hoval.CSV_FILE = os.path.join(base, hoval.CSV_FILE)
+    if os.path.abspath(args.output) == os.path.abspath(hoval.CSV_FILE):
+        parser.error('Ziel-CSV darf nicht die Quell-CSV sein')
+    hoval.DEBUG_CONSOLE = False
+    hoval.DEBUG_RAW = False
+    hoval.MQTT_ENABLED = False
+    # Alle Datenpunkte dekodieren, auch solche außerhalb von [filter] only
+    hoval.ONLY_DATAPOINTS = set()
+    if not hoval.load_csv():
+        return 1
+
+    start_time = time.perf_counter()
+    if args.live:
+        host, port = args.host or hoval.HOVAL_IP, args.port or hoval.HOVAL_PORT
+        print(f'Lese {args.duration:.0f}s von {host}:{port} (Strg+C beendet vorzeitig)...')
+        chunks = read_live(host, port, args.duration)
+    else:
+        chunks = read_captures(sorted(args.captures))
+    try:
+        seen, frames = observe(chunks)
+    except KeyboardInterrupt:
+        print('Abgebrochen.')
+        return 1
+    except OSError as e:
+        print(f'FEHLER: {e}')
+        return 1
+    if not frames:
+        print('Keine Frames gefunden.')
+        return 1
+
+    selected = select_ids(seen, args.min_count, parse_keep(args.keep))
+    print_summary(seen, selected, frames, args.min_count)
+    rows = write_slim_csv(hoval.CSV_FILE, args.output, selected)
+    print(f'{rows} Zeilen, {len(SLIM_COLUMNS)} Spalten -> {args.output} ({time.perf_counter() - start_time:.1f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Dauertest (Soak): Bridge bzw. HA-Coordinator im Zeitraffer mit Fehlern betreiben und auf Lecks prüfen.
+
+Ein lokaler Gateway-Simulator sendet Frames aus Datenpunkten der CSV mit maximal --fps Frames/s
+(Tage an Verkehr in Minuten), ein Mini-MQTT-Broker nimmt die Werte an. Dazwischen werden
+Verbindungsabbrüche, Watchdog-Auslösungen (Datenstillstand) und Broker-Ausfälle eingestreut.
+Regelmäßig werden RSS, tracemalloc, Threads, offene Dateideskriptoren und CPU pro Frame
+gemessen; steigt ein Wert nach der Aufwärmphase stetig an, schlägt der Test fehl (Exit-Code 1).
+
+    python hoval_soak.py --duration 900                 # Bridge (hoval.py als Unterprozess)
+    python hoval_soak.py --duration 900 --coordinator   # HA-Coordinator (benötigt homeassistant)
+"""
+
+import argparse
+import asyncio
+import csv
+import glob
+import os
+import random
+import re
+import signal
+import socket
+import socketserver
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import hoval
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRAME_TYPES = 4  # Verschiedene Frame-Layouts des Simulators
+GARBAGE_RATE = 0.01  # Anteil eingestreuter Störbytes zwischen Frames
+MIN_SAMPLES = 6  # Mindestanzahl Messpunkte nach der Aufwärmphase für eine Bewertung
+
+# Grenzwerte: (Metrik, relatives Wachstum, absolutes Mindestwachstum) über die Messdauer nach der Aufwärmphase
+LIMITS = (
+    ('rss_kib', 0.05, 2048),
+    ('traced_kib', 0.10, 256),
+    ('threads', 0.0, 2),
+    ('fds', 0.0, 4),
+)
+CPU_DRIFT = 1.5  # CPU pro Frame im letzten Drittel darf höchstens so viel höher sein als im ersten
+
+
+# --- GATEWAY-SIMULATOR ---
+class GatewaySimulator:
+    """Lokaler TCP-Server, der sich wie das Gateway verhält (Port 3113), mit Fehlerinjektion."""
+
+    def __init__(self, datapoints, fps):
+        self.fps = fps
+        self.frames_sent = 0
+        self.connections = 0
+        self.stalled_until = 0.0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._rnd = random.Random(1)
+        # Frame-Typen: fester Header + Folge von Datenpunkten, Rohwerte als Random Walk
+        self._layouts = []
+        for n in range(FRAME_TYPES):
+            chosen = datapoints[n::FRAME_TYPES] or datapoints
+            self._layouts.append((bytes([0x10 + n, 0x20, 0x30]), chosen))
+        self._raw = {dp['id']: 1 << (dp['size'] * 8 - 2) for dp in datapoints}
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _frame(self, index):
+        header, datapoints = self._layouts[index % FRAME_TYPES]
+        parts = [b'\xff\x01', header]
+        for dp in datapoints:
+            size = dp['size']
+            limit = (1 << (size * 8 - 1)) - 2
+            raw = min(max(self._raw[dp['id']] + self._rnd.choice((-1, 0, 0, 0, 1)), 0), limit)
+            self._raw[dp['id']] = raw
+            parts.append(b'\x00' + struct.pack('>H', dp['id']) + raw.to_bytes(size, 'big'))
+        parts.append(b'\xff\x02')
+        if self._rnd.random() < GARBAGE_RATE:
+            parts.append(self._rnd.randbytes(self._rnd.randrange(1, 16)))
+        return b''.join(parts)
+
+    def _serve(self):
+        while True:
+            conn, _ = self._server.accept()
+            with self._lock:
+                self._conn = conn
+                self.connections += 1
+            batch = max(1, self.fps // 100)
+            try:
+                while True:
+                    if time.monotonic() < self.stalled_until:
+                        time.sleep(0.1)
+                        continue
+                    start = time.monotonic()
+                    conn.sendall(b''.join(self._frame(self.frames_sent + k) for k in range(batch)))
+                    self.frames_sent += batch
+                    time.sleep(max(0.0, batch / self.fps - (time.monotonic() - start)))
+            except OSError:
+                pass
+            finally:
+                conn.close()
+
+    def disconnect(self):
+        """Trennt die Verbindung (Bridge muss neu verbinden)."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def stall(self, seconds):
+        """Sendet für seconds Sekunden nichts, Verbindung bleibt offen (Watchdog muss auslösen)."""
+        self.stalled_until = time.monotonic() + seconds
+
+
+# --- MINI-MQTT-BROKER ---
+class FakeBroker:
+    """Minimaler MQTT-3.1.1-Broker: CONNACK, PUBACK (QoS 1), PINGRESP - genug für paho."""
+
+    def __init__(self):
+        self.publishes = 0
+        self.outages = 0
+        self._connections = set()
+        self._lock = threading.Lock()
+        self.port = None
+        self._server = None
+        self.start()
+
+    def start(self):
+        broker = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with broker._lock:
+                    broker._connections.add(self.request)
+                try:
+                    broker._session(self.request)
+                except OSError:
+                    pass
+                finally:
+                    with broker._lock:
+                        broker._connections.discard(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', self.port or 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Broker-Ausfall: Listener schließen und alle Verbindungen trennen."""
+        self.outages += 1
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            for conn in list(self._connections):
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _session(self, conn):
+        reader = conn.makefile('rb')
+        while True:
+            first = reader.read(1)
+            if not first:
+                return
+            length, shift = 0, 0
+            while True:
+                byte = reader.read(1)[0]
+                length |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            body = reader.read(length)
+            kind = first[0] >> 4
+            if kind == 1:  # CONNECT
+                conn.sendall(b'\x20\x02\x00\x00')
+            elif kind == 3:  # PUBLISH
+                self.publishes += 1
+                if (first[0] >> 1) & 0x03:
+                    topic_len = struct.unpack('>H', body[:2])[0]
+                    conn.sendall(b'\x40\x02' + body[2 + topic_len : 4 + topic_len])
+            elif kind == 12:  # PINGREQ
+                conn.sendall(b'\xd0\x00')
+            elif kind == 14:  # DISCONNECT
+                return
+
+
+# --- MESSUNG ---
+def read_proc(pid):
+    """RSS (KiB), Threads, offene Dateideskriptoren und CPU-Zeit (s) eines Prozesses aus /proc."""
+    sample = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                sample['rss_kib'] = int(line.split()[1])
+            elif line.startswith('Threads:'):
+                sample['threads'] = int(line.split()[1])
+    sample['fds'] = len(os.listdir(f'/proc/{pid}/fd'))
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    sample['cpu_s'] = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    return sample
+
+
+def read_traced_kib(pid, profile_dir, timeout=10):
+    """Löst per SIGUSR2 einen Speicher-Snapshot der Bridge aus und liest tracemalloc 'aktuell' (KiB)."""
+    before = set(glob.glob(os.path.join(profile_dir, '*.mem.txt')))
+    os.kill(pid, signal.SIGUSR2)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        new = set(glob.glob(os.path.join(profile_dir, '*.mem.txt'))) - before
+        for path in new:
+            with open(path, encoding='utf-8') as f:
+                match = re.search(r'tracemalloc: aktuell (\d+) KiB', f.read())
+            os.remove(path)
+            if match:
+                return int(match.group(1))
+        time.sleep(0.1)
+    return None
+
+
+def fitted_growth(samples, key):
+    """Wachstum der Regressionsgeraden über die Messdauer (None, wenn zu wenige Werte)."""
+    points = [(s['elapsed'], s[key]) for s in samples if s.get(key) is not None]
+    if len(points) < MIN_SAMPLES:
+        return None
+    xs, ys = zip(*points)
+    if len(set(xs)) < 2:
+        return None
+    slope, _ = statistics.linear_regression(xs, ys)
+    return slope * (xs[-1] - xs[0]), ys[0]
+
+
+def evaluate(samples, warmup):
+    """Prüft alle Metriken nach der Aufwärmphase auf stetiges Wachstum; liefert (ok, Zeilen)."""
+    steady = samples[int(len(samples) * warmup) :]
+    if len(steady) < MIN_SAMPLES:
+        return False, [
+            f'  Nur {len(steady)} Messpunkte nach der Aufwärmphase - --duration erhöhen oder --interval senken'
+        ]
+    ok = True
+    lines = []
+    for key, relative, minimum in LIMITS:
+        result = fitted_growth(steady, key)
+        if result is None:
+            lines.append(f'  {key:11}: nicht gemessen')
+            continue
+        growth, start = result
+        limit = max(relative * start, minimum)
+        failed = growth > limit
+        ok &= not failed
+        lines.append(
+            f'  {key:11}: {start:>10.0f} -> Trend {growth:+.0f} (Grenze +{limit:.0f}) {"FEHLER" if failed else "ok"}'
+        )
+
+    cpu = [s['cpu_per_frame_us'] for s in steady if s.get('cpu_per_frame_us') is not None]
+    if len(cpu) >= MIN_SAMPLES:
+        third = len(cpu) // 3
+        first, last = statistics.mean(cpu[:third]), statistics.mean(cpu[-third:])
+        failed = first > 0 and last > first * CPU_DRIFT
+        ok &= not failed
+        lines.append(
+            f'  {"cpu/frame":11}: {first:>10.1f} -> {last:.1f} µs (Grenze x{CPU_DRIFT}) {"FEHLER" if failed else "ok"}'
+        )
+    else:
+        lines.append(f'  {"cpu/frame":11}: nicht gemessen')
+    return ok, lines
+
+
+# --- FEHLERINJEKTION ---
+class FaultSchedule:
+    """Löst Reconnects, Watchdog-Stillstände und Broker-Ausfälle in festen Abständen aus."""
+
+    def __init__(self, args, simulator, broker):
+        self.args = args
+        self.simulator = simulator
+        self.broker = broker
+        now = time.monotonic()
+        self.next = {'reconnect': now + args.reconnect_every, 'watchdog': now + args.watchdog_every}
+        self.next['outage'] = now + args.outage_every if broker else float('inf')
+        self.broker_back = None
+        self.counts = {'reconnect': 0, 'watchdog': 0, 'outage': 0}
+
+    def tick(self):
+        now = time.monotonic()
+        if self.broker_back is not None and now >= self.broker_back:
+            self.broker.start()
+            self.broker_back = None
+        if now >= self.next['reconnect']:
+            self.simulator.disconnect()
+            self._done('reconnect', now, self.args.reconnect_every)
+        if now >= self.next['watchdog']:
+            self.simulator.stall(self.args.watchdog_stall)
+            self._done('watchdog', now, self.args.watchdog_every)
+        if now >= self.next['outage'] and self.broker_back is None:
+            self.broker.stop()
+            self.broker_back = now + self.args.outage_duration
+            self._done('outage', now, self.args.outage_every)
+
+    def _done(self, kind, now, every):
+        self.counts[kind] += 1
+        self.next[kind] = now + every
+
+
+# --- BRIDGE ---
+def soak_bridge(args, simulator, broker, workdir):
+    """Startet hoval.py als Unterprozess gegen Simulator und Broker und misst von außen über /proc."""
+    ini = os.path.join(workdir, 'soak.ini')
+    with open(ini, 'w', encoding='utf-8') as f:
+        f.write(
+            f'[hoval]\nip = 127.0.0.1\nport = {simulator.port}\n'
+            f'csv_file = {os.path.join(BASE_DIR, "hoval_datapoints.csv")}\n'
+            f'[mqtt]\nenabled = true\nip = 127.0.0.1\nport = {broker.port}\nqos = {args.qos}\n'
+            '[logging]\ndebug_console = false\n'
+            f'[watchdog]\nenabled = true\ntimeout = {args.watchdog_timeout}\n'
+            '[connection]\nbackoff_initial = 0.2\nbackoff_max = 2\n'
+            f'[profiling]\ndir = {workdir}\n'
+        )
+    log_path = os.path.join(workdir, 'hoval.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        process = subprocess.Popen(
+            [sys.executable, '-c', 'import sys, hoval; hoval.main(sys.argv[1])', ini],
+            cwd=BASE_DIR,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    print(f'Bridge gestartet (PID {process.pid}), Log: {log_path}')
+    time.sleep(2)
+    if args.tracemalloc:
+        read_traced_kib(process.pid, workdir)  # Erster SIGUSR2 startet tracemalloc
+
+    def sample():
+        if process.poll() is not None:
+            raise RuntimeError(f'Bridge beendet (Exit-Code {process.returncode}), siehe {log_path}')
+        values = read_proc(process.pid)
+        if args.tracemalloc:
+            values['traced_kib'] = read_traced_kib(process.pid, workdir)
+        return values
+
+    try:
+        return run_samples(args, simulator, broker, sample)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# --- HA-COORDINATOR ---
+def soak_coordinator(args, simulator, workdir):
+    """Betreibt den Coordinator der HA-Integration im eigenen Prozess gegen den Simulator."""
+    try:
+        from homeassistant.const import CONF_HOST, CONF_PORT
+        from homeassistant.core import HomeAssistant
+
+        from custom_components.hoval_gateway.catalog import CSV_PATH, load_catalog
+        from custom_components.hoval_gateway.coordinator import HovalDataUpdateCoordinator
+    except ImportError as e:
+        sys.exit(f'--coordinator benötigt Home Assistant ({e})')
+
+    async def run():
+        hass = HomeAssistant(workdir)
+        entry = SimpleNamespace(entry_id='soak', data={CONF_HOST: '127.0.0.1', CONF_PORT: simulator.port}, options={})
+        catalog = await hass.async_add_executor_job(load_catalog, CSV_PATH, 513, ())
+        coordinator = HovalDataUpdateCoordinator(hass, entry, catalog)
+        await coordinator._start_connection()
+        if args.tracemalloc:
+            tracemalloc.start()
+
+        def sample():
+            values = read_proc(os.getpid())
+            if args.tracemalloc:
+                values['traced_kib'] = tracemalloc.get_traced_memory()[0] // 1024
+            values['frames'] = coordinator.parse_stats['frames']
+            return values
+
+        try:
+            # Messschleife im Executor, damit der Event-Loop des Coordinators weiterläuft
+            return await hass.async_add_executor_job(run_samples, args, simulator, None, sample)
+        finally:
+            await coordinator.async_shutdown()
+
+    return asyncio.run(run())
+
+
+# --- ABLAUF ---
+def run_samples(args, simulator, broker, sample):
+    """Misst alle --interval Sekunden bis --duration, injiziert dabei Fehler; liefert die Messpunkte."""
+    faults = FaultSchedule(args, simulator, broker)
+    samples = []
+    start = time.monotonic()
+    last_cpu = last_frames = None
+    next_sample = start
+    while time.monotonic() - start < args.duration:
+        faults.tick()
+        if time.monotonic() < next_sample:
+            time.sleep(0.2)
+            continue
+        next_sample += args.interval
+        values = sample()
+        frames = values.pop('frames', simulator.frames_sent)
+        values['elapsed'] = round(time.monotonic() - start, 1)
+        values['frames'] = frames
+        if last_cpu is not None and frames > last_frames:
+            values['cpu_per_frame_us'] = (values['cpu_s'] - last_cpu) / (frames - last_frames) * 1e6
+        last_cpu, last_frames = values['cpu_s'], frames
+        samples.append(values)
+        cpu = values.get('cpu_per_frame_us')
+        cpu_text = f'{cpu:6.1f}' if cpu is not None else '     -'
+        print(
+            f'[{values["elapsed"]:7.0f}s] Frames {frames:>10} RSS {values["rss_kib"]:>7} KiB '
+            f'traced {values.get("traced_kib") or "-":>6} KiB Threads {values["threads"]:>3} FDs {values["fds"]:>3} '
+            f'CPU/Frame {cpu_text} µs'
+        )
+    print(
+        f'Fehler injiziert: {faults.counts["reconnect"]} Reconnects, {faults.counts["watchdog"]} Watchdog-Stillstände, '
+        f'{faults.counts["outage"]} Broker-Ausfälle; {simulator.connections} Gateway-Verbindungen'
+    )
+    return samples
+
+
+def write_samples(path, samples):
+    fields = sorted({key for s in samples for key in s})
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, delimiter=';')
+        writer.writeheader()
+        writer.writerows(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=600, help='Laufzeit in Sekunden (Standard: 600)')
+    parser.add_argument('--interval', type=float, default=10, help='Messabstand in Sekunden')
+    parser.add_argument('--fps', type=int, default=2000, help='Frames pro Sekunde des Simulators')
+    parser.add_argument('--real-fps', type=float, default=2, help='Frame-Rate des echten Gateways (für Zeitraffer)')
+    parser.add_argument('--warmup', type=float, default=0.2, help='Anteil der Messpunkte ohne Bewertung')
+    parser.add_argument('--reconnect-every', type=float, default=60, help='Gateway-Verbindung trennen (s)')
+    parser.add_argument('--watchdog-every', type=float, default=300, help='Datenstillstand auslösen (s)')
+    parser.add_argument('--watchdog-timeout', type=int, default=3, help='Watchdog-Timeout der Bridge (s)')
+    parser.add_argument('--watchdog-stall', type=float, default=15, help='Dauer des Stillstands (s)')
+    parser.add_argument('--outage-every', type=float, default=120, help='Broker-Ausfall auslösen (s)')
+    parser.add_argument('--outage-duration', type=float, default=15, help='Dauer des Broker-Ausfalls (s)')
+    parser.add_argument('--qos', type=int, default=0, choices=(0, 1), help='MQTT-QoS der Bridge')
+    parser.add_argument('--no-tracemalloc', dest='tracemalloc', action='store_false', help='Ohne tracemalloc')
+    parser.add_argument('--coordinator', action='store_true', help='HA-Coordinator statt Bridge testen')
+    parser.add_argument('-o', '--output', help='Messpunkte als CSV schreiben')
+    args = parser.parse_args()
+
+    hoval.CSV_FILE = os.path.join(BASE_DIR, 'hoval_datapoints.csv')
+    datapoints = sorted(hoval.read_datapoints().values(), key=lambda dp: dp['id'])
+    simulator = GatewaySimulator(datapoints, args.fps)
+
+    with tempfile.TemporaryDirectory(prefix='hoval-soak-') as workdir:
+        if args.coordinator:
+            samples = soak_coordinator(args, simulator, workdir)
+        else:
+            broker = FakeBroker()
+            samples = soak_bridge(args, simulator, broker, workdir)
+            print(f'Broker: {broker.publishes} Nachrichten, {broker.outages} Ausfälle')
+
+    if args.output:
+        write_samples(args.output, samples)
+    frames = samples[-1]['frames'] if samples else 0
+    days = frames / args.real_fps / 86400
+    print(f'{frames} Frames in {args.duration:.0f}s = {days:.1f} Tage Gateway-Verkehr ({args.real_fps} Frames/s)')
+
+    ok, lines = evaluate(samples, args.warmup)
+    print('\n'.join(lines))
+    print('BESTANDEN' if ok else 'FEHLGESCHLAGEN')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
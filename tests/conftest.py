@@ -0,0 +1,69 @@
+"""Gemeinsame Fixtures: hoval.py mit Standardkonfiguration, ohne MQTT und Konsolenausgabe."""
+
+import configparser
+import csv
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hoval as hoval_module  # noqa: E402
+
+CSV_FIELDS = ['UnitName', 'UnitId', 'DatapointId', 'DatapointName', 'TypeName', 'Decimal', 'unit']
+CSV_FIELDS += ['Steps', 'Min. value', 'Max. value', 'Writable']
+
+
+def apply(sections=None):
+    """Wendet eine Konfiguration (Abschnitt -> {Schlüssel: Wert}) auf die Standardwerte an."""
+    config = configparser.ConfigParser()
+    config.read_dict({'mqtt': {'enabled': 'false'}, 'logging': {'debug_console': 'false'}})
+    config.read_dict(sections or {})
+    hoval_module.apply_config(config)
+
+
+@pytest.fixture
+def hoval(monkeypatch):
+    """hoval.py mit frischem Laufzeitzustand, nach dem Test wieder mit Standardwerten."""
+    apply()
+    monkeypatch.setattr(hoval_module, 'last_sent', {})
+    monkeypatch.setattr(hoval_module, 'frame_states', OrderedDict())
+    monkeypatch.setattr(hoval_module, 'frame_cache_stats', dict.fromkeys(hoval_module.frame_cache_stats, 0))
+    monkeypatch.setattr(hoval_module, 'stateful_checks', 0)
+    monkeypatch.setattr(hoval_module, 'published_reads', [])
+    monkeypatch.setattr(hoval_module, 'value_queue', OrderedDict())
+    monkeypatch.setattr(hoval_module, 'pipeline_stats', dict.fromkeys(hoval_module.pipeline_stats, 0))
+    monkeypatch.setattr(hoval_module, 'frames_total', 0)
+    monkeypatch.setattr(hoval_module, 'frame_lengths', {})
+    monkeypatch.setattr(hoval_module, 'frame_length_candidates', {})
+    monkeypatch.setattr(hoval_module, 'frame_check_stats', dict.fromkeys(hoval_module.frame_check_stats, 0))
+    hoval_module.set_datapoint_map({})
+    yield hoval_module
+    hoval_module.set_datapoint_map({})
+    hoval_module.apply_config(configparser.ConfigParser())
+
+
+@pytest.fixture
+def configure(hoval):
+    """configure({'validation': {...}}): Konfiguration anwenden (vor load_datapoints aufrufen)."""
+    return apply
+
+
+@pytest.fixture
+def load_datapoints(hoval, tmp_path):
+    """load_datapoints([{'DatapointId': 0, 'DatapointName': ..., ...}]): CSV schreiben und laden."""
+
+    def load(rows):
+        path = tmp_path / 'datapoints.csv'
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, CSV_FIELDS, delimiter=';')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({'UnitName': 'HV', 'UnitId': 513, 'TypeName': 'S16', 'Decimal': 1, 'unit': '', **row})
+        hoval.CSV_FILE = str(path)
+        assert hoval.load_csv()
+        return {dp['id']: dp for dp in hoval.datapoint_map.values()}
+
+    return load
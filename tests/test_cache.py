@@ -0,0 +1,112 @@
+"""Frame-Cache und differenzielle Dekodierung liefern dieselben Werte wie eine volle Dekodierung."""
+
+import random
+import struct
+
+import pytest
+
+HEADER = b'\x10\x20\x30'
+CACHE_MODES = [
+    pytest.param({'enabled': 'true', 'differential': 'true'}, id='cache+diff'),
+    pytest.param({'enabled': 'true', 'differential': 'false'}, id='cache'),
+    pytest.param({'enabled': 'false', 'differential': 'true'}, id='diff'),
+]
+
+
+def frame(*parts):
+    """Frame ohne 0xFF 0x01: Header, Datenpunkte, Füllbytes und Abschluss 0xFF 0x02."""
+    return HEADER + b''.join(parts) + b'\x55\x55\x55\x55\xff\x02'
+
+
+def prefixed(dp_id, value):
+    """Datenpunkt mit 0x00 Prefix und S16-Wert (eine Dezimalstelle)."""
+    return b'\x00' + struct.pack('>Hh', dp_id, round(value * 10))
+
+
+def replay(hoval, frames, topic):
+    """Verarbeitet die Frames und liefert last_sent[topic] nach jedem Frame."""
+    values = []
+    for data in frames:
+        hoval.process_stream(None, data)
+        values.append(hoval.last_sent.get(topic))
+    return values
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_median_sees_repeated_frames(configure, load_datapoints, hoval, cache):
+    configure({'cache': cache, 'framecheck': {'enabled': 'false'}, 'rules': {'12': 'median'}})
+    dp = load_datapoints([{'DatapointId': 12, 'DatapointName': 'Feuchtigkeit Abluft', 'unit': '%'}])[12]
+    frames = [frame(prefixed(12, value)) for value in (20, 21, 21, 30, 30, 30)]
+    # Median der letzten 3 Werte: jeder Frame zählt, auch ein byte-identischer
+    assert replay(hoval, frames, dp['topic']) == [20.0, 21.0, 21.0, 21.0, 30.0, 30.0]
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_rate_resets_through_repeated_frames(configure, load_datapoints, hoval, cache):
+    configure({'cache': cache, 'framecheck': {'enabled': 'false'}, 'rules': {'12': 'rate 5'}})
+    dp = load_datapoints([{'DatapointId': 12, 'DatapointName': 'Feuchtigkeit Abluft', 'unit': '%'}])[12]
+    frames = [frame(prefixed(12, value)) for value in (20, 40, 40, 40, 40)]
+    # Nach RATE_RESET_AFTER verworfenen Sprüngen in Folge wird der neue Wert übernommen
+    assert replay(hoval, frames, dp['topic']) == [20.0, 20.0, 20.0, 40.0, 40.0]
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_jump_rule_rechecks_against_published_value(configure, load_datapoints, hoval, cache):
+    configure({'cache': cache, 'framecheck': {'enabled': 'false'}})
+    dp = load_datapoints([{'DatapointId': 1, 'DatapointName': 'Temp. Zuluft', 'unit': '°C'}])[1]
+
+    def noprefix(value):
+        return frame(b'\x00\x01' + struct.pack('>h', round(value * 10)))
+
+    # Der zweite 10.0-Frame ist byte-identisch zum ersten, liegt aber mehr als noprefix_rate
+    # vom inzwischen publizierten Wert entfernt
+    frames = [noprefix(10.0), noprefix(10.0), noprefix(25.0), noprefix(40.0), noprefix(10.0)]
+    assert replay(hoval, frames, dp['topic']) == [10.0, 10.0, 25.0, 40.0, 40.0]
+
+
+def humidity(dp_id):
+    return {'DatapointId': dp_id, 'DatapointName': f'Feuchtigkeit {dp_id}', 'unit': '%'}
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_shared_datapoint_across_signatures(configure, load_datapoints, hoval, cache):
+    configure({'cache': cache, 'framecheck': {'enabled': 'false'}})
+    dp = load_datapoints([humidity(12), humidity(13)])[12]
+    # Zwei Frame-Layouts (Signaturen) mit demselben Datenpunkt und unterschiedlichem Wert
+    a = frame(prefixed(12, 72))
+    b = b'\x11' + frame(prefixed(13, 5), prefixed(12, 71))[1:]
+    changed_a = frame(prefixed(12, 72)).replace(b'\x55\x55', b'\x55\x56', 1)
+    # A-B-A: Cache-Treffer bzw. übernommene Treffer müssen gegen last_sent abgeglichen werden
+    assert replay(hoval, [a, b, a, b, changed_a], dp['topic']) == [72.0, 71.0, 72.0, 71.0, 72.0]
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_replay_matches_full_decode(configure, load_datapoints, hoval, cache):
+    """Zufällige Frames aus 4 Layouts, die sich 3 Datenpunkte teilen: Stand nach jedem Frame wie ohne Cache."""
+    rnd = random.Random(1)
+    ids = list(range(10, 30))
+    shared, own = ids[:3], ids[3:]
+    layouts = [(bytes([0x10 + n, 0x20, 0x30]), shared + own[n::4]) for n in range(4)]
+    raws = [dict.fromkeys(layout, 200) for _, layout in layouts]
+    frames = []
+    for _ in range(2000):
+        n = rnd.randrange(4)
+        header, layout = layouts[n]
+        if rnd.random() < 0.3:
+            raws[n][rnd.choice(layout)] = rnd.choice((200, 201, 202, 203))
+        parts = [b'\x00' + struct.pack('>HH', dp_id, raws[n][dp_id]) for dp_id in layout]
+        frames.append(header + b''.join(parts) + b'\xff\x02')
+
+    def run(sections):
+        configure({'framecheck': {'enabled': 'false'}, **sections})
+        load_datapoints([humidity(dp_id) for dp_id in ids])
+        hoval.last_sent.clear()
+        hoval.frame_states.clear()
+        states = []
+        for data in frames:
+            hoval.process_stream(None, data)
+            states.append(dict(hoval.last_sent))
+        return states
+
+    reference = run({'cache': {'enabled': 'false', 'differential': 'false'}})
+    assert run({'cache': cache}) == reference
@@ -0,0 +1,22 @@
+"""hoval_catalog: jedes Vorkommen eines Werts zählt, auch wenn er sich nie ändert."""
+
+import struct
+
+import hoval_catalog
+
+
+def frame(values):
+    """Frame ab 0xFF 0x01 mit Datenpunkten (0x00 Prefix, S16 mit einer Dezimalstelle) und Abschluss."""
+    parts = [b'\x00' + struct.pack('>Hh', dp_id, round(value * 10)) for dp_id, value in values.items()]
+    return b'\xff\x01\x10\x20\x30' + b''.join(parts) + b'\xff\x02'
+
+
+def test_constant_values_are_counted_per_frame(configure, load_datapoints, hoval):
+    configure({'cache': {'enabled': 'true', 'differential': 'true'}, 'framecheck': {'enabled': 'false'}})
+    load_datapoints([{'DatapointId': dp_id, 'DatapointName': f'Feuchtigkeit {dp_id}'} for dp_id in (10, 11)])
+    chunks = [frame({10: 40.0, 11: 41.0 + i % 2}) for i in range(5)]
+
+    seen, frames = hoval_catalog.observe(chunks)
+
+    assert frames == 5
+    assert seen == {'Feuchtigkeit 10': [5, 40.0, 40.0], 'Feuchtigkeit 11': [5, 41.0, 42.0]}
@@ -0,0 +1,31 @@
+"""Strukturprüfung: gelernte Frame-Längen werden von Reader (split_frames) und Decoder (check_frame) geteilt."""
+
+import threading
+
+import pytest
+
+FRAME = b'\x10\x20\x30\x00\x00\x0a\x01\x90'
+
+
+def test_learned_length_completes_frame_without_terminator(configure, hoval, monkeypatch):
+    configure({'framecheck': {'learn_frames': '0', 'learn_min': '2'}})
+    assert hoval.split_frames(b'\xff\x01' + FRAME) == ([b''], b'\xff\x01' + FRAME)
+
+    assert hoval.check_frame(FRAME)
+    assert hoval.check_frame(FRAME)
+    assert hoval.split_frames(b'\xff\x01' + FRAME) == ([b'', FRAME], b'')
+    monkeypatch.setattr(hoval, 'frames_total', 1)  # Lernphase vorbei
+    assert not hoval.check_frame(FRAME[:-1])
+    assert hoval.frame_check_stats['truncated'] == 1
+
+
+@pytest.mark.parametrize('call', ['split_frames', 'check_frame', 'reset_frame_check', 'log_frame_check_stats'])
+def test_frame_check_state_is_locked(hoval, call):
+    args = {'split_frames': (b'\xff\x01' + FRAME,), 'check_frame': (FRAME,)}.get(call, ())
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (getattr(hoval, call)(*args), done.set()))
+    with hoval.frame_check_lock:
+        thread.start()
+        assert not done.wait(0.05)
+    thread.join(1)
+    assert done.is_set()
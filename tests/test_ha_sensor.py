@@ -0,0 +1,87 @@
+"""Home-Assistant-Integration: deaktivierte Entitäten landen in den übersprungenen Datenpunkten."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.hoval_gateway import sensor  # noqa: E402
+from custom_components.hoval_gateway.const import DOMAIN  # noqa: E402
+
+
+class Registry:
+    """Entity-Registry mit den von sensor.py genutzten Abfragen."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def async_get_entity_id(self, domain, platform, unique_id):
+        return next((entity_id for entity_id, e in self.entries.items() if e.unique_id == unique_id), None)
+
+    def async_get(self, entity_id):
+        return self.entries.get(entity_id)
+
+
+class Coordinator:
+    def __init__(self, names):
+        self.datapoint_map = {dp_id: SimpleNamespace(name=name, unit='°C') for dp_id, name in names.items()}
+        self.skip_ids = frozenset()
+        self.interest_updates = 0
+
+    def set_interest(self, skip_ids):
+        self.interest_updates += 1
+        self.skip_ids = skip_ids
+
+    def async_add_catalog_listener(self, listener):
+        return lambda: None
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(sensor.er, 'async_get', lambda hass: registry)
+    coordinator = Coordinator({1: 'Temp. Zuluft', 2: 'Temp. Abluft'})
+    entry = SimpleNamespace(entry_id='entry', async_on_unload=lambda remove: None)
+    listeners = []
+    hass = SimpleNamespace(
+        data={DOMAIN: {entry.entry_id: coordinator}},
+        bus=SimpleNamespace(async_listen=lambda event_type, listener: listeners.append(listener)),
+    )
+
+    def add_entities(entities):
+        for entity in entities:
+            entity_id = f'sensor.{entity.unique_id}'
+            registry.entries[entity_id] = SimpleNamespace(
+                unique_id=entity.unique_id, config_entry_id=entry.entry_id, disabled=False
+            )
+
+    asyncio.run(sensor.async_setup_entry(hass, entry, add_entities))
+
+    def update(entity_id, changes):
+        for listener in listeners:
+            listener(SimpleNamespace(data={'action': 'update', 'entity_id': entity_id, 'changes': changes}))
+
+    return registry, coordinator, update
+
+
+def test_disabling_an_entity_skips_its_datapoint(setup):
+    registry, coordinator, update = setup
+    assert coordinator.skip_ids == frozenset()
+
+    registry.entries['sensor.entry_temp_abluft'].disabled = True
+    update('sensor.entry_temp_abluft', {'disabled_by': None})
+    assert coordinator.skip_ids == frozenset({2})
+
+
+def test_other_registry_updates_are_ignored(setup):
+    registry, coordinator, update = setup
+    updates = coordinator.interest_updates
+
+    registry.entries['sensor.entry_temp_abluft'].disabled = True
+    update('sensor.entry_temp_abluft', {'name': None})
+    registry.entries['sensor.other'] = SimpleNamespace(unique_id='other', config_entry_id='other', disabled=True)
+    update('sensor.other', {'disabled_by': None})
+    assert coordinator.interest_updates == updates
+    assert coordinator.skip_ids == frozenset()
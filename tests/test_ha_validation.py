@@ -0,0 +1,29 @@
+"""Temperatur-Teilmenge der Standardregeln in der Home-Assistant-Integration."""
+
+import pytest
+
+pytest.importorskip('homeassistant')
+
+from custom_components.hoval_gateway.validation import compile_rules, make_validator  # noqa: E402
+
+
+def accepted(validate, *values):
+    return [value for value in values if validate(value) is not None]
+
+
+def test_temperature_range_and_sentinels():
+    validate = make_validator(compile_rules('Temp. Abluft', '°C'), lambda: False)
+    assert accepted(validate, 25.5, 25.45, -25.55, 25.6, 70.1, -40.1, 0.0, 112.0) == [25.6, 0.0]
+
+
+def test_outdoor_zero_only_while_without_value():
+    has_value = False
+    validate = make_validator(compile_rules('Aussentemperatur', '°C'), lambda: has_value)
+    assert accepted(validate, 0.0, 3.0) == [3.0]
+    has_value = True
+    assert accepted(validate, 0.0) == [0.0]
+
+
+def test_other_units_are_not_filtered():
+    validate = make_validator(compile_rules('Feuchtigkeit Abluft', '%'), lambda: False)
+    assert accepted(validate, 25.5, 112.0, 0.0, 500.0) == [25.5, 112.0, 0.0, 500.0]
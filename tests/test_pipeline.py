@@ -0,0 +1,61 @@
+"""Pipeline: verworfene Werte werden nachgeliefert, unveränderte Werte halten last_value_time aktuell."""
+
+import struct
+
+import pytest
+
+
+def frame(values):
+    """Frame mit Datenpunkten (0x00 Prefix, S16 mit einer Dezimalstelle) und Abschluss 0xFF 0x02."""
+    parts = [b'\x00' + struct.pack('>Hh', dp_id, round(value * 10)) for dp_id, value in values.items()]
+    return b'\x10\x20\x30' + b''.join(parts) + b'\xff\x02'
+
+
+CACHE_MODES = [
+    pytest.param({'enabled': 'true', 'differential': 'true'}, id='cache+diff'),
+    pytest.param({'enabled': 'false', 'differential': 'true'}, id='diff'),
+    pytest.param({'enabled': 'false', 'differential': 'false'}, id='memo'),
+]
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_dropped_value_is_redelivered(configure, load_datapoints, hoval, monkeypatch, cache):
+    configure({'cache': cache, 'framecheck': {'enabled': 'false'}, 'pipeline': {'value_queue': '2'}})
+    rows = [{'DatapointId': dp_id, 'DatapointName': f'Feuchtigkeit {dp_id}', 'unit': '%'} for dp_id in (10, 11, 12)]
+    dps = load_datapoints(rows)
+    monkeypatch.setattr(hoval, 'value_pipeline_active', True)
+    values = {10: 40.0, 11: 41.0, 12: 42.0}
+
+    published = {}
+
+    def publish():
+        while hoval.value_queue:
+            topic, (_, value, _, _) = hoval.value_queue.popitem(last=False)
+            published[topic] = value
+
+    hoval.process_stream(None, frame(values))
+    assert hoval.pipeline_stats['values_dropped'] == 1
+    assert dps[10]['topic'] not in hoval.last_sent
+    publish()
+
+    # Dieselben Bytes noch einmal: nur der verworfene Wert kommt erneut
+    hoval.process_stream(None, frame(values))
+    assert list(hoval.value_queue) == [dps[10]['topic']]
+    publish()
+    assert published == {dps[dp_id]['topic']: value for dp_id, value in values.items()}
+
+
+@pytest.mark.parametrize('cache', CACHE_MODES)
+def test_unchanged_values_refresh_last_value_time(configure, load_datapoints, hoval, monkeypatch, cache):
+    configure({'cache': cache, 'framecheck': {'enabled': 'false'}})
+    load_datapoints([{'DatapointId': 10, 'DatapointName': 'Feuchtigkeit 10', 'unit': '%'}])
+    monkeypatch.setattr(hoval, 'last_value_time', 0.0)
+
+    hoval.process_stream(None, frame({10: 40.0}))
+    first = hoval.last_value_time
+    assert first
+
+    # Gleiche Bytes: kein handle_output (Cache-Treffer, Diff bzw. Memo), aber ein gültiger Wert
+    monkeypatch.setattr(hoval.time, 'monotonic', lambda: first + 60)
+    hoval.process_stream(None, frame({10: 40.0}))
+    assert hoval.last_value_time == first + 60
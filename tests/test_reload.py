@@ -0,0 +1,43 @@
+"""SIGHUP lädt nur Filter, Plausibilitätsregeln, CSV und Watchdog neu."""
+
+import configparser
+
+
+def write_config(path, sections):
+    config = configparser.ConfigParser()
+    config.read_dict(sections)
+    with open(path, 'w', encoding='utf-8') as f:
+        config.write(f)
+
+
+def test_reload_keeps_runtime_settings(hoval, load_datapoints, tmp_path, monkeypatch, capsys):
+    load_datapoints([{'DatapointId': 12, 'DatapointName': 'Feuchtigkeit Abluft', 'unit': '%'}])
+    path = tmp_path / 'config.ini'
+    startup = {
+        'hoval': {'ip': '10.0.0.95', 'csv_file': hoval.CSV_FILE},
+        'mqtt': {'enabled': 'false', 'qos': '0'},
+        'pipeline': {'value_queue': '512'},
+        'validation': {'decimal_sentinels': '112.0'},
+        'watchdog': {'timeout': '60'},
+    }
+    write_config(path, startup)
+    hoval.apply_config(hoval.load_config(str(path)))
+    monkeypatch.setattr(hoval, 'config_file', str(path))
+    monkeypatch.setattr(hoval, 'pending_datapoint_map', None)
+
+    changed = {
+        'hoval': {'ip': '10.0.0.96', 'csv_file': hoval.CSV_FILE},
+        'mqtt': {'enabled': 'false', 'qos': '1'},
+        'pipeline': {'value_queue': '16'},
+        'validation': {'decimal_sentinels': '99.0'},
+        'watchdog': {'timeout': '120'},
+        'rules': {'12': 'range 0..150'},
+    }
+    write_config(path, changed)
+    hoval.reload_datapoints()
+
+    assert (hoval.HOVAL_IP, hoval.MQTT_QOS, hoval.PIPELINE_VALUE_QUEUE) == ('10.0.0.95', 0, 512)
+    assert hoval.WATCHDOG_TIMEOUT == 120
+    validate = hoval.pending_datapoint_map[b'\x00\x0c']['validate']
+    assert [validate(value) for value in (112.0, 99.0, 160.0, 40.0)] == [112.0, None, None, 40.0]
+    assert '[hoval], [mqtt], [pipeline] - wirkt erst nach einem Neustart' in capsys.readouterr().out
@@ -0,0 +1,38 @@
+"""systemd-Watchdog: WATCHDOG=1 hängt an Hauptschleife und Threads, fehlende Daten stehen im STATUS."""
+
+import threading
+import time
+
+
+def test_service_problem(hoval, monkeypatch):
+    now = time.monotonic()
+    alive = threading.Event()
+    thread = threading.Thread(target=alive.wait, name='decoder')
+    thread.start()
+    monkeypatch.setattr(hoval, 'service_threads', [thread])
+
+    monkeypatch.setattr(hoval, 'main_loop_time', now - 10)
+    assert hoval.service_problem(now, 90) is None
+    # Geplante Wartezeit vor einem Reconnect liegt in der Zukunft
+    monkeypatch.setattr(hoval, 'main_loop_time', now + 30)
+    assert hoval.service_problem(now, 90) is None
+    monkeypatch.setattr(hoval, 'main_loop_time', now - 90)
+    assert hoval.service_problem(now, 90) == 'Hauptschleife hängt seit 90s'
+
+    monkeypatch.setattr(hoval, 'main_loop_time', now)
+    alive.set()
+    thread.join()
+    assert hoval.service_problem(now, 90) == 'Thread decoder beendet'
+
+
+def test_status_without_data(hoval, monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(hoval, 'last_value_time', 0.0)
+    monkeypatch.setattr(hoval, 'current_socket', None)
+    assert hoval.systemd_status(0.0) == 'STATUS=Keine Daten, nicht verbunden, noch kein Wert'
+
+    monkeypatch.setattr(hoval, 'current_socket', object())
+    monkeypatch.setattr(hoval, 'last_data_time', now - 42)
+    monkeypatch.setattr(hoval, 'last_value_time', now - 42)
+    assert hoval.systemd_status(0.0).startswith('STATUS=Keine Daten seit 42s, letzter Wert vor 42.')
+    assert hoval.systemd_status(12.5).startswith('STATUS=12.5 Frames/s, letzter Wert vor 42.')
@@ -0,0 +1,93 @@
+"""Standardregeln je Erkennungsweg (siehe compile_rules) und opt-in über [validation]/[rules]."""
+
+import pytest
+
+TEMP = {'DatapointId': 10, 'DatapointName': 'Temp. Abluft', 'unit': '°C'}
+OUTDOOR = {'DatapointId': 11, 'DatapointName': 'Aussentemperatur', 'unit': '°C'}
+HUMIDITY = {'DatapointId': 12, 'DatapointName': 'Feuchtigkeit Abluft', 'unit': '%'}
+NOPREFIX_TEMP = {'DatapointId': 0, 'DatapointName': 'Aussentemperatur', 'unit': '°C'}
+NOPREFIX_OTHER = {'DatapointId': 3, 'DatapointName': 'Drehzahl', 'unit': '%'}
+
+
+def accepted(validate, *values):
+    return [value for value in values if validate(value) is not None]
+
+
+@pytest.mark.parametrize(
+    ('row', 'values', 'expected'),
+    [
+        # 'Temp' mit Dezimalstellen: temp_sentinels, decimal_sentinels und temp_range
+        (TEMP, (25.5, -25.5, 112.0, 70.1, -40.1, 70.0, -40.0, 0.0), [70.0, -40.0, 0.0]),
+        # Ohne Dezimalstellen gibt es keine Fehlercodes, nur den Bereich
+        ({**TEMP, 'Decimal': 0}, (25.0, 26.0, 71.0), [25.0, 26.0]),
+        # 'Aussen' ohne 'Temp': outdoor_sentinels statt temp_sentinels
+        (OUTDOOR, (0.0, 25.5, -25.5, 112.0, 70.1, 5.0), [25.5, -25.5, 5.0]),
+        # Weder 'Temp' noch 'Aussen': nur decimal_sentinels, kein Bereich
+        (HUMIDITY, (112.0, 25.5, 0.0, 500.0), [25.5, 0.0, 500.0]),
+        ({**HUMIDITY, 'Decimal': 0}, (112.0,), [112.0]),
+    ],
+)
+def test_prefix_defaults(load_datapoints, row, values, expected):
+    dp = load_datapoints([row])[row['DatapointId']]
+    assert accepted(dp['validate'], *values) == expected
+
+
+def test_noprefix_only_for_ids_0_to_5(load_datapoints):
+    dps = load_datapoints([NOPREFIX_TEMP, {**NOPREFIX_OTHER, 'DatapointId': 5}, TEMP])
+    assert dps[0]['validate_noprefix'] is not None
+    assert dps[5]['validate_noprefix'] is not None
+    assert dps[10]['validate_noprefix'] is None
+
+
+def test_noprefix_first_sentinels_until_published(hoval, load_datapoints):
+    dp = load_datapoints([NOPREFIX_TEMP])[0]
+    validate = dp['validate_noprefix']
+    assert accepted(validate, 0.0, 70.1, 25.5, 12.0) == [25.5, 12.0]
+
+    # Mit publiziertem Wert gilt die Sprung-Regel statt der Fehlercodes
+    hoval.last_sent[dp['topic']] = 5.0
+    assert accepted(validate, 0.0, 25.0, 25.1, -15.0, -15.1) == [0.0, 25.0, -15.0]
+
+
+def test_noprefix_without_temperature_has_no_range(hoval, load_datapoints):
+    dp = load_datapoints([NOPREFIX_OTHER])[3]
+    validate = dp['validate_noprefix']
+    assert accepted(validate, 0.0, 112.0, 150.0) == [0.0, 150.0]
+
+    hoval.last_sent[dp['topic']] = 150.0
+    assert accepted(validate, 129.9, 130.0) == [130.0]
+
+
+def test_outdoor_scan_range(load_datapoints):
+    dps = load_datapoints([NOPREFIX_TEMP, {**NOPREFIX_OTHER, 'DatapointId': 1}])
+    assert dps[1]['validate_outdoor'] is None
+    assert accepted(dps[0]['validate_outdoor'], 50.0, 50.1, -40.0, -40.1, 0.0) == [50.0, -40.0, 0.0]
+
+
+def test_csv_limits_are_opt_in(configure, load_datapoints):
+    row = {**HUMIDITY, 'Min. value': 150, 'Max. value': 400, 'Writable': 'Yes', 'Steps': 5}
+    dp = load_datapoints([row])[12]
+    assert accepted(dp['validate'], 10.0, 12.3) == [10.0, 12.3]
+
+    configure({'validation': {'csv_limits': 'true'}})
+    dp = load_datapoints([row])[12]
+    assert accepted(dp['validate'], 10.0, 20.0, 20.5, 40.5, 14.5) == [20.0, 20.5]
+
+    # Messwerte dürfen Sollwert-Grenzen verlassen: nur beschreibbare Datenpunkte
+    dp = load_datapoints([{**row, 'Writable': 'No', 'Steps': 1}])[12]
+    assert accepted(dp['validate'], 10.0, 40.5) == [10.0, 40.5]
+
+
+def test_custom_rules_apply_to_all_paths(configure, load_datapoints):
+    configure({'rules': {'0': 'range -10..10; sentinel 3.3'}})
+    dp = load_datapoints([NOPREFIX_TEMP])[0]
+    for key in ('validate', 'validate_noprefix', 'validate_outdoor'):
+        assert accepted(dp[key], -10.0, 10.0, 10.1, 3.3, 2.0) == [-10.0, 10.0, 2.0]
+
+
+def test_stateful_rules_disable_memo(configure, load_datapoints):
+    configure({'rules': {'12': 'median'}})
+    dps = load_datapoints([HUMIDITY, TEMP])
+    assert not dps[12]['memo']
+    assert dps[10]['memo']
+    assert [dps[12]['validate'](value) for value in (20.0, 30.0, 21.0)] == [20.0, 30.0, 21.0]